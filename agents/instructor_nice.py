@@ -4,16 +4,18 @@ from fairlib import (
     ToolRegistry,
     ToolExecutor,
     WorkingMemory,
-    OpenAIAdapter,
     RoleDefinition
 )
 
 from project_tools.cs110_kb_query import CS110KnowledgeQueryTool
+from pipeline.resources import get_chat_model
 
 
 class NiceInstructor(SimpleAgent):
     def __init__(self, model="gpt-4o"):
-        llm = OpenAIAdapter(model_name=model)
+        # Identical prompts are answered from the LLM response cache when
+        # it is enabled for this agent (LLM_CACHE_AGENT_TTL_S)
+        llm = get_chat_model(model, agent="nice_instructor")
 
         # Register the RAG tool
         tool_registry = ToolRegistry()
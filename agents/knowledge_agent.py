@@ -1,6 +1,5 @@
 from fairlib import (
     SimpleAgent,
-    OpenAIAdapter,
     ReActPlanner,
     ToolRegistry,
     ToolExecutor,
@@ -10,6 +9,7 @@ from fairlib import (
 
 
 from project_tools.cs110_kb_query import CS110KnowledgeQueryTool
+from pipeline.resources import get_chat_model
 
 
 class KnowledgeAgent(SimpleAgent):
@@ -19,7 +19,9 @@ class KnowledgeAgent(SimpleAgent):
     """
 
     def __init__(self, model="gpt-4o-mini"):
-        llm = OpenAIAdapter(model_name=model)
+        # Identical prompts are answered from the LLM response cache when
+        # it is enabled for this agent (LLM_CACHE_AGENT_TTL_S)
+        llm = get_chat_model(model, agent="knowledge_agent")
 
         # Register ONLY the KB tool
         tool_registry = ToolRegistry()
@@ -0,0 +1,125 @@
+"""
+Benchmark: semantic answer cache hit rate, false hits and latency
+
+Stores one canonical question per group in a SemanticAnswerCache, then
+looks up paraphrases of it and "distractors" that look similar but need
+a different answer (other lesson numbers, other grading categories). For
+a range of similarity thresholds it reports:
+    - paraphrase hit rate (the answer a student would have waited for)
+    - false hits (a distractor, or a paraphrase of another group, served a
+      cached answer) and matches rejected by the number check
+    - lookup latency (embedding + search), next to the average agent
+      response time of the latest evaluation_results_*.json if there is one
+
+Usage:
+    python benchmarks/bench_answer_cache.py [--thresholds 0.85,0.9,0.92,0.95]
+"""
+import argparse
+import glob
+import json
+import os
+
+from bench_utils import PROJECT_ROOT
+
+from pipeline.answer_cache import SemanticAnswerCache
+from pipeline.resources import get_query_embedding_cache
+
+# canonical question -> paraphrases that should get its answer
+PARAPHRASES = {
+    "What is lesson 7 about?": [
+        "what's lesson 7 on", "lesson 7 topics?", "What does lesson 7 cover?", "what do we learn in lesson 7",
+    ],
+    "What are Python lists?": [
+        "what is a list in python", "explain python lists", "What's a Python list?",
+    ],
+    "What is the Von Neumann architecture?": [
+        "explain the von neumann architecture", "what is von neumann architecture",
+        "Describe the Von Neumann model",
+    ],
+    "What is the late policy for programming packs?": [
+        "what happens if I turn in a programming pack late", "late penalty for programming packs?",
+        "programming pack late policy",
+    ],
+    "Which lessons cover cybersecurity?": [
+        "what lessons are about cybersecurity", "when do we learn about cybersecurity", "cybersecurity lessons?",
+    ],
+    "How many programming packs are there?": [
+        "how many programming packs do we have", "number of programming packs?",
+    ],
+}
+
+# Similar wording, different answer: any hit here is a false hit
+DISTRACTORS = [
+    "What is lesson 17 about?",
+    "What is lesson 8 about?",
+    "What are Python dictionaries?",
+    "What is the late policy for labs?",
+    "Which lessons cover artificial intelligence?",
+    "How many labs are there?",
+]
+
+
+def latest_agent_time():
+    """Average agent response time from the newest evaluation results, or None"""
+    files = sorted(glob.glob(os.path.join(PROJECT_ROOT, "evaluation_results_*.json")))
+    if not files:
+        return None
+    with open(files[-1], "r", encoding="utf-8") as f:
+        results = json.load(f)
+    times = [d["elapsed_time"] for d in results.get("details", [])
+             if "elapsed_time" in d and d.get("route", "agent") == "agent"]
+    return sum(times) / len(times) if times else None
+
+
+def run(threshold, embed):
+    cache = SemanticAnswerCache(embed, threshold=threshold)
+    for canonical in PARAPHRASES:
+        _, embedding = cache.lookup(canonical, "nice", "bench")
+        cache.store(canonical, embedding, canonical, "nice", "bench")
+
+    hits = false_hits = 0
+    total = 0
+    for canonical, paraphrases in PARAPHRASES.items():
+        for question in paraphrases:
+            answer, _ = cache.lookup(question, "nice", "bench")
+            total += 1
+            if answer == canonical:
+                hits += 1
+            elif answer is not None:
+                false_hits += 1
+    for question in DISTRACTORS:
+        answer, _ = cache.lookup(question, "nice", "bench")
+        if answer is not None:
+            false_hits += 1
+    return hits, total, false_hits, cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic answer cache benchmark")
+    parser.add_argument("--thresholds", default="0.80,0.85,0.88,0.90,0.92,0.95")
+    args = parser.parse_args()
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+
+    print("=" * 70)
+    print("SEMANTIC ANSWER CACHE BENCHMARK")
+    print("=" * 70)
+    embed = get_query_embedding_cache().embed_query
+    n_paraphrases = sum(len(p) for p in PARAPHRASES.values())
+    print(f"{len(PARAPHRASES)} cached questions, {n_paraphrases} paraphrases, {len(DISTRACTORS)} distractors\n")
+
+    print(f"   {'threshold':>9} {'hit rate':>9} {'false hits':>11} {'rejected':>9} "
+          f"{'lookup mean':>12} {'lookup p95':>11}")
+    for threshold in thresholds:
+        hits, total, false_hits, stats = run(threshold, embed)
+        print(f"   {threshold:>9.2f} {hits / total * 100:>8.1f}% {false_hits:>11} "
+              f"{stats['rejected_number_mismatch']:>9} {stats['lookup_mean_ms']:>9.2f} ms "
+              f"{stats['lookup_p95_ms']:>8.2f} ms")
+
+    agent_time = latest_agent_time()
+    if agent_time is not None:
+        print(f"\nAverage agent response time (latest evaluation): {agent_time:.2f} s")
+    print("\nLookup times include embedding; repeated questions hit the query embedding cache.")
+
+
+if __name__ == "__main__":
+    main()
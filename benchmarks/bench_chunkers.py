@@ -0,0 +1,117 @@
+"""
+Benchmark: in-memory vs. streaming chunkers
+
+First checks that the streaming chunkers in pipeline/build_kb.py produce
+exactly the same chunks (and lesson metadata) as the original functions for
+every file in cs110_docs/. Then builds large synthetic documents by
+repeating the lesson schedule and the Python reference guide and compares
+peak Python heap usage (tracemalloc) and time for both implementations.
+
+Usage:
+    python benchmarks/bench_chunkers.py [--mb 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench_utils import PROJECT_ROOT
+
+from pipeline.build_kb import (
+    iter_lesson_chunks_with_metadata,
+    iter_simple_chunks,
+    simple_chunk_text,
+    smart_chunk_lessons_with_metadata,
+)
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def verify(docs_path):
+    """Compare both chunkers on every .txt file; returns True if all match"""
+    all_ok = True
+    for fname in sorted(f for f in os.listdir(docs_path) if f.endswith(".txt")):
+        path = os.path.join(docs_path, fname)
+        text = read_text(path)
+
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            simple_ok = simple_chunk_text(text) == list(iter_simple_chunks(f))
+        lesson_ok = smart_chunk_lessons_with_metadata(text) == list(iter_lesson_chunks_with_metadata(path))
+
+        ok = simple_ok and lesson_ok
+        all_ok = all_ok and ok
+        status = "✅ identical" if ok else f"❌ MISMATCH (simple={simple_ok}, lesson={lesson_ok})"
+        print(f"   {fname:<40} {status}")
+    return all_ok
+
+
+def measure(fn):
+    """Return (seconds, peak traced MB, number of chunks consumed) for fn()"""
+    # Timed untraced: tracemalloc slows down allocation-heavy code unevenly
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, count
+
+
+def make_large_file(source, target_mb, directory):
+    text = read_text(source)
+    path = os.path.join(directory, os.path.basename(source))
+    copies = max(1, int(target_mb * 1024 * 1024 / max(1, len(text))))
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(copies):
+            f.write(text)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker memory benchmark")
+    parser.add_argument("--mb", type=float, default=20, help="size of each synthetic document")
+    args = parser.parse_args()
+
+    docs_path = os.path.join(PROJECT_ROOT, "cs110_docs")
+
+    print("=" * 70)
+    print("CHUNKER BENCHMARK (in-memory vs. streaming)")
+    print("=" * 70)
+    print("\nChunk-for-chunk check on cs110_docs/:")
+    if not verify(docs_path):
+        raise SystemExit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for source, lesson in (("CS110_Lesson_Schedule.txt", True), ("pythonReferenceGuide.txt", False)):
+            path = make_large_file(os.path.join(docs_path, source), args.mb, tmp)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"\n{source} repeated to {size_mb:.1f} MB:")
+
+            # Consume chunks one at a time, as the build does for embedding
+            if lesson:
+                def in_memory():
+                    return sum(1 for _ in smart_chunk_lessons_with_metadata(read_text(path)))
+
+                def streaming():
+                    return sum(1 for _ in iter_lesson_chunks_with_metadata(path))
+            else:
+                def in_memory():
+                    return sum(1 for _ in simple_chunk_text(read_text(path)))
+
+                def streaming():
+                    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                        return sum(1 for _ in iter_simple_chunks(f))
+
+            for label, fn in (("in-memory", in_memory), ("streaming", streaming)):
+                elapsed, peak_mb, count = measure(fn)
+                print(f"   {label:<10} {count:>7} chunks  {elapsed:6.2f}s  peak heap {peak_mb:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: cold start from source documents vs. from a KB snapshot
+
+Exports the live KB version to a snapshot, then, each in a fresh process
+and an empty persist directory:
+    build   - build_cs110_kb(full=True): chunk, load the embedder, embed all
+    import  - import_snapshot(): verify the checksum and load stored vectors
+
+Reports time until the KB is published ("KB ready") and until the first
+question has been answered, which includes loading the embedder for the
+query vector in both modes.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--snapshot /tmp/cs110.kbsnap]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_utils import rss_mb
+
+PROCESS_START = time.perf_counter()
+
+
+def run_child(mode, persist_dir, snapshot):
+    with contextlib.redirect_stdout(io.StringIO()):
+        from pipeline.build_kb import build_cs110_kb, import_snapshot
+        from pipeline.resources import get_active_collection, get_query_embedding_cache
+        from pipeline.vector_backends import chroma_query
+
+        if mode == "build":
+            build_cs110_kb(full=True, persist_dir=persist_dir)
+        else:
+            import_snapshot(snapshot, persist_dir=persist_dir)
+        ready_s = time.perf_counter() - PROCESS_START
+
+        collection = get_active_collection(persist_dir).get()
+        embedding = get_query_embedding_cache().embed_query("When is GR1?")
+        hits = chroma_query(collection, embedding, k=3)
+        first_query_s = time.perf_counter() - PROCESS_START
+
+    print(json.dumps({
+        "ready_s": ready_s,
+        "first_query_s": first_query_s,
+        "hits": len(hits["ids"]),
+        "rss_mb": rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--snapshot", default=os.path.join(tempfile.gettempdir(), "cs110.kbsnap"))
+    parser.add_argument("--child", choices=["build", "import"], help=argparse.SUPPRESS)
+    parser.add_argument("--persist-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.persist_dir, args.snapshot)
+        return
+
+    from pipeline.build_kb import export_snapshot
+
+    print("=" * 70)
+    print("COLD START BENCHMARK (source build vs. snapshot import)")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        header = export_snapshot(args.snapshot)
+    print(f"Snapshot: {args.snapshot} ({os.path.getsize(args.snapshot) / 1024:.0f} KB, "
+          f"{header['count']} chunks, version {header['kb_version']})\n")
+
+    for mode in ("build", "import"):
+        persist_dir = tempfile.mkdtemp(prefix=f"cs110-cold-{mode}-")
+        try:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode,
+                 "--persist-dir", persist_dir, "--snapshot", args.snapshot],
+                capture_output=True, text=True, check=True
+            )
+        finally:
+            shutil.rmtree(persist_dir, ignore_errors=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        label = "from cs110_docs (embed)" if mode == "build" else "from snapshot (import)"
+        print(f"{label}:")
+        print(f"   {'KB ready:':<24}{r['ready_s']:.2f}s")
+        print(f"   {'First query answered:':<24}{r['first_query_s']:.2f}s ({r['hits']} hits)")
+        print(f"   {'RSS:':<24}{r['rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: KB query latency under concurrent requests
+
+Simulates N simultaneous /api/ask requests that each make one cs110_query
+tool call on the same event loop, the way FastAPI runs them. Compares the
+blocking path (tool.use called directly in the coroutine) with the async
+path (await tool.ause, which offloads to the bounded query pool). Reports
+per-request latency and how long the event loop itself was stalled.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--levels 1 4 8 16] [--rounds 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from bench_utils import print_summary, summarize
+
+from project_tools.cs110_kb_query import CS110KnowledgeQueryTool
+
+QUESTIONS = [
+    "What is the late policy for programming packs?",
+    "How much are graded reviews worth?",
+    "What are Python lists?",
+    "What is the Von Neumann architecture?",
+    "Which lessons cover cybersecurity?",
+    "How much is the course project worth?",
+    "How many programming packs are there?",
+    "Which lessons cover artificial intelligence?",
+]
+
+
+async def _loop_lag(stop, interval=0.005):
+    """Largest delay seen by a ticker that should wake every `interval` seconds"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run_level(tool, concurrency, rounds, mode, salt):
+    latencies = []
+    worst_lag = 0.0
+
+    async def one_request(question, arrived):
+        # Latency is measured from when all N requests arrived together, so
+        # time spent queued behind a blocked event loop is counted
+        if mode == "async":
+            await tool.ause(question)
+        else:
+            tool.use(question)
+        latencies.append(time.perf_counter() - arrived)
+
+    for r in range(rounds):
+        # Vary the text so the embedding cache doesn't turn this into a cache benchmark
+        batch = [
+            f"{QUESTIONS[i % len(QUESTIONS)]} ({salt}-{r}-{i})"
+            for i in range(concurrency)
+        ]
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(_loop_lag(stop))
+        await asyncio.sleep(0)
+        arrived = time.perf_counter()
+        await asyncio.gather(*(one_request(q, arrived) for q in batch))
+        stop.set()
+        worst_lag = max(worst_lag, await lag_task)
+
+    return summarize(latencies), worst_lag
+
+
+async def main_async(levels, rounds):
+    tool = CS110KnowledgeQueryTool()
+    tool.use_result_cache = False
+    tool.use_lesson_index = False
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up the model, Chroma and the thread pool
+        await tool.ause("warm up")
+        tool.use("warm up again")
+
+    for concurrency in levels:
+        print(f"\nConcurrency {concurrency}:")
+        for mode in ("blocking", "async"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats, lag = await run_level(tool, concurrency, rounds, mode, salt=mode)
+            print_summary(f"{mode} (loop stall {lag * 1000:.0f}ms)", stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KB query concurrency benchmark")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("KB QUERY CONCURRENCY BENCHMARK")
+    print("=" * 70)
+    asyncio.run(main_async(args.levels, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: what near-duplicate dedup saves at query time
+
+Chunks cs110_docs/ the same way build_kb does, embeds every chunk (through
+the ingestion embedding cache when enabled), and builds two exact NumPy
+indexes: one over all chunks and one with near-duplicates collapsed. For
+each evaluate_system.py question it then counts how many of the top-k hits
+are near-duplicates of a higher-ranked hit, i.e. wasted result slots.
+
+Usage:
+    python benchmarks/bench_dedup.py [--k 5] [--threshold 0.9]
+"""
+import argparse
+import os
+
+from bench_utils import PROJECT_ROOT
+
+from evaluate_system import TEST_CASES
+from pipeline.build_kb import chunk_file
+from pipeline.caches import CachingEmbedder, ChunkEmbeddingCache
+from pipeline.config import EMBEDDING_MODEL, INGEST_EMBED_CACHE_PATH
+from pipeline.dedup import NearDuplicateIndex
+from pipeline.resources import get_embedder, get_query_embedding_cache
+from pipeline.vector_backends import NumpyVectorIndex
+
+
+def redundant_hits(documents, threshold):
+    """Number of results that near-duplicate an earlier result in the list"""
+    seen = NearDuplicateIndex(threshold=threshold)
+    redundant = 0
+    for i, doc in enumerate(documents):
+        if seen.find(doc)[0] is not None:
+            redundant += 1
+        else:
+            seen.add(i, doc)
+    return redundant
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate dedup benchmark")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("NEAR-DUPLICATE DEDUP BENCHMARK")
+    print("=" * 70)
+
+    docs_path = os.path.join(PROJECT_ROOT, "cs110_docs")
+    ids, texts, metadatas = [], [], []
+    for fname in sorted(f for f in os.listdir(docs_path) if f.endswith(".txt")):
+        chunks, metas, _ = chunk_file(os.path.join(docs_path, fname), fname)
+        for i, (chunk, meta) in enumerate(zip(chunks, metas)):
+            if not chunk.strip():
+                continue
+            ids.append(f"{fname}#{i}")
+            texts.append(chunk)
+            metadatas.append(meta)
+
+    if INGEST_EMBED_CACHE_PATH:
+        embedder = CachingEmbedder(
+            lambda: get_embedder(EMBEDDING_MODEL),
+            ChunkEmbeddingCache(INGEST_EMBED_CACHE_PATH, EMBEDDING_MODEL)
+        )
+    else:
+        embedder = get_embedder(EMBEDDING_MODEL)
+    embeddings = embedder.embed_documents(texts)
+
+    dedup = NearDuplicateIndex(threshold=args.threshold)
+    keep = []
+    for i, text in enumerate(texts):
+        if dedup.find(text)[0] is None:
+            dedup.add(ids[i], text)
+            keep.append(i)
+
+    indexes = {
+        "all chunks": NumpyVectorIndex.from_rows(ids, embeddings, texts, metadatas),
+        "deduplicated": NumpyVectorIndex.from_rows(
+            [ids[i] for i in keep], [embeddings[i] for i in keep],
+            [texts[i] for i in keep], [metadatas[i] for i in keep]),
+    }
+
+    cache = get_query_embedding_cache()
+    questions = [cache.embed_query(q) for q, _, _ in TEST_CASES]
+
+    print(f"{len(TEST_CASES)} questions, top-{args.k}, threshold {args.threshold}\n")
+    for name, index in indexes.items():
+        wasted = 0
+        for embedding in questions:
+            documents = index.query(embedding, k=args.k)["documents"]
+            wasted += redundant_hits(documents, args.threshold)
+        slots = len(questions) * args.k
+        print(f"   {name:<14} {len(index.ids):>5} chunks  {index.nbytes / 1024:7.1f} KB  "
+              f"redundant top-{args.k} hits {wasted}/{slots} ({100 * wasted / slots:.0f}%), "
+              f"unique hits/query {(slots - wasted) / len(questions):.2f}")
+
+
+if __name__ == "__main__":
+    main()
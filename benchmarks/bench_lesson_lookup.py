@@ -0,0 +1,61 @@
+"""
+Benchmark: direct lesson-index lookup vs. embedding + Chroma search
+
+Runs the same "Lesson N" questions through CS110KnowledgeQueryTool with the
+lesson index enabled and disabled, and reports per-call latency.
+
+Usage:
+    python benchmarks/bench_lesson_lookup.py [--repeat 5]
+"""
+import argparse
+
+from bench_utils import print_summary, summarize, time_calls
+
+from project_tools.cs110_kb_query import CS110KnowledgeQueryTool
+
+QUESTION_TEMPLATES = [
+    "What is lesson {n} about?",
+    "When is lesson {n}?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the question set")
+    args = parser.parse_args()
+
+    questions = [t.format(n=n) for n in range(1, 41) for t in QUESTION_TEMPLATES]
+
+    print("=" * 70)
+    print("LESSON LOOKUP BENCHMARK")
+    print("=" * 70)
+    print(f"{len(questions)} questions x {args.repeat} passes\n")
+
+    tool = CS110KnowledgeQueryTool()
+    # Measure the lookups themselves, not the result cache in front of them
+    tool.use_result_cache = False
+    if tool._get_lesson_index() is None:
+        print("⚠️ No lesson index found for the active KB version. Run pipeline/build_kb.py first.")
+        return
+
+    # Warm up the model and Chroma so one-time loading isn't measured
+    time_calls(tool.use, questions[:4])
+
+    tool.use_lesson_index = False
+    vector_times = time_calls(tool.use, questions, repeat=args.repeat)
+
+    tool.use_lesson_index = True
+    index_times = time_calls(tool.use, questions, repeat=args.repeat)
+
+    vector = summarize(vector_times)
+    index = summarize(index_times)
+
+    print("Results:")
+    print_summary("embed + Chroma (where=)", vector)
+    print_summary("lesson index", index)
+    if index["mean_ms"] > 0:
+        print(f"\n   Speedup (mean): {vector['mean_ms'] / index['mean_ms']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: quantized vector index recall, memory and disk footprint
+
+Builds exact float32 and int8/float16 quantized indexes from the active KB
+version and compares, over the evaluate_system.py questions:
+    - recall@k against exact float32 search, with and without full-precision
+      re-scoring of the top k * rescore-factor candidates
+    - in-memory index size and on-disk size of the saved index
+    - query latency
+
+Usage:
+    python benchmarks/bench_quantized.py [--k 5] [--rescore-factor 4]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+from bench_utils import print_summary, summarize, time_calls
+
+from evaluate_system import TEST_CASES
+from pipeline.resources import get_active_collection, get_query_embedding_cache
+from pipeline.vector_backends import NumpyVectorIndex, QuantizedVectorIndex
+
+
+def recall_at_k(truth, results):
+    total = 0.0
+    for expected, got in zip(truth, results):
+        total += len(set(expected) & set(got)) / len(expected) if expected else 1.0
+    return total / len(truth) if truth else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized index benchmark")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("QUANTIZED INDEX BENCHMARK")
+    print("=" * 70)
+
+    active = get_active_collection()
+    rows = active.get().get(include=["embeddings", "documents", "metadatas"])
+    cache = get_query_embedding_cache()
+    questions = [cache.embed_query(q) for q, _, _ in TEST_CASES]
+    print(f"KB version {active.version}: {len(rows['ids'])} chunks, "
+          f"{len(questions)} questions, recall@{args.k}\n")
+
+    exact = NumpyVectorIndex.from_rows(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+    truth = [exact.query(e, k=args.k)["ids"] for e in questions]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact_path = os.path.join(tmp, "exact.npz")
+        exact.save(exact_path)
+        full_path = os.path.join(tmp, "full.npy")
+        np.save(full_path, exact.vectors)
+
+        print(f"   {'index':<24} {'recall':>7} {'memory':>10} {'disk':>10}")
+        print(f"   {'float32 exact':<24} {100.0:>6.1f}% {exact.nbytes / 1024:>7.1f} KB "
+              f"{os.path.getsize(exact_path) / 1024:>7.1f} KB")
+
+        variants = {}
+        for dtype in ("int8", "float16"):
+            path = os.path.join(tmp, f"{dtype}.npz")
+            QuantizedVectorIndex.from_rows(
+                rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"], dtype=dtype
+            ).save(path)
+            index = QuantizedVectorIndex.load(path, full_vectors_path=full_path,
+                                              rescore_factor=args.rescore_factor)
+            disk_kb = os.path.getsize(path) / 1024
+
+            for rescore in (False, True):
+                label = f"{dtype} {'+ rescore' if rescore else 'codes only'}"
+                results = [index.query(e, k=args.k, rescore=rescore)["ids"] for e in questions]
+                print(f"   {label:<24} {recall_at_k(truth, results) * 100:>6.1f}% "
+                      f"{index.nbytes / 1024:>7.1f} KB {disk_kb:>7.1f} KB")
+                variants[label] = (index, rescore)
+
+        print("\nLatency:")
+        times = time_calls(lambda e: exact.query(e, k=args.k), questions, repeat=args.repeat)
+        print_summary("float32 exact", summarize(times))
+        for label, (index, rescore) in variants.items():
+            times = time_calls(lambda e: index.query(e, k=args.k, rescore=rescore), questions, repeat=args.repeat)
+            print_summary(label, summarize(times))
+
+    print("\nDisk sizes include chunk texts and metadata; memory is the vector data alone.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark: prompt size and latency over long conversations
+
+Runs one long conversation (default 50 turns, cycling through the
+evaluate_system.py questions) against NiceInstructor with three kinds of
+memory:
+    - shared:     the instructor's own WorkingMemory, as before sessions
+    - window:     a SessionMemory (turn/token window only)
+    - compaction: a SessionMemory plus SessionCompactor rolling summaries
+
+For every turn it records the estimated prompt tokens sent to the LLM
+(summed over the ReAct steps) and the request latency. Compactions are
+awaited between turns, as a user's think time would allow, and timed
+separately since they are off the request path.
+
+Needs OPENAI_API_KEY and a built knowledge base; every turn is a real
+LLM round trip.
+
+Usage:
+    python benchmarks/bench_session_compaction.py [--turns 50] [--modes window,compaction]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import time
+
+# Latency must come from real API calls, not the LLM response cache
+os.environ["CS110_LLM_CACHE"] = ""
+
+from bench_utils import print_summary, summarize
+
+from evaluate_system import TEST_CASES
+from pipeline.config import (
+    SESSION_COMPACT_AT_TOKENS,
+    SESSION_COMPACT_KEEP_TURNS,
+    SESSION_MAX_TOKENS,
+    SESSION_MAX_TURNS,
+    SESSION_SUMMARY_TOKENS,
+)
+from pipeline.sessions import (
+    Session,
+    SessionCompactor,
+    SessionMemory,
+    estimate_tokens,
+    with_memory,
+)
+
+
+def record_prompt_tokens(llm):
+    """Wrap llm.ainvoke so each call appends its estimated prompt tokens to a list"""
+    calls = []
+    ainvoke = llm.ainvoke
+
+    async def recorded_ainvoke(messages, *args, **kwargs):
+        calls.append(sum(estimate_tokens(str(m.content)) for m in messages))
+        return await ainvoke(messages, *args, **kwargs)
+
+    llm.ainvoke = recorded_ainvoke
+    return calls
+
+
+async def run_conversation(instructor, mode, turns, calls):
+    questions = [q for q, _, _ in TEST_CASES]
+    compactor = None
+    if mode == "shared":
+        agent = instructor
+        agent.memory.clear()
+    else:
+        session = Session(SessionMemory(SESSION_MAX_TURNS, SESSION_MAX_TOKENS))
+        agent = with_memory(instructor, session.memory)
+        if mode == "compaction":
+            # Summaries come from a separate adapter so they don't count as request tokens
+            from fairlib import OpenAIAdapter
+            compactor = SessionCompactor(
+                llm=OpenAIAdapter(model_name="gpt-4o-mini"),
+                budget_tokens=SESSION_COMPACT_AT_TOKENS,
+                keep_turns=SESSION_COMPACT_KEEP_TURNS,
+                summary_tokens=SESSION_SUMMARY_TOKENS,
+            )
+
+    tokens, latencies, compact_times = [], [], []
+    for turn in range(turns):
+        question = questions[turn % len(questions)]
+        before = len(calls)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if compactor is not None:
+                async with session.lock:
+                    await agent.arun(question)
+            else:
+                await agent.arun(question)
+        latencies.append(time.perf_counter() - start)
+        tokens.append(sum(calls[before:]))
+
+        if compactor is not None and compactor.schedule(session) is not None:
+            start = time.perf_counter()
+            await compactor.drain()
+            compact_times.append(time.perf_counter() - start)
+
+    return tokens, latencies, compact_times
+
+
+def print_tokens(label, tokens):
+    marks = [t for t in (1, 10, 25, 50) if t <= len(tokens)]
+    at = "  ".join(f"t{t}={tokens[t - 1]:>6}" for t in marks)
+    tail = tokens[-10:]
+    print(f"   {label:<12} {at}  last-10 mean={statistics.fmean(tail):8.0f}  max={max(tokens):6}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Session compaction benchmark")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--modes", default="shared,window,compaction")
+    args = parser.parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    print("=" * 70)
+    print("SESSION COMPACTION BENCHMARK")
+    print("=" * 70)
+    print(f"{args.turns}-turn conversation, window {SESSION_MAX_TURNS} turns / ~{SESSION_MAX_TOKENS} tokens, "
+          f"compaction at ~{SESSION_COMPACT_AT_TOKENS} tokens\n")
+
+    from agents.instructor_nice import NiceInstructor
+    instructor = NiceInstructor(model="gpt-4o-mini")
+    calls = record_prompt_tokens(instructor.llm)
+
+    results = {}
+    for mode in modes:
+        print(f"Running {mode}...")
+        results[mode] = await run_conversation(instructor, mode, args.turns, calls)
+
+    print("\nPrompt tokens per request (estimated, summed over ReAct steps):")
+    for mode, (tokens, _, _) in results.items():
+        print_tokens(mode, tokens)
+
+    print("\nRequest latency:")
+    for mode, (_, latencies, _) in results.items():
+        print_summary(f"{mode} (all turns)", summarize(latencies))
+        half = len(latencies) // 2
+        if half:
+            print_summary(f"{mode} (first half)", summarize(latencies[:half]))
+            print_summary(f"{mode} (second half)", summarize(latencies[half:]))
+
+    for mode, (_, _, compact_times) in results.items():
+        if compact_times:
+            print(f"\n{mode}: {len(compact_times)} compactions off the request path")
+            print_summary("compaction", summarize(compact_times))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark: server startup time and resident memory
+
+Builds the two instructors that main.py creates at import time, once with
+the shared resource registry (one embedder, one Chroma client) and once in
+"isolated" mode that resets the registry between agents, which reproduces
+the old behaviour of every tool loading its own model and client. Each mode
+runs in a fresh subprocess so RSS numbers don't leak between them.
+
+Usage:
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from bench_utils import rss_mb
+
+
+def run_child(mode):
+    baseline = rss_mb()
+    start = time.perf_counter()
+
+    from agents.instructor_mean import MeanInstructor
+    from agents.instructor_nice import NiceInstructor
+    from pipeline.resources import loaded_resources, reset_shared_resources
+
+    import_s = time.perf_counter() - start
+
+    NiceInstructor(model="gpt-4o-mini")
+    if mode == "isolated":
+        reset_shared_resources()
+    MeanInstructor(model="gpt-4o-mini")
+
+    print(json.dumps({
+        "mode": mode,
+        "import_s": import_s,
+        "startup_s": time.perf_counter() - start,
+        "baseline_rss_mb": baseline,
+        "rss_mb": rss_mb(),
+        "resources": loaded_resources(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time / RSS benchmark")
+    parser.add_argument("--child", choices=["shared", "isolated"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    print("=" * 70)
+    print("STARTUP BENCHMARK (NiceInstructor + MeanInstructor)")
+    print("=" * 70)
+
+    results = {}
+    for mode in ("isolated", "shared"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode],
+            capture_output=True, text=True, check=True
+        )
+        # The agents print while loading; the report is the last line
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    for mode in ("isolated", "shared"):
+        r = results[mode]
+        label = "before (per-tool model/client)" if mode == "isolated" else "after (shared registry)"
+        print(f"\n{label}:")
+        print(f"   Startup time: {r['startup_s']:.2f}s (imports {r['import_s']:.2f}s)")
+        print(f"   RSS:          {r['rss_mb']:.0f} MB (interpreter baseline {r['baseline_rss_mb']:.0f} MB)")
+
+    saved = results["isolated"]["rss_mb"] - results["shared"]["rss_mb"]
+    faster = results["isolated"]["startup_s"] - results["shared"]["startup_s"]
+    print(f"\nShared registry saves {saved:.0f} MB RSS and {faster:.2f}s of startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Small timing helpers shared by the benchmark scripts
+"""
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+# Add project root to path so benchmarks can be run as plain scripts
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(times_s):
+    """Mean / p50 / p95 / max of a list of durations, in milliseconds"""
+    ms = [t * 1000 for t in times_s]
+    return {
+        "n": len(ms),
+        "mean_ms": statistics.fmean(ms) if ms else 0.0,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "max_ms": max(ms) if ms else 0.0,
+    }
+
+
+def print_summary(label, stats):
+    print(
+        f"   {label:<28} n={stats['n']:<5} mean={stats['mean_ms']:8.3f}ms  "
+        f"p50={stats['p50_ms']:8.3f}ms  p95={stats['p95_ms']:8.3f}ms  max={stats['max_ms']:8.3f}ms"
+    )
+
+
+def rss_mb():
+    """Current resident set size of this process in MB (peak RSS off Linux)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def time_calls(fn, inputs, repeat=1, quiet=True):
+    """
+    Call fn(x) for every input, `repeat` times, and return per-call durations
+
+    Debug output printed by the tools is swallowed when quiet=True so it
+    doesn't dominate the measurement.
+    """
+    times = []
+    for _ in range(repeat):
+        for x in inputs:
+            sink = io.StringIO() if quiet else None
+            with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+                start = time.perf_counter()
+                fn(x)
+                times.append(time.perf_counter() - start)
+    return times
@@ -0,0 +1,127 @@
+"""
+Benchmark: Chroma vs. NumPy vs. FAISS vector search
+
+Embeds the evaluate_system.py questions once, then times nearest-neighbour
+search on the active Chroma collection, on NumPy indexes (float32 and
+float16) and, when faiss is installed, on FAISS flat/HNSW/IVF indexes built
+from the same rows. Also reports index memory, recall@k against exact
+search, and how often each backend's top-k agrees with Chroma's.
+
+Usage:
+    python benchmarks/bench_vector_backends.py [--k 10] [--repeat 20]
+        [--hnsw-m 32] [--ef-search 64] [--nlist 64] [--nprobe 8]
+"""
+import argparse
+import os
+
+from bench_utils import print_summary, rss_mb, summarize, time_calls
+
+from evaluate_system import TEST_CASES
+from pipeline.config import FAISS_INDEX_NAME, FAISS_PAYLOAD_NAME, NUMPY_INDEX_NAME
+from pipeline.resources import get_active_collection, get_query_embedding_cache
+from pipeline.vector_backends import (
+    FAISS_AVAILABLE,
+    FaissVectorIndex,
+    NumpyVectorIndex,
+    chroma_query,
+)
+
+
+def overlap_at_k(reference, candidate):
+    """Mean fraction of reference top-k ids that the candidate also returned"""
+    total = 0.0
+    for ref, cand in zip(reference, candidate):
+        total += len(set(ref) & set(cand)) / len(ref) if ref else 1.0
+    return total / len(reference) if reference else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector backend benchmark")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--nlist", type=int, default=64)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("VECTOR BACKEND BENCHMARK")
+    print("=" * 70)
+
+    active = get_active_collection()
+    collection = active.get()
+    print(f"KB version: {active.version}")
+
+    cache = get_query_embedding_cache()
+    questions = [question for question, _, _ in TEST_CASES]
+    embeddings = [cache.embed_query(q) for q in questions]
+
+    rows = collection.get(include=["embeddings", "documents", "metadatas"])
+    backends = {}
+
+    rss_before = rss_mb()
+    exported = active.artifact_path(NUMPY_INDEX_NAME)
+    if exported and os.path.exists(exported):
+        backends["numpy (exported file)"] = NumpyVectorIndex.load(exported)
+    backends["numpy float32"] = NumpyVectorIndex.from_rows(
+        rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"], dtype="float32")
+    backends["numpy float16"] = NumpyVectorIndex.from_rows(
+        rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"], dtype="float16")
+    rss_numpy = rss_mb() - rss_before
+
+    rss_faiss = None
+    if FAISS_AVAILABLE:
+        rss_before = rss_mb()
+        exported = active.artifact_path(FAISS_INDEX_NAME)
+        if exported and os.path.exists(exported):
+            loaded = FaissVectorIndex.load(
+                exported, active.artifact_path(FAISS_PAYLOAD_NAME),
+                ef_search=args.ef_search, nprobe=args.nprobe)
+            if loaded is not None:
+                backends[f"faiss {loaded.index_type} (exported)"] = loaded
+        for index_type in ("flat", "hnsw", "ivf"):
+            backends[f"faiss {index_type}"] = FaissVectorIndex.from_rows(
+                rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"],
+                index_type=index_type, hnsw_m=args.hnsw_m, ef_search=args.ef_search,
+                nlist=args.nlist, nprobe=args.nprobe)
+        rss_faiss = rss_mb() - rss_before
+    else:
+        print("ℹ️ faiss not installed, skipping FAISS backends")
+
+    print(f"{len(rows['ids'])} chunks, {len(questions)} questions, k={args.k}, {args.repeat} passes\n")
+
+    # Warm up Chroma so its segment load isn't in the latency numbers
+    rss_before = rss_mb()
+    reference = [chroma_query(collection, e, k=args.k)["ids"] for e in embeddings]
+    rss_chroma = rss_mb() - rss_before
+
+    print("Latency:")
+    chroma_times = time_calls(lambda e: chroma_query(collection, e, k=args.k), embeddings, repeat=args.repeat)
+    print_summary("chroma", summarize(chroma_times))
+    for name, index in backends.items():
+        times = time_calls(lambda e: index.query(e, k=args.k), embeddings, repeat=args.repeat)
+        print_summary(name, summarize(times))
+
+    print("\nMemory:")
+    print(f"   chroma                       ~{rss_chroma:.1f} MB RSS growth on first query")
+    print(f"   numpy indexes (all, loaded)  ~{rss_numpy:.1f} MB RSS growth")
+    if rss_faiss is not None:
+        print(f"   faiss indexes (all, loaded)  ~{rss_faiss:.1f} MB RSS growth")
+    for name, index in backends.items():
+        print(f"   {name:<28} index {index.nbytes / 1024:.0f} KB")
+
+    # Exact float32 search is the ground truth for recall
+    exact = backends["numpy float32"]
+    truth = [exact.query(e, k=args.k)["ids"] for e in embeddings]
+
+    print(f"\nRecall@{args.k} vs. exact search / agreement with Chroma top-{args.k}:")
+    print(f"   {'chroma':<28} {overlap_at_k(truth, reference) * 100:5.1f}%   (reference)")
+    for name, index in backends.items():
+        ids = [index.query(e, k=args.k)["ids"] for e in embeddings]
+        print(f"   {name:<28} {overlap_at_k(truth, ids) * 100:5.1f}%   "
+              f"{overlap_at_k(reference, ids) * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
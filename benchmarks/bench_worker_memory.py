@@ -0,0 +1,149 @@
+"""
+Benchmark: per-worker memory of the NumPy vs. memory-mapped vector index
+
+Simulates N uvicorn workers: N child processes each open the same exported
+index and serve every evaluate_system.py question against it, then stay
+alive while the parent reads their memory from /proc. RSS counts shared
+page-cache pages in full for every process; PSS splits shared pages
+between the processes mapping them, so PSS is what shows the saving.
+
+The CS110 corpus is small, so --scale replicates its rows to approximate a
+multi-course knowledge base. --with-embedder also loads the query embedding
+model in each worker to show the whole per-worker footprint.
+
+Linux only (reads /proc/<pid>/smaps_rollup).
+
+Usage:
+    python benchmarks/bench_worker_memory.py [--workers 1 4 8] [--scale 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_utils import rss_mb
+
+
+def proc_memory_mb(pid):
+    """(RSS, PSS) of a process in MB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values.get("Rss", 0.0), values.get("Pss", 0.0)
+
+
+def run_child(backend, index_path, queries_path, with_embedder):
+    from pipeline.vector_backends import MmapVectorIndex, NumpyVectorIndex
+
+    if with_embedder:
+        from pipeline.resources import get_embedder
+        get_embedder().embed_query("warm up")
+
+    start = time.perf_counter()
+    loader = MmapVectorIndex.load if backend == "mmap" else NumpyVectorIndex.load
+    index = loader(index_path)
+    load_s = time.perf_counter() - start
+
+    with open(queries_path, "r") as f:
+        queries = json.load(f)
+    for embedding in queries:
+        index.query(embedding, k=10)
+
+    print(json.dumps({"load_s": load_s, "rss_mb": rss_mb()}), flush=True)
+    # Stay alive until the parent has measured every worker
+    sys.stdin.read()
+
+
+def measure(backend, index_path, queries_path, workers, with_embedder):
+    cmd = [sys.executable, __file__, "--child", backend,
+           "--index", index_path, "--queries", queries_path]
+    if with_embedder:
+        cmd.append("--with-embedder")
+
+    procs = [
+        subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        reports = [json.loads(p.stdout.readline()) for p in procs]
+        memory = [proc_memory_mb(p.pid) for p in procs]
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+
+    return {
+        "rss_mb": sum(m[0] for m in memory) / workers,
+        "pss_mb": sum(m[1] for m in memory) / workers,
+        "total_pss_mb": sum(m[1] for m in memory),
+        "load_ms": sum(r["load_s"] for r in reports) / workers * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker index memory benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--scale", type=int, default=200,
+                        help="replicate the KB rows this many times")
+    parser.add_argument("--with-embedder", action="store_true")
+    parser.add_argument("--child", choices=["numpy", "mmap"], help=argparse.SUPPRESS)
+    parser.add_argument("--index", help=argparse.SUPPRESS)
+    parser.add_argument("--queries", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.index, args.queries, args.with_embedder)
+        return
+
+    from evaluate_system import TEST_CASES
+    from pipeline.resources import get_active_collection, get_query_embedding_cache
+    from pipeline.vector_backends import MmapVectorIndex, NumpyVectorIndex
+
+    print("=" * 70)
+    print("WORKER MEMORY BENCHMARK (numpy vs. mmap index)")
+    print("=" * 70)
+
+    active = get_active_collection()
+    rows = active.get().get(include=["embeddings", "documents", "metadatas"])
+    cache = get_query_embedding_cache()
+    queries = [list(cache.embed_query(q)) for q, _, _ in TEST_CASES]
+
+    n = len(rows["ids"]) * args.scale
+    ids = [f"{cid}@{i}" for i in range(args.scale) for cid in rows["ids"]]
+    embeddings = list(rows["embeddings"]) * args.scale
+    documents = list(rows["documents"]) * args.scale
+    metadatas = list(rows["metadatas"]) * args.scale
+
+    with tempfile.TemporaryDirectory() as tmp:
+        numpy_path = os.path.join(tmp, "vectors.npz")
+        mmap_path = os.path.join(tmp, "mmap_index")
+        numpy_index = NumpyVectorIndex.from_rows(ids, embeddings, documents, metadatas)
+        numpy_index.save(numpy_path)
+        del numpy_index
+        mapped_bytes = MmapVectorIndex.write(mmap_path, ids, embeddings, documents, metadatas)
+
+        queries_path = os.path.join(tmp, "queries.json")
+        with open(queries_path, "w") as f:
+            json.dump(queries, f)
+
+        print(f"KB version: {active.version}")
+        print(f"{n} chunks ({len(rows['ids'])} x {args.scale}), "
+              f"index data {mapped_bytes / 1024 / 1024:.1f} MB, {len(queries)} questions per worker\n")
+        print(f"   {'backend':<8} {'workers':>7} {'RSS/worker':>12} {'PSS/worker':>12} "
+              f"{'total PSS':>11} {'load':>10}")
+
+        for workers in args.workers:
+            for backend, path in (("numpy", numpy_path), ("mmap", mmap_path)):
+                r = measure(backend, path, queries_path, workers, args.with_embedder)
+                print(f"   {backend:<8} {workers:>7} {r['rss_mb']:>9.1f} MB {r['pss_mb']:>9.1f} MB "
+                      f"{r['total_pss_mb']:>8.1f} MB {r['load_ms']:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
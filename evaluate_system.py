@@ -3,9 +3,10 @@ CS110 Virtual Instructor - Improved Evaluation Script
 Tests the system with predefined questions and measures performance
 """
 import asyncio
-import time
 import json
+import time
 from datetime import datetime
+
 # from agents.instructor_nice import NiceInstructor  # Uncomment when using
 
 
@@ -78,6 +79,71 @@ def calculate_score(all_found: bool, missing: list, keywords: list) -> float:
     return found_count / len(keywords)
 
 
+def count_llm_calls(llm):
+    """
+    Wrap llm.invoke/ainvoke in place so every model round trip is counted
+    Returns the counter dict, read as counter["calls"]
+    """
+    counter = {"calls": 0, "in_async": False}
+    invoke = getattr(llm, "invoke", None)
+    ainvoke = getattr(llm, "ainvoke", None)
+
+    if invoke is not None:
+        def counted_invoke(*args, **kwargs):
+            # ainvoke may be implemented on top of invoke; count it once
+            if not counter["in_async"]:
+                counter["calls"] += 1
+            return invoke(*args, **kwargs)
+        llm.invoke = counted_invoke
+
+    if ainvoke is not None:
+        async def counted_ainvoke(*args, **kwargs):
+            counter["calls"] += 1
+            counter["in_async"] = True
+            try:
+                return await ainvoke(*args, **kwargs)
+            finally:
+                counter["in_async"] = False
+        llm.ainvoke = counted_ainvoke
+
+    return counter
+
+
+def print_fast_path_summary(details):
+    """Latency and LLM-call savings of the fast-path router, from the test details"""
+    answered = [d for d in details if "route" in d]
+    fast = [d for d in answered if d["route"] == "fast_path"]
+    agent = [d for d in answered if d["route"] == "agent"]
+
+    print("\n" + "="*70)
+    print("FAST PATH")
+    print("="*70)
+    print(f"\nAnswered without the agent: {len(fast)}/{len(answered)}")
+    if not fast:
+        return {"routed": 0}
+
+    fast_avg = sum(d["elapsed_time"] for d in fast) / len(fast)
+    print(f"Fast path average response time: {fast_avg * 1000:.2f} ms")
+    summary = {"routed": len(fast), "fast_path_avg_time": fast_avg}
+    if agent:
+        agent_avg = sum(d["elapsed_time"] for d in agent) / len(agent)
+        calls_per_question = sum(d["llm_calls"] for d in agent) / len(agent)
+        calls_saved = calls_per_question * len(fast)
+        time_saved = (agent_avg - fast_avg) * len(fast)
+        print(f"Agent average response time: {agent_avg:.2f} seconds "
+              f"({calls_per_question:.1f} LLM calls per question)")
+        print(f"Estimated LLM calls saved: {calls_saved:.0f}")
+        print(f"Estimated time saved: {time_saved:.2f} seconds "
+              f"({agent_avg / max(fast_avg, 1e-9):,.0f}x faster per routed question)")
+        summary.update({
+            "agent_avg_time": agent_avg,
+            "agent_llm_calls_per_question": calls_per_question,
+            "estimated_llm_calls_saved": calls_saved,
+            "estimated_time_saved": time_saved,
+        })
+    return summary
+
+
 async def evaluate_system():
     """
     Run the full evaluation suite
@@ -92,8 +158,15 @@ async def evaluate_system():
     print("Initializing agent...")
     from agents.instructor_nice import NiceInstructor
     agent = NiceInstructor(model="gpt-4o-mini")
+    # Count real API round trips: the adapter behind the LLM response cache
+    llm_counter = count_llm_calls(getattr(agent.llm, "adapter", agent.llm))
     print("Agent initialized\n")
     
+    # Same pre-agent router as /api/ask; CS110_FAST_PATH=0 disables it
+    from pipeline.config import FAST_PATH_ENABLED, project_path
+    from pipeline.fast_path import FastPathRouter
+    router = FastPathRouter(project_path("cs110_docs")) if FAST_PATH_ENABLED else None
+    
     # Results tracking
     results = {
         "total": len(TEST_CASES),
@@ -117,10 +190,15 @@ async def evaluate_system():
         start_time = time.time()
         
         try:
-            response = await agent.arun(question)
+            calls_before = llm_counter["calls"]
+            response = router.route(question) if router is not None else None
+            route = "fast_path" if response is not None else "agent"
+            if response is None:
+                response = await agent.arun(question)
             elapsed = time.time() - start_time
+            llm_calls = llm_counter["calls"] - calls_before
             
-            print(f"\nResponse ({elapsed:.2f}s):\n{response[:300]}...")
+            print(f"\nResponse via {route} ({elapsed:.2f}s, {llm_calls} LLM calls):\n{response[:300]}...")
             
             # Check for keywords
             all_found, missing = check_keywords(response, keywords)
@@ -172,6 +250,8 @@ async def evaluate_system():
                 "score": score,
                 "status": status,
                 "elapsed_time": elapsed,
+                "route": route,
+                "llm_calls": llm_calls,
                 "keywords_checked": keywords,
                 "missing_keywords": missing
             })
@@ -216,6 +296,16 @@ async def evaluate_system():
         print(f"  Partial: {stats['partial']}")
         print(f"  Failed: {stats['failed']}")
     
+    results["fast_path"] = print_fast_path_summary(results["details"])
+    
+    # LLM response cache (with CS110_LLM_CACHE_TTL_S set, a re-run of this
+    # suite should make no API calls)
+    if hasattr(agent.llm, "cache"):
+        results["llm_cache"] = agent.llm.cache.stats()
+        print(f"\nLLM API calls: {llm_counter['calls']}  "
+              f"(response cache hits: {results['llm_cache']['hits']}, "
+              f"hit rate {results['llm_cache']['hit_rate'] * 100:.1f}%)")
+    
     # Save results to file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"evaluation_results_{timestamp}.json"
@@ -258,5 +348,5 @@ async def evaluate_system():
 if __name__ == "__main__":
     print("\nStarting CS110 Virtual Instructor Evaluation...\n")
     results = asyncio.run(evaluate_system())
-    print(f"\nEvaluation finished!")
+    print("\nEvaluation finished!")
     print(f"Final Score: {results['pass_rate']:.1f}% pass rate")
\ No newline at end of file
@@ -1,4 +1,6 @@
 import asyncio
+import uuid
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -7,11 +9,77 @@ from pydantic import BaseModel
 
 from agents.instructor_nice import NiceInstructor
 from agents.instructor_mean import MeanInstructor
+from pipeline.config import (
+    project_path,
+    FAST_PATH_ENABLED,
+    SESSION_MAX_TURNS,
+    SESSION_MAX_TOKENS,
+    SESSION_TTL_S,
+    SESSION_MAX_SESSIONS,
+    SESSION_COMPACTION,
+    SESSION_COMPACT_AT_TOKENS,
+    SESSION_COMPACT_KEEP_TURNS,
+    SESSION_SUMMARY_TOKENS,
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL_S,
+    ANSWER_CACHE_AUDIT_PATH,
+)
+from pipeline.fast_path import FastPathRouter
+from pipeline.sessions import SessionStore, SessionCompactor, with_memory
+from pipeline.answer_cache import SemanticAnswerCache
+from pipeline.resources import get_active_collection, get_query_embedding_cache, get_query_executor
 
 # Create both instructors
 nice_instructor = NiceInstructor(model="gpt-4o-mini")
 mean_instructor = MeanInstructor(model="gpt-4o-mini")
 
+# Schedule/grading lookups answered without an LLM call
+fast_path = FastPathRouter(project_path("cs110_docs")) if FAST_PATH_ENABLED else None
+
+# Conversation memory per browser session instead of one shared history
+sessions = SessionStore(
+    max_sessions=SESSION_MAX_SESSIONS,
+    ttl=SESSION_TTL_S,
+    max_turns=SESSION_MAX_TURNS,
+    max_tokens=SESSION_MAX_TOKENS,
+)
+
+# Folds older turns into a rolling summary after answering, so prompts stay flat
+compactor = SessionCompactor(
+    llm=nice_instructor.llm,
+    budget_tokens=SESSION_COMPACT_AT_TOKENS,
+    keep_turns=SESSION_COMPACT_KEEP_TURNS,
+    summary_tokens=SESSION_SUMMARY_TOKENS,
+) if SESSION_COMPACTION else None
+
+# Paraphrases of already-answered questions reuse the answer; the question is
+# embedded with the model the knowledge base tool has already loaded
+answer_cache = SemanticAnswerCache(
+    get_query_embedding_cache().embed_query,
+    threshold=ANSWER_CACHE_THRESHOLD,
+    maxsize=ANSWER_CACHE_SIZE,
+    ttl=ANSWER_CACHE_TTL_S,
+    audit_path=ANSWER_CACHE_AUDIT_PATH,
+) if ANSWER_CACHE_ENABLED else None
+
+def current_kb_version():
+    active = get_active_collection()
+    active.get()
+    return active.version
+
+def lookup_cached_answer(question, persona):
+    """Answer cache lookup against the live KB version; runs on the query pool"""
+    kb_version = current_kb_version()
+    answer, embedding = answer_cache.lookup(question, persona, kb_version)
+    return answer, embedding, kb_version
+
+def store_cached_answer(question, embedding, answer, persona, kb_version):
+    """Cache an answer unless the KB was republished while it was generated"""
+    if current_kb_version() == kb_version:
+        answer_cache.store(question, embedding, answer, persona, kb_version)
+
 app = FastAPI()
 
 app.add_middleware(
@@ -24,14 +92,32 @@ app.add_middleware(
 class AskRequest(BaseModel):
     question: str
     mode: str
+    # Omitted on a client's first request; the response carries a new one
+    session_id: Optional[str] = None
 
 @app.post("/api/ask")
 async def ask(request: AskRequest):
     question = request.question.strip()
     mode = request.mode.strip().lower()
+    session_id = request.session_id or uuid.uuid4().hex
     
     if not question:
-        return {"answer": "Please enter a question."}
+        return {"answer": "Please enter a question.", "session_id": session_id}
+    
+    persona = "mean" if mode == "mean" else "nice"
+    session = sessions.get(session_id, persona)
+    
+    # Structured schedule/grading questions skip the agent entirely
+    if fast_path is not None:
+        answer = fast_path.route(question, persona=persona)
+        if answer is not None:
+            # Wait for any agent turn in flight so the messages don't interleave
+            async with session.lock:
+                session.memory.add_turn(question, answer)
+                session.turns += 1
+            if compactor is not None:
+                compactor.schedule(session)
+            return {"answer": answer, "session_id": session_id}
     
     # Choose instructor based on mode
     if mode == "mean":
@@ -39,14 +125,62 @@ async def ask(request: AskRequest):
     else:
         instructor = nice_instructor
     
+    loop = asyncio.get_running_loop()
     try:
-        result = await instructor.arun(question)
-        return {"answer": result}
+        # Paraphrases of earlier questions are answered from the semantic cache.
+        # Only the first question of a session is looked up: later ones can lean
+        # on the conversation ("what about lesson 8?"), and only answers to
+        # standalone questions are ever stored.
+        embedding = None
+        first_question = False
+        if answer_cache is not None:
+            async with session.lock:
+                first_question = not session.memory.history and not session.memory.summary
+        if first_question:
+            answer, embedding, kb_version = await loop.run_in_executor(
+                get_query_executor(), lookup_cached_answer, question, persona
+            )
+            if answer is not None:
+                async with session.lock:
+                    session.memory.add_turn(question, answer)
+                    session.turns += 1
+                if compactor is not None:
+                    compactor.schedule(session)
+                return {"answer": answer, "session_id": session_id}
+        
+        async with session.lock:
+            # Only answers that didn't depend on earlier turns are reusable
+            standalone = not session.memory.history and not session.memory.summary
+            result = await with_memory(instructor, session.memory).arun(question)
+            session.turns += 1
+        if compactor is not None:
+            compactor.schedule(session)
+        if (embedding is not None and standalone
+                and not result.startswith(("Error", "Agent stopped"))):
+            await loop.run_in_executor(
+                get_query_executor(), store_cached_answer, question, embedding, result, persona, kb_version
+            )
+        return {"answer": result, "session_id": session_id}
     except Exception as e:
         print(f"Error in agent execution: {e}")
         import traceback
         traceback.print_exc()
-        return {"answer": f"Sorry, I encountered an error: {str(e)}"}
+        return {"answer": f"Sorry, I encountered an error: {str(e)}", "session_id": session_id}
+
+@app.get("/api/sessions/stats")
+def session_stats():
+    """Session memory gauge"""
+    stats = sessions.stats()
+    if compactor is not None:
+        stats.update(compactor.stats())
+    return stats
+
+@app.get("/api/answer_cache/stats")
+def answer_cache_stats():
+    """Semantic answer cache hit rate and lookup latency"""
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
 
 # Serve the frontend
 @app.get("/")
@@ -0,0 +1,179 @@
+"""
+Semantic answer cache for /api/ask
+
+Students ask the same thing many ways ("what's lesson 7 on", "lesson 7
+topics?"), so an exact-match key rarely hits. SemanticAnswerCache embeds
+the question with the shared query embedding cache and looks for a
+previous question whose cosine similarity reaches the threshold. Entries
+are scoped per persona and KB version: a lookup on a newly published
+version drops every older answer, and the mean instructor never answers
+with the nice one's words.
+
+Paraphrase embeddings can't tell "lesson 7" from "lesson 17", so a match
+whose numbers differ from the question's is rejected. Every hit and every
+rejection can be appended to a JSONL audit log, so false hits can be reviewed
+and the threshold tuned.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+NUMBER_RE = re.compile(r"\d+")
+
+
+def question_numbers(text):
+    """Lesson/GR/pack numbers mentioned in a question, as a sorted tuple"""
+    return tuple(sorted(int(n) for n in NUMBER_RE.findall(text)))
+
+
+class SemanticAnswerCache:
+    """
+    Per-(persona, KB version) nearest-neighbour index of answered questions
+
+    `embed` maps question text to a vector (QueryEmbeddingCache.embed_query).
+    Each scope holds up to maxsize entries in insertion order; entries older
+    than ttl seconds are dropped on the next lookup in their scope.
+    """
+
+    def __init__(self, embed, threshold=0.92, maxsize=500, ttl=86400, audit_path=None):
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.audit_path = audit_path
+        self._scopes = {}
+        # KB version of the latest lookup; answers for any other are stale
+        self._kb_version = None
+        self._lock = threading.Lock()
+        self._audit_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._latencies = deque(maxlen=2000)
+
+    def _switch_version(self, kb_version):
+        """Make kb_version the live one, dropping answers built on any other"""
+        if kb_version != self._kb_version:
+            for key in [k for k in self._scopes if k[1] != kb_version]:
+                del self._scopes[key]
+            self._kb_version = kb_version
+
+    def _scope(self, persona, kb_version):
+        scope = self._scopes.setdefault((persona, kb_version), {"vectors": None, "entries": []})
+
+        # Entries are in insertion order, so the expired ones are a prefix
+        cutoff = time.time() - self.ttl
+        entries = scope["entries"]
+        live_from = 0
+        while live_from < len(entries) and entries[live_from]["created"] < cutoff:
+            live_from += 1
+        if live_from:
+            scope["entries"] = entries[live_from:]
+            scope["vectors"] = scope["vectors"][live_from:] if scope["entries"] else None
+        return scope
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question, persona, kb_version):
+        """
+        Return (cached answer or None, question embedding)
+
+        The embedding is returned so a miss can be stored without embedding
+        the question twice.
+        """
+        start = time.perf_counter()
+        vector = self._unit(self.embed(question))
+        answer = None
+        audit = None
+        with self._lock:
+            self._switch_version(kb_version)
+            scope = self._scope(persona, kb_version)
+            if scope["entries"]:
+                similarities = scope["vectors"] @ vector
+                best = int(np.argmax(similarities))
+                similarity = float(similarities[best])
+                entry = scope["entries"][best]
+                if similarity >= self.threshold:
+                    if question_numbers(question) != question_numbers(entry["question"]):
+                        self.rejected += 1
+                        audit = ("rejected_number_mismatch", entry, similarity)
+                    else:
+                        answer = entry["answer"]
+                        audit = ("hit", entry, similarity)
+
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._latencies.append(time.perf_counter() - start)
+
+        # File I/O happens outside the lock so it doesn't stall other lookups
+        if audit is not None:
+            event, entry, similarity = audit
+            self._audit(event, question, entry, similarity, persona, kb_version)
+        return answer, vector
+
+    def store(self, question, embedding, answer, persona, kb_version):
+        """
+        Remember an answer; returns False if it was dropped
+
+        An answer generated against a KB version that is no longer the live
+        one is dropped rather than evicting the newer version's answers.
+        """
+        vector = self._unit(embedding)[None, :]
+        with self._lock:
+            if kb_version != self._kb_version:
+                return False
+            scope = self._scope(persona, kb_version)
+            scope["entries"].append({"question": question, "answer": answer, "created": time.time()})
+            scope["vectors"] = vector if scope["vectors"] is None else np.vstack([scope["vectors"], vector])
+            if len(scope["entries"]) > self.maxsize:
+                scope["entries"] = scope["entries"][-self.maxsize:]
+                scope["vectors"] = scope["vectors"][-self.maxsize:]
+        return True
+
+    def _audit(self, event, question, entry, similarity, persona, kb_version):
+        if not self.audit_path:
+            return
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "event": event,
+            "persona": persona,
+            "kb_version": kb_version,
+            "similarity": round(similarity, 4),
+            "threshold": self.threshold,
+            "question": question,
+            "matched_question": entry["question"],
+            "answer": entry["answer"][:300],
+        }
+        try:
+            with self._audit_lock, open(self.audit_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write answer cache audit log: {e}")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            latencies = sorted(self._latencies)
+            return {
+                "entries": sum(len(s["entries"]) for s in self._scopes.values()),
+                "scopes": len(self._scopes),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected_number_mismatch": self.rejected,
+                "hit_rate": self.hits / total if total else 0.0,
+                "lookup_mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+                "lookup_p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+                "audit_log": os.path.abspath(self.audit_path) if self.audit_path else None,
+            }
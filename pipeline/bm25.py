@@ -0,0 +1,117 @@
+"""
+In-memory BM25 keyword retriever and reciprocal rank fusion
+
+Dense embeddings are weak on exact tokens such as "GR1", "PythonGraph" or
+"24 hours". build_kb writes a BM25 inverted index next to each KB version so
+the query tool can fuse keyword and vector rankings.
+"""
+import json
+import math
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how i in is it its of on or that
+the this to was were what when where which who will with about do does
+""".split())
+
+
+def tokenize(text):
+    """Lower-cased alphanumeric tokens with common English stopwords removed"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of chunks
+
+    Postings are stored as term -> [[doc_index, term_frequency], ...] so the
+    whole index serializes straight to JSON.
+    """
+
+    def __init__(self, ids, documents, postings, doc_lengths, k1=1.5, b=0.75):
+        self.ids = ids
+        self.documents = documents
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+
+        n = len(ids)
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in postings.items()
+        }
+
+    @classmethod
+    def build(cls, ids, documents, k1=1.5, b=0.75):
+        postings = {}
+        doc_lengths = []
+        for doc_index, text in enumerate(documents):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append([doc_index, tf])
+        return cls(list(ids), list(documents), postings, doc_lengths, k1=k1, b=b)
+
+    def search(self, query, k=10):
+        """Return up to k (chunk_id, document, score) tuples, best first"""
+        scores = {}
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for doc_index, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_length)
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.ids[i], self.documents[i], score) for i, score in best]
+
+    def to_dict(self):
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "documents": self.documents,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["ids"],
+            data["documents"],
+            data["postings"],
+            data["doc_lengths"],
+            k1=data.get("k1", 1.5),
+            b=data.get("b", 0.75),
+        )
+
+
+def load_bm25_index(path):
+    """Load a BM25 index written by build_kb, or None if it isn't there"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return BM25Index.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse several ranked lists of ids with reciprocal rank fusion
+
+    Each id scores sum(1 / (k + rank)) over the lists it appears in (rank is
+    1-based). Returns ids sorted by fused score, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -5,26 +5,100 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
-import chromadb
-from fairlib import Document, SentenceTransformerEmbedder, LongTermMemory, ChromaDBVectorStore
-from pipeline.config import project_path
+import argparse
+import hashlib
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fairlib import Document
+from pipeline.config import (
+    project_path,
+    KB_COLLECTION_NAME,
+    EMBEDDING_MODEL,
+    EMBED_BATCH_SIZE,
+    BUILD_PARSE_WORKERS,
+    INGEST_EMBED_CACHE_PATH,
+    INGEST_EMBED_CACHE_MAX_MB,
+    DEDUP_ENABLED,
+    DEDUP_THRESHOLD,
+    WATCH_INTERVAL_S,
+    WATCH_DEBOUNCE_S,
+    WATCH_MAX_BACKOFF_S,
+    KB_MANIFEST_NAME,
+    KB_PERSIST_DIR,
+    KB_KEEP_VERSIONS,
+    LESSON_SCHEDULE_FILE,
+    LESSON_INDEX_NAME,
+    BM25_INDEX_NAME,
+    NUMPY_INDEX_NAME,
+    NUMPY_INDEX_DTYPE,
+    MMAP_INDEX_NAME,
+    QUANTIZED_INDEX_NAME,
+    QUANTIZED_INDEX_DTYPE,
+    FAISS_INDEX_NAME,
+    FAISS_PAYLOAD_NAME,
+    FAISS_INDEX_TYPE,
+    FAISS_HNSW_M,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_IVF_NLIST,
+    FAISS_IVF_NPROBE,
+)
+from pipeline.kb_versions import (
+    new_version_id,
+    collection_name_for,
+    version_dir,
+    read_pointer,
+    publish_version,
+    rollback,
+    garbage_collect,
+)
+from pipeline.lessons import LESSON_BOUNDARY_PATTERN, parse_lesson_header
+from pipeline.resources import get_embedder, get_chroma_client
+from pipeline.bm25 import BM25Index
+from pipeline.caches import ChunkEmbeddingCache, CachingEmbedder
+from pipeline.dedup import NearDuplicateIndex
+from pipeline.kb_snapshot import write_snapshot, read_snapshot, SnapshotError
+from pipeline.vector_backends import (
+    NumpyVectorIndex,
+    QuantizedVectorIndex,
+    MmapVectorIndex,
+    FaissVectorIndex,
+    FAISS_AVAILABLE,
+)
 import re
 
+# Bump when the shape of chunk metadata changes so the next build re-creates
+# every chunk instead of reusing ones written with the old metadata
+CHUNK_SCHEMA_VERSION = 2
+
 
 def smart_chunk_by_lessons(text):
     """
     Split text by lesson boundaries for CS110 lesson schedules
     This keeps each lesson's content together
     """
+    return [chunk for chunk, _ in smart_chunk_lessons_with_metadata(text)]
+
+
+def smart_chunk_lessons_with_metadata(text):
+    """
+    Lesson-aware chunking that also returns per-chunk lesson metadata
+
+    Returns a list of (chunk, metadata) pairs. Lesson chunks carry the lesson
+    number, title, M/T-section dates, the part index and the number of parts
+    the lesson was split into; intro text and fallback chunks get {}.
+    """
     # Split on the lesson separator pattern
-    lesson_pattern = r'={40,}\s*\nLesson \d+:'
+    lesson_pattern = LESSON_BOUNDARY_PATTERN
     
     # Find all lesson boundaries
     matches = list(re.finditer(lesson_pattern, text))
     
     if not matches:
         # Fallback to simple chunking if no lessons found
-        return simple_chunk_text(text, chunk_size=800)
+        return [(chunk, {}) for chunk in simple_chunk_text(text, chunk_size=800)]
     
     chunks = []
     
@@ -32,7 +106,7 @@ def smart_chunk_by_lessons(text):
     if matches[0].start() > 0:
         intro = text[:matches[0].start()].strip()
         if intro:
-            chunks.append(intro)
+            chunks.append((intro, {}))
     
     # Extract each lesson as a chunk
     for i, match in enumerate(matches):
@@ -41,29 +115,44 @@ def smart_chunk_by_lessons(text):
         end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
         
         lesson_chunk = text[start:end].strip()
-        
-        # If a lesson is REALLY long (>2000 chars), split it further
-        if len(lesson_chunk) > 2000:
-            # Split into smaller pieces but keep the header
-            header_end = lesson_chunk.find('\n\n')
-            if header_end > 0:
-                header = lesson_chunk[:header_end + 2]
-                body = lesson_chunk[header_end + 2:]
-                
-                # Add header + first part
-                chunks.append(header + body[:1500])
-                
-                # If there's more, add header + rest
-                if len(body) > 1500:
-                    chunks.append(header + body[1500:])
-            else:
-                chunks.append(lesson_chunk)
-        else:
-            chunks.append(lesson_chunk)
+        chunks.extend(_lesson_parts(lesson_chunk))
     
     return chunks
 
 
+def _lesson_parts(lesson_chunk):
+    """Split one lesson's text into (part, metadata) pairs"""
+    lesson_info = parse_lesson_header(lesson_chunk)
+    parts = []
+    
+    # If a lesson is REALLY long (>2000 chars), split it further
+    if len(lesson_chunk) > 2000:
+        # Split into smaller pieces but keep the header
+        header_end = lesson_chunk.find('\n\n')
+        if header_end > 0:
+            header = lesson_chunk[:header_end + 2]
+            body = lesson_chunk[header_end + 2:]
+            
+            # Add header + first part
+            parts.append(header + body[:1500])
+            
+            # If there's more, add header + rest
+            if len(body) > 1500:
+                parts.append(header + body[1500:])
+        else:
+            parts.append(lesson_chunk)
+    else:
+        parts.append(lesson_chunk)
+
+    pairs = []
+    for part_index, part in enumerate(parts):
+        metadata = dict(lesson_info)
+        metadata["part"] = part_index
+        metadata["parts"] = len(parts)
+        pairs.append((part, metadata))
+    return pairs
+
+
 def simple_chunk_text(text, chunk_size=800, overlap=100):
     """
     Simple chunking for general documents
@@ -113,92 +202,1084 @@ def simple_chunk_text(text, chunk_size=800, overlap=100):
     return chunks
 
 
-def build_cs110_kb():
+# ---------------------------------------------------------------------------
+# Streaming chunkers
+#
+# Same output as simple_chunk_text / smart_chunk_lessons_with_metadata, but
+# they read a text stream incrementally and yield chunks, so working memory
+# is bounded by the chunk (or lesson) size instead of the file size.
+# ---------------------------------------------------------------------------
+
+STREAM_READ_SIZE = 64 * 1024
+
+LESSON_START_RE = re.compile(r'Lesson \d+:')
+
+# Marks a lesson boundary in the output of _split_at_lesson_boundaries
+_BOUNDARY = object()
+
+
+def iter_simple_chunks(stream, chunk_size=800, overlap=100, read_size=STREAM_READ_SIZE):
+    """
+    Streaming simple_chunk_text: yields the same chunks from a text stream
+
+    Keeps at most about read_size + chunk_size characters buffered.
+    """
+    buf = ""        # holds text[offset:offset + len(buf)]
+    offset = 0
+    eof = False
+
+    def fill(upto):
+        nonlocal buf, eof
+        while not eof and offset + len(buf) < upto:
+            block = stream.read(read_size)
+            if block:
+                buf += block
+            else:
+                eof = True
+
+    fill(chunk_size + 1)
+    if eof and len(buf) <= chunk_size:
+        yield buf
+        return
+
+    start = 0
+    while True:
+        # One character past the window tells us whether end < length
+        fill(start + chunk_size + 1)
+        length = offset + len(buf) if eof else None
+        if length is not None and start >= length:
+            return
+
+        end = start + chunk_size
+        if length is None or end < length:
+            lo, hi = start - offset, end - offset
+            # Look for paragraph break first
+            paragraph_break = buf.rfind('\n\n', lo, hi)
+            if paragraph_break > lo + chunk_size // 2:
+                end = offset + paragraph_break + 2
+            else:
+                # Look for sentence break
+                sentence_break = buf.rfind('. ', lo, hi)
+                if sentence_break > lo + chunk_size // 2:
+                    end = offset + sentence_break + 2
+                else:
+                    # Look for any space
+                    space_break = buf.rfind(' ', lo, hi)
+                    if space_break > lo + chunk_size // 2:
+                        end = offset + space_break + 1
+
+        chunk = buf[start - offset:end - offset].strip()
+        if chunk:
+            yield chunk
+
+        # Move start position with overlap
+        start = end - overlap
+
+        # Drop text behind the window once enough has piled up
+        if start - offset > read_size:
+            buf = buf[start - offset:]
+            offset = start
+
+
+def _split_at_lesson_boundaries(lines):
+    """
+    Yield the text of `lines` in pieces, with _BOUNDARY wherever
+    LESSON_BOUNDARY_PATTERN would match
+
+    The pattern is a run of 40+ '=' that ends its line, then any number of
+    blank lines, then a line starting with "Lesson N:". A candidate run is
+    held back until the following lines confirm or rule it out.
+    """
+    pending = None
+    for line in lines:
+        if pending is not None:
+            if LESSON_START_RE.match(line):
+                yield _BOUNDARY
+                yield from pending
+                pending = None
+            elif line.endswith('\n') and not line.strip():
+                pending.append(line)
+                continue
+            else:
+                yield from pending
+                pending = None
+
+        column = None
+        if line.endswith('\n'):
+            stripped = line.rstrip()
+            run = len(stripped) - len(stripped.rstrip('='))
+            if run >= 40:
+                column = len(stripped) - run
+
+        if column is None:
+            yield line
+        else:
+            yield line[:column]
+            pending = [line[column:]]
+
+    if pending is not None:
+        yield from pending
+
+
+def _iter_lesson_segments(lines):
+    """Yield the intro text and then each lesson's raw text"""
+    pieces = []
+    for piece in _split_at_lesson_boundaries(lines):
+        if piece is _BOUNDARY:
+            yield "".join(pieces)
+            pieces = []
+        else:
+            pieces.append(piece)
+    yield "".join(pieces)
+
+
+def _has_lesson_boundary(lines):
+    return any(piece is _BOUNDARY for piece in _split_at_lesson_boundaries(lines))
+
+
+def iter_lesson_chunks_with_metadata(path):
+    """
+    Streaming smart_chunk_lessons_with_metadata over the file at path
+
+    A first pass looks for a lesson boundary (it stops at the first one);
+    files without any fall back to iter_simple_chunks like the original.
+    """
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        has_lessons = _has_lesson_boundary(f)
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        if not has_lessons:
+            for chunk in iter_simple_chunks(f, chunk_size=800):
+                yield chunk, {}
+            return
+
+        segments = _iter_lesson_segments(f)
+        intro = next(segments).strip()
+        if intro:
+            yield intro, {}
+        for segment in segments:
+            yield from _lesson_parts(segment.strip())
+
+
+def ingest_chunks(collection, embedder, docs, batch_size=EMBED_BATCH_SIZE):
+    """
+    Embed documents in batches and bulk-upsert them into a Chroma collection
+
+    Each batch costs one SentenceTransformer forward pass and one Chroma
+    write, instead of one of each per chunk.
+
+    Args:
+        collection: Chroma collection to write into
+        embedder: Embedder exposing embed_documents(texts)
+        docs: Iterable of (chunk_id, Document) pairs; a generator is consumed
+            one batch at a time, so chunks can stream in while files are parsed
+        batch_size: Number of chunks per embed/upsert batch
+
+    Returns:
+        Dict with chunk count, embed seconds, write seconds and total seconds
+    """
+    stats = {"chunks": 0, "embed_s": 0.0, "write_s": 0.0, "total_s": 0.0}
+    total_start = time.perf_counter()
+    docs = iter(docs)
+
+    while True:
+        batch = list(itertools.islice(docs, batch_size))
+        if not batch:
+            break
+        ids = [chunk_id for chunk_id, _ in batch]
+        texts = [doc.page_content for _, doc in batch]
+        metadatas = [doc.metadata for _, doc in batch]
+
+        t0 = time.perf_counter()
+        embeddings = embedder.embed_documents(texts)
+        t1 = time.perf_counter()
+        collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=metadatas
+        )
+        t2 = time.perf_counter()
+
+        stats["embed_s"] += t1 - t0
+        stats["write_s"] += t2 - t1
+        stats["chunks"] += len(batch)
+
+        elapsed = time.perf_counter() - total_start
+        rate = stats["chunks"] / elapsed if elapsed > 0 else 0.0
+        print(f"   ➕ Stored {stats['chunks']} chunks ({rate:.1f} chunks/sec)")
+
+    stats["total_s"] = time.perf_counter() - total_start
+    return stats
+
+
+def print_ingest_report(stats):
+    """Print throughput and the embed vs. write time split for an ingest run"""
+    total = stats["total_s"]
+    rate = stats["chunks"] / total if total > 0 else 0.0
+    embed_pct = 100 * stats["embed_s"] / total if total > 0 else 0.0
+    write_pct = 100 * stats["write_s"] / total if total > 0 else 0.0
+
+    print("\n📊 Ingestion report:")
+    print(f"   Chunks stored:   {stats['chunks']}")
+    print(f"   Total time:      {total:.2f}s ({rate:.1f} chunks/sec)")
+    print(f"   Embedding time:  {stats['embed_s']:.2f}s ({embed_pct:.0f}%)")
+    print(f"   Chroma write:    {stats['write_s']:.2f}s ({write_pct:.0f}%)")
+
+
+def print_embed_cache_report(stats):
+    """Print the ingestion embedding cache's hit rate and size"""
+    print(f"   Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate'] * 100:.0f}% hit rate), {stats['evictions']} evicted, "
+          f"{stats['bytes'] / 1024 / 1024:.1f}/{stats['max_bytes'] / 1024 / 1024:.0f} MB")
+
+
+def print_dedup_report(stats, dim):
+    """Print how many near-duplicate chunks were collapsed and what that saved"""
+    total, dropped = stats["chunks"], stats["dropped"]
+    kept = total - dropped
+    pct = 100 * dropped / total if total else 0.0
+    print(f"\n🧬 Near-duplicate dedup (threshold {DEDUP_THRESHOLD}):")
+    print(f"   Chunks:          {total} -> {kept} ({dropped} collapsed, {pct:.0f}% smaller index)")
+    print(f"   Vectors saved:   ~{dropped * dim * 4 / 1024:.0f} KB of float32 embeddings")
+    print(f"   Query fan-out:   {dropped} fewer vectors scored per query "
+          f"(see benchmarks/bench_dedup.py for top-k redundancy)")
+
+
+def chunk_document(fname, text):
+    """
+    Pick the chunking strategy for a file based on its name
+
+    Returns (chunks, metadatas, kind) where metadatas line up with chunks.
+    """
+    if "Lesson_Schedule" in fname or "Syllabus" in fname:
+        # Special handling for lesson schedules
+        pairs = smart_chunk_lessons_with_metadata(text)
+        chunks = [chunk for chunk, _ in pairs]
+        metadatas = [{"source": fname, **meta} for _, meta in pairs]
+        return chunks, metadatas, "lesson-based"
+    # General document chunking with small chunks for better retrieval
+    chunks = simple_chunk_text(text, chunk_size=800, overlap=100)
+    return chunks, [{"source": fname} for _ in chunks], "general-purpose"
+
+
+def chunk_file(path, fname):
+    """
+    Streaming chunk_document: chunk the file at path without reading it whole
+
+    Returns (chunks, metadatas, kind) exactly like chunk_document would for
+    the file's text.
+    """
+    if "Lesson_Schedule" in fname or "Syllabus" in fname:
+        chunks, metadatas = [], []
+        for chunk, meta in iter_lesson_chunks_with_metadata(path):
+            chunks.append(chunk)
+            metadatas.append({"source": fname, **meta})
+        return chunks, metadatas, "lesson-based"
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        chunks = list(iter_simple_chunks(f, chunk_size=800, overlap=100))
+    return chunks, [{"source": fname} for _ in chunks], "general-purpose"
+
+
+def file_content_hash(path):
+    """
+    content_hash() of a file's decoded text, computed block by block
+
+    Returns (sha256, character count, whether the text has any non-whitespace).
+    """
+    digest = hashlib.sha256()
+    chars = 0
+    has_text = False
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for block in iter(lambda: f.read(STREAM_READ_SIZE), ""):
+            digest.update(block.encode("utf-8"))
+            chars += len(block)
+            has_text = has_text or not block.isspace()
+    return digest.hexdigest(), chars, has_text
+
+
+def parse_file(docs_path, fname, old_sha=None):
+    """
+    Hash and chunk one file; runs in a build worker process
+
+    Returns a dict with the file's sha256 and, unless it matches old_sha,
+    its chunks, chunk metadatas, chunk id entries and chunker kind. The file
+    is streamed, so only its chunk list is ever held in memory.
+    """
+    start = time.perf_counter()
+    path = os.path.join(docs_path, fname)
+    sha, chars, has_text = file_content_hash(path)
+
+    result = {"fname": fname, "sha256": sha, "chars": chars, "unchanged": False}
+    if sha == old_sha:
+        result["unchanged"] = True
+    elif not has_text:
+        result.update(chunks=[], metadatas=[], entries=[], kind=None)
+    else:
+        chunks, metadatas, kind = chunk_file(path, fname)
+        result.update(chunks=chunks, metadatas=metadatas,
+                      entries=make_chunk_ids(fname, chunks), kind=kind)
+
+    result["parse_s"] = time.perf_counter() - start
+    return result
+
+
+def iter_parsed_files(docs_path, filenames, old_files, workers=BUILD_PARSE_WORKERS):
+    """
+    Yield parse_file() results for filenames, in order
+
+    With workers > 1 files are parsed in a process pool while the caller
+    embeds earlier ones. At most 2 * workers files are in flight, so parsed
+    chunks can't pile up faster than the embed stage consumes them.
+    """
+    old_shas = {fname: entry.get("sha256") for fname, entry in old_files.items()}
+
+    if workers <= 1 or len(filenames) <= 1:
+        for fname in filenames:
+            yield parse_file(docs_path, fname, old_shas.get(fname))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for fname in filenames:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(pool.submit(parse_file, docs_path, fname, old_shas.get(fname)))
+        while pending:
+            yield pending.popleft().result()
+
+
+def print_stage_report(stages):
+    """Print wall-clock time per build stage"""
+    print("\n⏱️ Build stages:")
+    print(f"   Parse + chunk:   {stages['parse_s']:.2f}s across workers "
+          f"({stages['parse_wait_s']:.2f}s waited on by the embed stage)")
+    print(f"   Embed:           {stages['embed_s']:.2f}s")
+    print(f"   Chroma write:    {stages['write_s']:.2f}s")
+    print(f"   Copy reused:     {stages['copy_s']:.2f}s")
+    print(f"   Side indexes:    {stages['index_s']:.2f}s")
+    print(f"   Total:           {stages['total_s']:.2f}s")
+
+
+def content_hash(text):
+    """SHA-256 hex digest of a piece of text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_chunk_ids(fname, chunks):
+    """
+    Build content-addressed chunk IDs for one file
+
+    IDs depend only on the file name and chunk text, so an edit that only
+    touches one lesson leaves every other chunk's ID unchanged. Repeated
+    identical chunks within a file get an occurrence suffix.
+
+    Returns:
+        List of {"id": ..., "sha256": ...} dicts in chunk order
+    """
+    entries = []
+    seen = {}
+    for chunk in chunks:
+        digest = content_hash(chunk)
+        seen[digest] = seen.get(digest, 0) + 1
+        chunk_id = f"{fname}::{digest[:16]}"
+        if seen[digest] > 1:
+            chunk_id += f"#{seen[digest]}"
+        entries.append({"id": chunk_id, "sha256": digest})
+    return entries
+
+
+def load_manifest(path):
+    """Load the build manifest, or None if there isn't a usable one"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(path, manifest):
+    """Write the build manifest atomically so a crash can't leave half a file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_lesson_index(docs_path):
+    """
+    Build the lesson number -> chunks index from the lesson schedule
+
+    Returns a JSON-ready dict keyed by lesson number (as a string) holding
+    the lesson title, M/T-section dates and the lesson's chunk text(s) in
+    part order. Returns {} if the schedule file is missing.
+    """
+    schedule_path = os.path.join(docs_path, LESSON_SCHEDULE_FILE)
+    if not os.path.exists(schedule_path):
+        return {}
+
+    with open(schedule_path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+
+    index = {}
+    for chunk, metadata in smart_chunk_lessons_with_metadata(text):
+        if "lesson" not in metadata:
+            continue
+        entry = index.setdefault(str(metadata["lesson"]), {
+            "lesson_title": metadata.get("lesson_title", ""),
+            "date_m": metadata.get("date_m", ""),
+            "date_t": metadata.get("date_t", ""),
+            "chunks": [],
+        })
+        entry["chunks"].append(chunk)
+    return index
+
+
+def export_vector_indexes(rows, artifacts_dir):
+    """Export a version's chunks into the non-Chroma vector index formats"""
+    if len(rows["ids"]) == 0:
+        return
+
+    numpy_index = NumpyVectorIndex.from_rows(
+        rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"],
+        dtype=NUMPY_INDEX_DTYPE
+    )
+    numpy_index.save(os.path.join(artifacts_dir, NUMPY_INDEX_NAME))
+    print(f"🧮 NumPy index written ({numpy_index.vectors.shape[0]}x{numpy_index.vectors.shape[1]} "
+          f"{NUMPY_INDEX_DTYPE}, {numpy_index.nbytes / 1024:.0f} KB)")
+
+    mapped_bytes = MmapVectorIndex.write(
+        os.path.join(artifacts_dir, MMAP_INDEX_NAME),
+        rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"]
+    )
+    print(f"🗺️ Memory-mapped index written ({mapped_bytes / 1024:.0f} KB)")
+
+    quantized = QuantizedVectorIndex.from_rows(
+        rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"],
+        dtype=QUANTIZED_INDEX_DTYPE
+    )
+    quantized.save(os.path.join(artifacts_dir, QUANTIZED_INDEX_NAME))
+    print(f"🗜️ Quantized index written ({QUANTIZED_INDEX_DTYPE}, {quantized.nbytes / 1024:.0f} KB)")
+
+    if not FAISS_AVAILABLE:
+        print("   ℹ️ faiss not installed, skipping FAISS index export")
+        return
+
+    faiss_index = FaissVectorIndex.from_rows(
+        rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"],
+        index_type=FAISS_INDEX_TYPE,
+        hnsw_m=FAISS_HNSW_M,
+        ef_search=FAISS_HNSW_EF_SEARCH,
+        nlist=FAISS_IVF_NLIST,
+        nprobe=FAISS_IVF_NPROBE
+    )
+    faiss_index.save(
+        os.path.join(artifacts_dir, FAISS_INDEX_NAME),
+        os.path.join(artifacts_dir, FAISS_PAYLOAD_NAME)
+    )
+    print(f"🧭 FAISS {FAISS_INDEX_TYPE} index written ({faiss_index.index.ntotal} vectors)")
+
+
+def write_version_artifacts(rows, artifacts_dir, lesson_index, manifest):
+    """Write the side indexes, lesson index and manifest for one KB version"""
+    os.makedirs(artifacts_dir, exist_ok=True)
+
+    bm25 = BM25Index.build(rows["ids"], rows["documents"])
+    save_manifest(os.path.join(artifacts_dir, BM25_INDEX_NAME), bm25.to_dict())
+    print(f"🔤 BM25 index written ({len(bm25.ids)} chunks, {len(bm25.postings)} terms)")
+
+    export_vector_indexes(rows, artifacts_dir)
+
+    save_manifest(os.path.join(artifacts_dir, LESSON_INDEX_NAME), lesson_index)
+    print(f"📇 Lesson index written for {len(lesson_index)} lessons")
+
+    save_manifest(os.path.join(artifacts_dir, KB_MANIFEST_NAME), manifest)
+
+
+def publish_and_collect(client, version, persist_dir, keep=KB_KEEP_VERSIONS):
+    """Flip the active-version pointer to version and drop old versions"""
+    publish_version(version, persist_dir)
+    print(f"🔀 Published version {version}; live query tools switch on their next call")
+
+    deleted = garbage_collect(client, persist_dir, keep=keep)
+    if deleted:
+        print(f"🧹 Garbage-collected old versions: {deleted}")
+
+
+def copy_chunks(source, target, ids, batch_size=EMBED_BATCH_SIZE):
+    """Copy already-embedded chunks between collections without re-embedding"""
+    for batch_start in range(0, len(ids), batch_size):
+        batch = ids[batch_start:batch_start + batch_size]
+        rows = source.get(ids=batch, include=["embeddings", "documents", "metadatas"])
+        if len(rows["ids"]) == 0:
+            continue
+        target.upsert(
+            ids=rows["ids"],
+            embeddings=rows["embeddings"],
+            documents=rows["documents"],
+            metadatas=rows["metadatas"]
+        )
+
+
+def _load_previous_build(client, persist_dir):
+    """Return (manifest, collection) for the live KB, or (None, None)"""
+    active = read_pointer(persist_dir)
+    if active:
+        manifest_path = os.path.join(version_dir(active["version"], persist_dir), KB_MANIFEST_NAME)
+        collection_name = active["collection"]
+    else:
+        # Unversioned build from before blue/green collections
+        manifest_path = os.path.join(persist_dir, KB_MANIFEST_NAME)
+        collection_name = KB_COLLECTION_NAME
+
+    try:
+        collection = client.get_collection(collection_name)
+    except Exception:
+        collection = None
+    return load_manifest(manifest_path), collection
+
+
+def build_cs110_kb(batch_size=EMBED_BATCH_SIZE, full=False, keep=KB_KEEP_VERSIONS,
+                   persist_dir=KB_PERSIST_DIR, workers=BUILD_PARSE_WORKERS):
+    """
+    Build a new version of the CS110 knowledge base and publish it
+
+    The build writes into a fresh versioned shadow collection while the live
+    one keeps serving queries, then atomically flips the active-version
+    pointer. A manifest of per-file and per-chunk content hashes is stored
+    with each version: unchanged chunks are copied over from the live
+    collection with their embeddings, and only new chunks are embedded.
+    A missing manifest, a different embedder model or full=True forces every
+    chunk to be re-embedded.
+
+    Files are read and chunked in a pool of `workers` processes and their
+    new chunks stream straight into the batched embed/write stage.
+    """
     print("🔧 Building CS110 Knowledge Base with SMART CHUNKING...")
     print("📚 Supports: Lesson schedules, syllabi, and ANY .txt document!")
 
     docs_path = project_path("cs110_docs")
     print(f"📁 Loading text files from: {docs_path}")
 
-    filenames = [f for f in os.listdir(docs_path) if f.endswith(".txt")]
+    filenames = sorted(f for f in os.listdir(docs_path) if f.endswith(".txt"))
     print(f"📄 Found files: {filenames}")
 
-    all_docs = []
+    print(f"💾 Using persistent Chroma directory: {persist_dir}")
+    os.makedirs(persist_dir, exist_ok=True)
 
-    for fname in filenames:
-        full_path = os.path.join(docs_path, fname)
+    client = get_chroma_client(persist_dir)
 
-        with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-            text = f.read()
+    old_manifest, live_collection = _load_previous_build(client, persist_dir)
 
-        print(f"\n📘 Parsing {fname} ({len(text)} chars)")
+    if full:
+        reason = "--full requested"
+    elif old_manifest is None:
+        reason = "no build manifest found"
+    elif old_manifest.get("embedder") != EMBEDDING_MODEL:
+        reason = f"embedder changed ({old_manifest.get('embedder')} -> {EMBEDDING_MODEL})"
+    elif old_manifest.get("schema", 1) != CHUNK_SCHEMA_VERSION:
+        reason = f"chunk metadata schema changed ({old_manifest.get('schema', 1)} -> {CHUNK_SCHEMA_VERSION})"
+    elif live_collection is None:
+        reason = "live collection is missing"
+    else:
+        reason = None
 
-        if len(text.strip()) == 0:
-            print("   ⚠️ WARNING: File is empty, skipping.")
-            continue
+    if reason:
+        print(f"♻️ Full rebuild: {reason}")
+        old_files = {}
+    else:
+        print("⚡ Incremental rebuild: only changed files will be re-embedded")
+        old_files = old_manifest.get("files", {})
 
-        # Smart chunking based on file type
-        if "Lesson_Schedule" in fname or "Syllabus" in fname:
-            # Special handling for lesson schedules
-            chunks = smart_chunk_by_lessons(text)
-            print(f"   ➕ {len(chunks)} lesson-based chunks created")
-        else:
-            # General document chunking with small chunks for better retrieval
-            chunks = simple_chunk_text(text, chunk_size=800, overlap=100)
-            print(f"   ➕ {len(chunks)} general-purpose chunks created")
+    # Dedup decisions depend on every chunk in the corpus, so when dedup is
+    # (or was) on, every file is re-chunked; embeddings are still reused
+    dedup = NearDuplicateIndex(threshold=DEDUP_THRESHOLD) if DEDUP_ENABLED else None
+    rechunk_all = dedup is not None or bool(old_manifest and old_manifest.get("dedup"))
+
+    # Chunks that are actually stored in the live collection
+    live_ids = {
+        c["id"]
+        for entry in old_files.values()
+        for c in entry["chunks"]
+        if "duplicate_of" not in c
+    }
+
+    new_files = {}
+    reuse_ids = []
+    dedup_stats = {"chunks": 0, "dropped": 0}
+    stages = {"parse_s": 0.0, "parse_wait_s": 0.0, "embed_s": 0.0, "write_s": 0.0,
+              "copy_s": 0.0, "index_s": 0.0, "total_s": 0.0}
+    build_start = time.perf_counter()
+
+    def new_chunks():
+        """Consume parsed files in order and yield (chunk_id, Document) for chunks to embed"""
+        parsed_files = iter_parsed_files(
+            docs_path, filenames, {} if rechunk_all else old_files, workers=workers
+        )
+        while True:
+            wait_start = time.perf_counter()
+            parsed = next(parsed_files, None)
+            stages["parse_wait_s"] += time.perf_counter() - wait_start
+            if parsed is None:
+                return
+            stages["parse_s"] += parsed["parse_s"]
+
+            fname = parsed["fname"]
+            old_entry = old_files.get(fname)
+
+            if parsed["unchanged"]:
+                print(f"\n📘 {fname} unchanged, reusing {len(old_entry['chunks'])} chunks")
+                new_files[fname] = old_entry
+                reuse_ids.extend(c["id"] for c in old_entry["chunks"] if "duplicate_of" not in c)
+                continue
+
+            print(f"\n📘 Parsed {fname} ({parsed['chars']} chars)")
 
-        for i, chunk in enumerate(chunks):
-            all_docs.append(
-                Document(
+            if parsed["kind"] is None:
+                print("   ⚠️ WARNING: File is empty, skipping.")
+            else:
+                print(f"   ➕ {len(parsed['chunks'])} {parsed['kind']} chunks created")
+
+            entries = parsed["entries"]
+            old_ids = {c["id"] for c in old_entry["chunks"]} if old_entry else set()
+            new_ids = {e["id"] for e in entries}
+
+            added = 0
+            reused = 0
+            duplicates = 0
+            for entry, chunk, metadata in zip(entries, parsed["chunks"], parsed["metadatas"]):
+                if dedup is not None:
+                    dedup_stats["chunks"] += 1
+                    duplicate_of, _ = dedup.find(chunk)
+                    if duplicate_of is not None:
+                        entry["duplicate_of"] = duplicate_of
+                        dedup_stats["dropped"] += 1
+                        duplicates += 1
+                        continue
+                    dedup.add(entry["id"], chunk)
+
+                if entry["id"] in live_ids:
+                    reuse_ids.append(entry["id"])
+                    reused += 1
+                    continue
+                # Show preview of first few new chunks
+                if added < 3:
+                    preview = chunk[:150].replace('\n', ' ')
+                    print(f"      New chunk preview: {preview}...")
+                added += 1
+                yield entry["id"], Document(
                     page_content=chunk,
-                    metadata={"source": fname}
+                    metadata=metadata
                 )
-            )
-            # Show preview of first few chunks
-            if i < 3:
-                preview = chunk[:150].replace('\n', ' ')
-                print(f"      Chunk {i+1} preview: {preview}...")
 
-    print(f"\n📚 Total chunks produced: {len(all_docs)}")
+            summary = f"   🔁 {added} new/changed, {reused} reused, {len(old_ids - new_ids)} stale"
+            if dedup is not None:
+                summary += f", {duplicates} near-duplicates skipped"
+            print(summary)
 
-    # Clear old collection and rebuild
-    persist_dir = project_path("cs110_collection")
-    print(f"💾 Using persistent Chroma directory: {persist_dir}")
-    
-    # Delete old collection if exists
+            new_files[fname] = {"sha256": parsed["sha256"], "chunks": entries}
+
+    # The shadow collection exists up front so new chunks can be embedded and
+    # written while later files are still being parsed
+    version = new_version_id()
+    shadow_name = collection_name_for(version)
+    print(f"\n🌱 Writing version {version} into shadow collection {shadow_name}")
+    print(f"🧵 Parsing with {workers} worker process(es), embedding in batches of {batch_size}")
+    shadow = client.create_collection(shadow_name)
+
+    embed_cache = None
     try:
-        client = chromadb.PersistentClient(path=persist_dir)
-        client.delete_collection("cs110_collection")
-        print("🗑️ Deleted old collection")
-    except:
-        pass
+        stream = new_chunks()
+        first = next(stream, None)
+        embedded = 0
+        if first is not None:
+            if INGEST_EMBED_CACHE_PATH:
+                embed_cache = ChunkEmbeddingCache(
+                    INGEST_EMBED_CACHE_PATH,
+                    EMBEDDING_MODEL,
+                    max_bytes=int(INGEST_EMBED_CACHE_MAX_MB * 1024 * 1024)
+                )
+                # The model is only loaded if some chunk isn't in the cache
+                embedder = CachingEmbedder(lambda: get_embedder(EMBEDDING_MODEL), embed_cache)
+            else:
+                # Only load the model once there is something to embed
+                embedder = get_embedder(EMBEDDING_MODEL)
+            stats = ingest_chunks(shadow, embedder, itertools.chain([first], stream), batch_size=batch_size)
+            stages["embed_s"] = stats["embed_s"]
+            stages["write_s"] = stats["write_s"]
+            embedded = stats["chunks"]
 
-    client = chromadb.PersistentClient(path=persist_dir)
-    client.get_or_create_collection("cs110_collection")
+        # Files that disappeared from cs110_docs/
+        for fname in old_files:
+            if fname not in new_files:
+                print(f"\n🗑️ {fname} was removed")
 
-    embedder = SentenceTransformerEmbedder()
+        kept_ids = {
+            c["id"]
+            for entry in new_files.values()
+            for c in entry["chunks"]
+            if "duplicate_of" not in c
+        }
+        stale_count = len(live_ids - kept_ids)
 
-    vector_store = ChromaDBVectorStore(
-        client=client,
-        collection_name="cs110_collection",
-        embedder=embedder
-    )
+        print(f"\n📚 Total chunks in knowledge base: {len(kept_ids)}")
+        if stale_count:
+            print(f"🗑️ Dropping {stale_count} stale chunks")
 
-    memory = LongTermMemory(vector_store)
+        if not reason and embedded == 0 and stale_count == 0:
+            client.delete_collection(shadow_name)
+            print("\n✅ Knowledge Base is already up to date, nothing to publish")
+            return
 
-    print("\n🧠 Adding chunks to LongTermMemory:")
-    for i, doc in enumerate(all_docs):
-        memory.add_document(
-            doc.page_content,
-            metadata=doc.metadata
+        if embedded:
+            print_ingest_report(stats)
+            if embed_cache is not None:
+                print_embed_cache_report(embed_cache.stats())
+        else:
+            print("\n🧠 No new chunks to embed")
+
+        if reuse_ids:
+            copy_start = time.perf_counter()
+            copy_chunks(live_collection, shadow, reuse_ids, batch_size=batch_size)
+            stages["copy_s"] = time.perf_counter() - copy_start
+            print(f"   ♻️ Copied {len(reuse_ids)} unchanged chunks from the live collection")
+
+        # Side indexes over every chunk in this version, reused or new
+        index_start = time.perf_counter()
+        rows = shadow.get(include=["embeddings", "documents", "metadatas"])
+        write_version_artifacts(
+            rows,
+            version_dir(version, persist_dir),
+            build_lesson_index(docs_path),
+            {
+                "version": version,
+                "embedder": EMBEDDING_MODEL,
+                "schema": CHUNK_SCHEMA_VERSION,
+                "collection": shadow_name,
+                "dedup": DEDUP_THRESHOLD if dedup is not None else None,
+                "files": new_files,
+            }
         )
-        if (i + 1) % 10 == 0:
-            print(f"   ➕ Stored {i+1}/{len(all_docs)} chunks")
+        stages["index_s"] = time.perf_counter() - index_start
+
+        if dedup is not None:
+            dim = len(rows["embeddings"][0]) if len(rows["ids"]) else 0
+            print_dedup_report(dedup_stats, dim)
+    except BaseException:
+        # Never leave a half-built shadow collection behind
+        client.delete_collection(shadow_name)
+        raise
+    finally:
+        if embed_cache is not None:
+            embed_cache.close()
+
+    publish_and_collect(client, version, persist_dir, keep=keep)
+
+    stages["total_s"] = time.perf_counter() - build_start
+    print_stage_report(stages)
 
-    print(f"\n   ➕ Stored all {len(all_docs)} chunks")
     print("\n✅ Knowledge Base built successfully!")
     print("🚀 You can now ask questions about ANY document in cs110_docs/")
 
 
+def snapshot_docs(docs_path):
+    """{filename: (mtime_ns, size)} for the .txt files in docs_path"""
+    state = {}
+    for fname in os.listdir(docs_path):
+        if not fname.endswith(".txt"):
+            continue
+        try:
+            st = os.stat(os.path.join(docs_path, fname))
+        except FileNotFoundError:
+            # Deleted between listdir and stat
+            continue
+        state[fname] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def describe_changes(before, after):
+    """Short human-readable list of added/removed/modified files"""
+    changes = [f"+{f}" for f in sorted(after.keys() - before.keys())]
+    changes += [f"-{f}" for f in sorted(before.keys() - after.keys())]
+    changes += [f"~{f}" for f in sorted(before.keys() & after.keys()) if before[f] != after[f]]
+    return ", ".join(changes)
+
+
+def _try_build(build_kwargs):
+    """Run one watch-mode build; returns False instead of raising on failure"""
+    try:
+        build_cs110_kb(**build_kwargs)
+        return True
+    except Exception as e:
+        # Keep watching; the live version is untouched by a failed build
+        print(f"❌ Rebuild failed, still serving the previous version: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def watch_docs(interval=WATCH_INTERVAL_S, debounce=WATCH_DEBOUNCE_S,
+               max_backoff=WATCH_MAX_BACKOFF_S, **build_kwargs):
+    """
+    Poll cs110_docs/ and publish a new KB version whenever it changes
+
+    Polling (mtime + size) works on any filesystem, including network and
+    container mounts where inotify doesn't. After a change the watcher
+    waits until the directory has been quiet for `debounce` seconds, so a
+    burst of saves becomes one rebuild. Rebuilds are incremental, and
+    running query tools switch to the new version on their next call.
+
+    A failed rebuild is retried with exponential backoff (capped at
+    `max_backoff` seconds) until it succeeds; a further edit retries it
+    straight after the debounce.
+    """
+    docs_path = project_path("cs110_docs")
+    print(f"👀 Watching {docs_path} (poll every {interval:g}s, debounce {debounce:g}s). Ctrl+C to stop.")
+
+    last = None       # docs as of the last successful build
+    failed = None     # docs as of the last failed build
+    failures = 0
+    retry_at = 0.0
+
+    # Catch up with anything edited while nobody was watching
+    current = snapshot_docs(docs_path)
+
+    try:
+        while True:
+            waiting_to_retry = current == failed and time.monotonic() < retry_at
+            if current != last and not waiting_to_retry:
+                if last is not None and current != failed:
+                    print(f"\n✏️ Change detected: {describe_changes(last, current)}")
+                    quiet_since = time.monotonic()
+                    while time.monotonic() - quiet_since < debounce:
+                        time.sleep(min(interval, debounce))
+                        newer = snapshot_docs(docs_path)
+                        if newer != current:
+                            print(f"✏️ More changes: {describe_changes(current, newer)}")
+                            current = newer
+                            quiet_since = time.monotonic()
+
+                # Anything edited during the build shows up on the next poll
+                if _try_build(build_kwargs):
+                    last, failed, failures = current, None, 0
+                else:
+                    failed = current
+                    failures += 1
+                    delay = min(max_backoff, interval * 2 ** failures)
+                    retry_at = time.monotonic() + delay
+                    print(f"🔁 Retrying in {delay:g}s, or as soon as cs110_docs changes again")
+
+            time.sleep(interval)
+            current = snapshot_docs(docs_path)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+def export_snapshot(path, persist_dir=KB_PERSIST_DIR):
+    """
+    Write the live KB version to a single-file snapshot (see kb_snapshot.py)
+
+    Returns the snapshot header.
+    """
+    active = read_pointer(persist_dir)
+    if not active:
+        raise SnapshotError("No published KB version to export; run build_kb.py first")
+
+    artifacts_dir = version_dir(active["version"], persist_dir)
+    manifest = load_manifest(os.path.join(artifacts_dir, KB_MANIFEST_NAME)) or {}
+    lesson_index = load_manifest(os.path.join(artifacts_dir, LESSON_INDEX_NAME)) or {}
+
+    client = get_chroma_client(persist_dir)
+    rows = client.get_collection(active["collection"]).get(
+        include=["embeddings", "documents", "metadatas"]
+    )
+
+    print(f"📦 Exporting version {active['version']} ({len(rows['ids'])} chunks) to {path}")
+    header = write_snapshot(
+        path,
+        {
+            "kb_version": active["version"],
+            "embedder": manifest.get("embedder", EMBEDDING_MODEL),
+            "schema": manifest.get("schema", CHUNK_SCHEMA_VERSION),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        {
+            "ids": list(rows["ids"]),
+            "documents": list(rows["documents"]),
+            "metadatas": list(rows["metadatas"]),
+            "lesson_index": lesson_index,
+            "files": manifest.get("files", {}),
+        },
+        rows["embeddings"]
+    )
+    size_kb = os.path.getsize(path) / 1024
+    print(f"✅ Snapshot written ({size_kb:.0f} KB, sha256 {header['sha256'][:12]}...)")
+    return header
+
+
+def import_snapshot(path, batch_size=EMBED_BATCH_SIZE, keep=KB_KEEP_VERSIONS,
+                    persist_dir=KB_PERSIST_DIR):
+    """
+    Publish a snapshot as a new KB version without re-embedding anything
+
+    The snapshot's embeddings are loaded into a new versioned Chroma
+    collection and every side index (BM25, NumPy, mmap, FAISS, lesson
+    index) is regenerated from them, so whichever VECTOR_BACKEND is
+    configured is ready to serve. Returns the new version id.
+    """
+    start = time.perf_counter()
+    header, payload, embeddings = read_snapshot(path)
+    missing = [key for key in ("kb_version", "embedder") if key not in header]
+    missing += [key for key in ("ids", "documents", "metadatas")
+                if not isinstance(payload.get(key), list) or len(payload[key]) != header["count"]]
+    if missing:
+        raise SnapshotError(f"Snapshot is not a KB export (missing or mismatched: {', '.join(missing)})")
+    print(f"📦 Snapshot of version {header['kb_version']}: {header['count']} chunks, "
+          f"embedder {header['embedder']}, checksum OK")
+
+    if header["embedder"] != EMBEDDING_MODEL:
+        raise SnapshotError(
+            f"Snapshot was embedded with {header['embedder']} but this instance is "
+            f"configured for {EMBEDDING_MODEL}; query vectors would not match"
+        )
+
+    os.makedirs(persist_dir, exist_ok=True)
+    client = get_chroma_client(persist_dir)
+
+    version = new_version_id()
+    shadow_name = collection_name_for(version)
+    print(f"🌱 Loading into version {version} ({shadow_name})")
+    shadow = client.create_collection(shadow_name)
+
+    try:
+        ids = payload["ids"]
+        for batch_start in range(0, len(ids), batch_size):
+            batch_end = batch_start + batch_size
+            shadow.upsert(
+                ids=ids[batch_start:batch_end],
+                embeddings=embeddings[batch_start:batch_end].tolist(),
+                documents=payload["documents"][batch_start:batch_end],
+                metadatas=payload["metadatas"][batch_start:batch_end]
+            )
+
+        rows = {
+            "ids": ids,
+            "embeddings": embeddings,
+            "documents": payload["documents"],
+            "metadatas": payload["metadatas"],
+        }
+        write_version_artifacts(
+            rows,
+            version_dir(version, persist_dir),
+            payload.get("lesson_index", {}),
+            {
+                "version": version,
+                "embedder": header["embedder"],
+                "schema": header.get("schema", CHUNK_SCHEMA_VERSION),
+                "collection": shadow_name,
+                "files": payload.get("files", {}),
+                "imported_from": header["kb_version"],
+            }
+        )
+    except BaseException:
+        client.delete_collection(shadow_name)
+        raise
+
+    publish_and_collect(client, version, persist_dir, keep=keep)
+    print(f"✅ Snapshot imported in {time.perf_counter() - start:.2f}s")
+    return version
+
+
 if __name__ == "__main__":
-    build_cs110_kb()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the CS110 knowledge base")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        help=f"Chunks per embedding/upsert batch (default {EMBED_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BUILD_PARSE_WORKERS,
+        help=f"Processes used to read and chunk files (default {BUILD_PARSE_WORKERS})"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the build manifest and re-embed every chunk"
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=KB_KEEP_VERSIONS,
+        help=f"Versions to retain for rollback, including the live one (default {KB_KEEP_VERSIONS})"
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Point the live knowledge base back at the previous version and exit"
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="Only garbage-collect versions beyond --keep and exit"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild whenever cs110_docs/ changes"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=WATCH_INTERVAL_S,
+        help=f"Seconds between polls in --watch mode (default {WATCH_INTERVAL_S:g})"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=WATCH_DEBOUNCE_S,
+        help=f"Quiet seconds required before a --watch rebuild (default {WATCH_DEBOUNCE_S:g})"
+    )
+    parser.add_argument(
+        "--export-snapshot",
+        metavar="PATH",
+        help="Write the live version to a single-file snapshot and exit"
+    )
+    parser.add_argument(
+        "--import-snapshot",
+        metavar="PATH",
+        help="Publish a snapshot file as a new version (no embedding needed) and exit"
+    )
+    args = parser.parse_args()
+
+    if args.export_snapshot or args.import_snapshot:
+        try:
+            if args.export_snapshot:
+                export_snapshot(args.export_snapshot)
+            else:
+                import_snapshot(args.import_snapshot, batch_size=args.batch_size, keep=args.keep)
+        except (OSError, SnapshotError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    elif args.watch:
+        watch_docs(
+            interval=args.interval,
+            debounce=args.debounce,
+            batch_size=args.batch_size,
+            keep=args.keep,
+            workers=args.workers
+        )
+    elif args.rollback:
+        record = rollback(KB_PERSIST_DIR)
+        if record:
+            print(f"⏪ Rolled back to version {record['version']}")
+        else:
+            print("⚠️ No previous version to roll back to")
+    elif args.gc:
+        client = get_chroma_client(KB_PERSIST_DIR)
+        print(f"🧹 Garbage-collected: {garbage_collect(client, KB_PERSIST_DIR, keep=args.keep)}")
+    else:
+        build_cs110_kb(batch_size=args.batch_size, full=args.full, keep=args.keep,
+                       workers=args.workers)
@@ -0,0 +1,530 @@
+"""
+Caches used on the query path and by the knowledge base builder
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+
+def normalize_query(text):
+    """Lower-case and collapse whitespace so trivially different queries share a key"""
+    return " ".join(text.lower().split())
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU mapping with hit/miss counters
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class TTLCache(LRUCache):
+    """
+    LRU cache whose entries also expire ttl seconds after they were stored
+    """
+
+    def __init__(self, maxsize=512, ttl=3600):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            with self._lock:
+                # Undo the hit counted by LRUCache.get
+                self._data.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+                self.expirations += 1
+            return default
+        return value
+
+    def put(self, key, value):
+        super().put(key, (time.monotonic() + self.ttl, value))
+
+    def stats(self):
+        stats = super().stats()
+        stats["ttl_s"] = self.ttl
+        stats["expirations"] = self.expirations
+        return stats
+
+
+class QueryEmbeddingCache:
+    """
+    Caches query embeddings in front of an embedder
+
+    Keys are (embedder model, normalized query text). Lookups go to a bounded
+    in-memory LRU first and, if disk_path is set, to a small SQLite table
+    that survives restarts. Only misses on both tiers call the embedder.
+
+    The embedder is given the normalized text, so a cached vector is exactly
+    what a fresh call would have produced for that key.
+    """
+
+    def __init__(self, embedder, model_name, maxsize=1024, disk_path=None):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.memory = LRUCache(maxsize)
+        self.disk_hits = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, query))"
+            )
+            self._db.commit()
+
+    def _disk_get(self, query):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                (self.model_name, query)
+            ).fetchone()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector.tolist()
+
+    def _disk_put(self, query, vector):
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                (self.model_name, query, array("f", vector).tobytes())
+            )
+            self._db.commit()
+
+    def embed_query(self, text):
+        query = normalize_query(text)
+        key = (self.model_name, query)
+
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector
+
+        vector = self._disk_get(query)
+        if vector is not None:
+            self.disk_hits += 1
+        else:
+            vector = list(self.embedder.embed_query(query))
+            self._disk_put(query, vector)
+
+        self.memory.put(key, vector)
+        return vector
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_enabled"] = self._db is not None
+        return stats
+
+
+class ChunkEmbeddingCache:
+    """
+    Persistent content-addressed store of chunk embeddings for ingestion
+
+    Keys are sha256(model + NUL + chunk text), so the same chunk embedded by
+    the same model is found again whatever file, collection, persist
+    directory or backend it ends up in. Vectors are float32 blobs in SQLite.
+    When the stored vectors exceed max_bytes, the least recently used rows
+    are evicted.
+    """
+
+    def __init__(self, path, model_name, max_bytes=256 * 1024 * 1024):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS chunk_embeddings_lru ON chunk_embeddings (last_used)"
+        )
+        self._db.commit()
+        self.total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM chunk_embeddings"
+        ).fetchone()[0]
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Return a list aligned with texts holding cached vectors or None"""
+        keys = [self.key(text) for text in texts]
+        found = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT key, vector FROM chunk_embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector.tolist()
+
+        if found:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE chunk_embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found]
+            )
+            self._db.commit()
+
+        vectors = [found.get(key) for key in keys]
+        hits = sum(1 for vector in vectors if vector is not None)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts, vectors):
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob = array("f", vector).tobytes()
+            rows.append((self.key(text), blob, len(blob), now))
+
+        for key, _, nbytes, _ in rows:
+            old = self._db.execute(
+                "SELECT nbytes FROM chunk_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            self.total_bytes += nbytes - (old[0] if old else 0)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO chunk_embeddings (key, vector, nbytes, last_used) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, nbytes FROM chunk_embeddings ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, nbytes in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                victims.append((key,))
+                self.total_bytes -= nbytes
+            self._db.executemany("DELETE FROM chunk_embeddings WHERE key = ?", victims)
+            self.evictions += len(victims)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class CachingEmbedder:
+    """
+    embed_documents() front end that consults a ChunkEmbeddingCache first
+
+    The real embedder comes from load_embedder() and is only loaded when a
+    batch has at least one miss, so a fully cached build never loads the
+    model at all.
+    """
+
+    def __init__(self, load_embedder, cache):
+        self._load_embedder = load_embedder
+        self._embedder = None
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            if self._embedder is None:
+                self._embedder = self._load_embedder()
+            fresh = self._embedder.embed_documents([texts[i] for i in missing])
+            fresh = [list(map(float, vector)) for vector in fresh]
+            self.cache.put_many([texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        return vectors
+
+
+class LLMResponseCache:
+    """
+    Persistent exact-match store of chat completions
+
+    Keys are sha256 over the model name, call parameters and every message's
+    role, content and tool-call fields, so only a byte-identical request is
+    answered from the cache. Rows older than their TTL are treated as
+    misses and deleted; beyond max_bytes the least recently used rows go.
+
+    Hits don't write: their last_used times are kept in memory and flushed
+    in one batch every touch_batch hits, before an eviction and on close.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, touch_batch=64):
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        # key -> last_used time not yet written to SQLite
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Shared by the event loop and worker threads, guarded by _lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL,"
+            " nbytes INTEGER NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS llm_responses_lru ON llm_responses (last_used)"
+        )
+        self._db.commit()
+        self.total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM llm_responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def key(model_name, messages, params):
+        request = {
+            "model": model_name,
+            "params": params,
+            "messages": [
+                {
+                    "role": m.role,
+                    "content": m.content,
+                    "name": getattr(m, "name", None),
+                    "tool_calls": getattr(m, "tool_calls", None),
+                    "tool_call_id": getattr(m, "tool_call_id", None),
+                }
+                for m in messages
+            ],
+        }
+        blob = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Cached response content for key, or None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, nbytes, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, nbytes, expires_at = row
+            if now >= expires_at:
+                self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.total_bytes -= nbytes
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touched()
+                self._db.commit()
+            self.hits += 1
+            return response
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE llm_responses SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def put(self, key, model_name, response, ttl):
+        now = time.time()
+        nbytes = len(response.encode("utf-8"))
+        with self._lock:
+            old = self._db.execute(
+                "SELECT nbytes FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            self.total_bytes += nbytes - (old[0] if old else 0)
+            self._touched.pop(key, None)
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses"
+                " (key, model, response, nbytes, expires_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, nbytes, now + ttl, now)
+            )
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        if self.total_bytes > self.max_bytes:
+            # LRU order has to see every recent hit
+            self._flush_touched()
+        while self.total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, nbytes FROM llm_responses ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, nbytes in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                victims.append((key,))
+                self.total_bytes -= nbytes
+            self._db.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+            self.evictions += len(victims)
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class CachingChatModel:
+    """
+    invoke()/ainvoke() front end that consults an LLMResponseCache first
+
+    Wraps a chat model adapter (e.g. fairlib's OpenAIAdapter); anything
+    else, such as streaming, is passed straight through to it. Responses
+    carrying native tool calls and the adapter's "Error: ..." replies are
+    never stored.
+    """
+
+    def __init__(self, adapter, cache, ttl):
+        self.adapter = adapter
+        self.cache = cache
+        self.ttl = ttl
+        self.model_name = getattr(adapter, "model_name", "")
+
+    def __getattr__(self, name):
+        # Only reached for attributes CachingChatModel doesn't define itself
+        if name == "adapter":
+            raise AttributeError(name)
+        return getattr(self.adapter, name)
+
+    def _lookup(self, messages, kwargs):
+        key = self.cache.key(self.model_name, messages, kwargs)
+        content = self.cache.get(key)
+        if content is None:
+            return key, None
+        from fairlib import Message
+        return key, Message(role="assistant", content=content)
+
+    def _store(self, key, response):
+        content = getattr(response, "content", None)
+        # OpenAIAdapter reports API failures as an ordinary message
+        if not isinstance(content, str) or content.startswith("Error: "):
+            return
+        if getattr(response, "tool_calls", None):
+            return
+        self.cache.put(key, self.model_name, content, self.ttl)
+
+    def invoke(self, messages, **kwargs):
+        key, cached = self._lookup(messages, kwargs)
+        if cached is not None:
+            return cached
+        response = self.adapter.invoke(messages, **kwargs)
+        self._store(key, response)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        # SQLite calls block, so they run off the event loop
+        key, cached = await asyncio.to_thread(self._lookup, messages, kwargs)
+        if cached is not None:
+            return cached
+        response = await self.adapter.ainvoke(messages, **kwargs)
+        await asyncio.to_thread(self._store, key, response)
+        return response
@@ -27,4 +27,160 @@ def project_path(relative: str) -> str:
 
 
 # Model configuration
-MODEL_NAME = "gpt-4o-mini"  # Use mini for cost savings
\ No newline at end of file
+MODEL_NAME = "gpt-4o-mini"  # Use mini for cost savings
+
+
+# Knowledge base configuration
+KB_PERSIST_DIR = project_path("cs110_collection")
+KB_COLLECTION_NAME = "cs110_collection"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+KB_MANIFEST_NAME = "build_manifest.json"
+
+# Lesson number -> chunks index built from the lesson schedule, so lesson
+# lookups can skip embedding and vector search entirely
+LESSON_SCHEDULE_FILE = "CS110_Lesson_Schedule.txt"
+LESSON_INDEX_NAME = "lesson_index.json"
+
+# /api/ask answers lesson topic/date, graded review date and grading weight
+# questions straight from these documents (pipeline/fast_path.py) instead of
+# running an instructor agent. CS110_FAST_PATH=0 sends everything to the agent.
+GRADING_FILE = "cs110_grading.txt"
+FAST_PATH_ENABLED = os.getenv("CS110_FAST_PATH", "1") != "0"
+
+# Hybrid retrieval: a BM25 keyword index is built with each KB version and
+# fused with the dense results using reciprocal rank fusion. Each retriever
+# contributes HYBRID_CANDIDATES candidates to the fusion.
+BM25_INDEX_NAME = "bm25_index.json"
+HYBRID_CANDIDATES = 10
+RRF_K = 60
+
+# Vector search backend used by CS110KnowledgeQueryTool:
+#   "chroma" - query the versioned Chroma collection
+#   "numpy"  - exact search over an in-memory matrix exported by build_kb
+#   "mmap"   - like "numpy", but memory-mapped so uvicorn workers share one copy
+#   "quantized" - int8/float16 codes in memory, top candidates re-scored
+#                 against the float32 rows of the mmap export
+#   "faiss"  - FAISS index exported by build_kb (needs faiss-cpu)
+VECTOR_BACKENDS = ("chroma", "numpy", "mmap", "quantized", "faiss")
+VECTOR_BACKEND = os.getenv("CS110_VECTOR_BACKEND", "chroma")
+if VECTOR_BACKEND not in VECTOR_BACKENDS:
+    # A typo would otherwise silently fall back to Chroma
+    raise ValueError(
+        f"Unknown CS110_VECTOR_BACKEND {VECTOR_BACKEND!r}; "
+        f"expected one of: {', '.join(VECTOR_BACKENDS)}"
+    )
+NUMPY_INDEX_NAME = "vectors.npz"
+# "float16" halves the exported matrix size at a small precision cost
+NUMPY_INDEX_DTYPE = os.getenv("CS110_NUMPY_INDEX_DTYPE", "float32")
+MMAP_INDEX_NAME = "mmap_index"
+QUANTIZED_INDEX_NAME = "vectors_quantized.npz"
+QUANTIZED_INDEX_DTYPE = os.getenv("CS110_QUANTIZED_INDEX_DTYPE", "int8")
+# Candidates re-scored at full precision = k * this factor
+QUANTIZED_RESCORE_FACTOR = int(os.getenv("CS110_QUANTIZED_RESCORE_FACTOR", "4"))
+
+# FAISS backend: "flat" (exact), "hnsw" or "ivf" for multi-course corpora
+FAISS_INDEX_NAME = "faiss.index"
+FAISS_PAYLOAD_NAME = "faiss_payload.json"
+FAISS_INDEX_TYPE = os.getenv("CS110_FAISS_INDEX_TYPE", "flat")
+FAISS_HNSW_M = int(os.getenv("CS110_FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("CS110_FAISS_HNSW_EF_SEARCH", "64"))
+FAISS_IVF_NLIST = int(os.getenv("CS110_FAISS_IVF_NLIST", "64"))
+FAISS_IVF_NPROBE = int(os.getenv("CS110_FAISS_IVF_NPROBE", "8"))
+
+# Each build writes a new versioned collection, then flips this pointer file.
+# The active version plus (KB_KEEP_VERSIONS - 1) previous ones are kept
+# around for rollback; anything older is garbage-collected.
+KB_POINTER_NAME = "active_version.json"
+KB_KEEP_VERSIONS = 2
+
+# Number of chunks embedded per SentenceTransformer forward pass and
+# written per Chroma upsert when building the knowledge base
+EMBED_BATCH_SIZE = int(os.getenv("CS110_EMBED_BATCH_SIZE", "64"))
+
+# Processes that read and chunk cs110_docs/ files during a build; 1 parses
+# inline in the build process. The course docs are a few dozen small text
+# files, where spawning a pool costs more than it saves, so the pool is only
+# worth turning on (e.g. --workers 4) for much larger document sets.
+BUILD_PARSE_WORKERS = int(os.getenv("CS110_BUILD_PARSE_WORKERS", "1"))
+
+# build_kb.py --watch: how often cs110_docs/ is polled, how long it must
+# stay unchanged after an edit before a rebuild starts, and the longest wait
+# between retries of a failed rebuild (the wait doubles after each failure)
+WATCH_INTERVAL_S = float(os.getenv("CS110_WATCH_INTERVAL_S", "2"))
+WATCH_DEBOUNCE_S = float(os.getenv("CS110_WATCH_DEBOUNCE_S", "5"))
+WATCH_MAX_BACKOFF_S = float(os.getenv("CS110_WATCH_MAX_BACKOFF_S", "300"))
+
+# Content-addressed cache of chunk embeddings used by build_kb, keyed by
+# sha256(embedder model + chunk text). It lives outside the persist directory
+# so rebuilding into a fresh directory, backend or collection reuses vectors.
+# Set CS110_INGEST_EMBED_CACHE to "" to disable it.
+INGEST_EMBED_CACHE_PATH = os.getenv("CS110_INGEST_EMBED_CACHE", project_path("cs110_embedding_cache.sqlite")) or None
+# Least recently used vectors are evicted beyond this size
+INGEST_EMBED_CACHE_MAX_MB = float(os.getenv("CS110_INGEST_EMBED_CACHE_MAX_MB", "256"))
+
+# Near-duplicate chunk collapsing in build_kb (MinHash over word 5-grams).
+# Chunks whose estimated Jaccard similarity to an earlier chunk reaches the
+# threshold are not embedded or indexed. It is opt-in (CS110_DEDUP=1): which
+# chunk is a duplicate depends on the whole corpus, so every build with it
+# on re-reads and re-chunks every file instead of skipping unchanged ones.
+# Embeddings are still reused, so that mostly costs parse time.
+DEDUP_ENABLED = os.getenv("CS110_DEDUP", "0") != "0"
+DEDUP_THRESHOLD = float(os.getenv("CS110_DEDUP_THRESHOLD", "0.9"))
+
+# Per-session conversation memory for /api/ask (pipeline/sessions.py). Each
+# session keeps at most SESSION_MAX_TURNS turns / ~SESSION_MAX_TOKENS tokens;
+# sessions idle for SESSION_TTL_S, or beyond SESSION_MAX_SESSIONS, are evicted.
+SESSION_MAX_TURNS = int(os.getenv("CS110_SESSION_MAX_TURNS", "10"))
+SESSION_MAX_TOKENS = int(os.getenv("CS110_SESSION_MAX_TOKENS", "3000"))
+SESSION_TTL_S = float(os.getenv("CS110_SESSION_TTL_S", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("CS110_SESSION_MAX_SESSIONS", "1000"))
+# Past SESSION_COMPACT_AT_TOKENS, all but the last SESSION_COMPACT_KEEP_TURNS
+# turns are folded into a rolling summary of ~SESSION_SUMMARY_TOKENS tokens
+# in the background. CS110_SESSION_COMPACTION=0 turns this off.
+SESSION_COMPACTION = os.getenv("CS110_SESSION_COMPACTION", "1") != "0"
+SESSION_COMPACT_AT_TOKENS = int(os.getenv("CS110_SESSION_COMPACT_AT_TOKENS", "1500"))
+SESSION_COMPACT_KEEP_TURNS = int(os.getenv("CS110_SESSION_COMPACT_KEEP_TURNS", "2"))
+SESSION_SUMMARY_TOKENS = int(os.getenv("CS110_SESSION_SUMMARY_TOKENS", "200"))
+
+# Query embedding cache used by CS110KnowledgeQueryTool. The on-disk tier is
+# off unless CS110_QUERY_EMBED_CACHE points at a SQLite file.
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("CS110_QUERY_EMBED_CACHE_SIZE", "1024"))
+QUERY_EMBED_CACHE_PATH = os.getenv("CS110_QUERY_EMBED_CACHE") or None
+
+# Exact-match cache of chat completions (pipeline/caches.py LLMResponseCache).
+# Identical prompts - same role definition, history, observations, model and
+# parameters - are answered from SQLite instead of the API. It is opt-in: a
+# cached answer can outlive a change to the course material or the prompts,
+# so no agent uses it until CS110_LLM_CACHE_TTL_S (all agents) or an agent's
+# own CS110_LLM_CACHE_TTL_<AGENT> is set to a TTL in seconds, e.g. 604800 for
+# a week of repeated evaluation runs. Set CS110_LLM_CACHE to "" to disable it
+# everywhere.
+LLM_CACHE_PATH = os.getenv("CS110_LLM_CACHE", project_path("cs110_llm_cache.sqlite")) or None
+LLM_CACHE_MAX_MB = float(os.getenv("CS110_LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_TTL_S = float(os.getenv("CS110_LLM_CACHE_TTL_S", "0"))
+# Per-agent TTL in seconds; 0, or an agent missing here, means no caching
+LLM_CACHE_AGENT_TTL_S = {
+    "nice_instructor": float(os.getenv("CS110_LLM_CACHE_TTL_NICE_INSTRUCTOR", str(LLM_CACHE_TTL_S))),
+    "mean_instructor": float(os.getenv("CS110_LLM_CACHE_TTL_MEAN_INSTRUCTOR", str(LLM_CACHE_TTL_S))),
+    "knowledge_agent": float(os.getenv("CS110_LLM_CACHE_TTL_KNOWLEDGE_AGENT", str(LLM_CACHE_TTL_S))),
+}
+
+# Semantic answer cache in front of the instructor agents (pipeline/answer_cache.py).
+# A question whose embedding is at least ANSWER_CACHE_THRESHOLD cosine-similar
+# to an earlier one (same persona, same KB version) gets the earlier answer.
+# Set CS110_ANSWER_CACHE_AUDIT to a file path (e.g. cs110_answer_cache_audit.jsonl)
+# to log hits and rejected matches there while tuning the threshold; off by default.
+ANSWER_CACHE_ENABLED = os.getenv("CS110_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("CS110_ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = int(os.getenv("CS110_ANSWER_CACHE_SIZE", "500"))
+ANSWER_CACHE_TTL_S = float(os.getenv("CS110_ANSWER_CACHE_TTL_S", "86400"))
+ANSWER_CACHE_AUDIT_PATH = os.getenv("CS110_ANSWER_CACHE_AUDIT", "") or None
+
+# Formatted cs110_query results, keyed by KB version + normalized query, so a
+# rebuild invalidates everything automatically
+RESULT_CACHE_SIZE = int(os.getenv("CS110_RESULT_CACHE_SIZE", "512"))
+RESULT_CACHE_TTL_S = float(os.getenv("CS110_RESULT_CACHE_TTL_S", "3600"))
+
+# Worker threads used by the async cs110_query path (CS110KnowledgeQueryTool.ause)
+# so embedding and vector search never run on the FastAPI event loop
+QUERY_POOL_WORKERS = int(os.getenv("CS110_QUERY_POOL_WORKERS", "4"))
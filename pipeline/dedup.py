@@ -0,0 +1,97 @@
+"""
+Near-duplicate chunk detection with MinHash + LSH banding
+
+The syllabus and the lesson schedule repeat the same lesson blocks, and
+overlapping general-purpose chunks can come out nearly identical. Indexing
+all of them wastes vectors and fills a query's top-k with copies of one
+passage. build_kb runs every chunk through a NearDuplicateIndex and skips
+the ones whose estimated Jaccard similarity (over word shingles) to an
+already-kept chunk is at least the threshold.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+WORD_RE = re.compile(r"\w+")
+
+# Mersenne prime for the universal hash family; shingle hashes are 32-bit so
+# a * h + b stays inside uint64
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def shingles(text, size=5):
+    """Set of hashed word `size`-grams of the lower-cased text"""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else [text]
+    else:
+        grams = (" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little")
+        for g in grams
+    }
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures bucketed by LSH bands
+
+    num_perm hash functions are split into `bands` bands; two chunks become
+    candidates if any band matches, and a candidate counts as a duplicate
+    only if the fraction of equal signature slots (the Jaccard estimate)
+    reaches `threshold`.
+    """
+
+    def __init__(self, threshold=0.9, num_perm=64, bands=16, seed=110):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def signature(self, text):
+        hashes = np.fromiter(shingles(text), dtype=np.uint64)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def find(self, text):
+        """
+        Return (kept_id, similarity) for the closest kept near-duplicate of
+        text, or (None, similarity-of-closest-candidate) if there isn't one
+        """
+        signature = self.signature(text)
+        best_id, best_sim = None, 0.0
+        seen = set()
+        for band, key in self._band_keys(signature):
+            for chunk_id in self._buckets[band].get(key, ()):
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                sim = float(np.mean(self._signatures[chunk_id] == signature))
+                if sim > best_sim:
+                    best_id, best_sim = chunk_id, sim
+        if best_sim >= self.threshold:
+            return best_id, best_sim
+        return None, best_sim
+
+    def add(self, chunk_id, text):
+        signature = self.signature(text)
+        self._signatures[chunk_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(chunk_id)
+
+    def __len__(self):
+        return len(self._signatures)
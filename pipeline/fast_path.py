@@ -0,0 +1,254 @@
+"""
+Deterministic fast path for structured schedule and grading questions
+
+"When is lesson 40?" or "How much are graded reviews worth?" have exactly
+one right answer sitting in CS110_Lesson_Schedule.txt / cs110_grading.txt,
+yet going through an instructor agent costs a ReAct loop with at least two
+LLM round trips. FastPathRouter recognises those questions with anchored
+patterns and answers them from an index parsed out of the two files, using
+a per-persona template. Anything it isn't sure about returns None and goes
+to the agent as before.
+"""
+import os
+import re
+import threading
+
+from pipeline.config import GRADING_FILE, LESSON_SCHEDULE_FILE
+from pipeline.lessons import parse_lesson_header
+
+DESCRIPTION_RE = re.compile(r'^Description:\s*\n(.+?)(?:\n\s*\n|\Z)', re.MULTILINE | re.DOTALL)
+TOTAL_POINTS_RE = re.compile(r'^Total Points:\s*(\d+)', re.MULTILINE)
+CATEGORY_RE = re.compile(r'^\d+\.\s*(.+?):\s*(\d+) points \((\d+)%\)', re.MULTILINE)
+GR_BLOCK_RE = re.compile(
+    r'^Graded Review (\d+) \(GR\d+\):.*?$'
+    r'(?P<body>.*?)(?=^Graded Review \d+ \(GR\d+\):|^=+\s*$|\Z)',
+    re.MULTILINE | re.DOTALL,
+)
+GR_DATE_M_RE = re.compile(r'Date \(M-section\):\s*(.+)')
+GR_DATE_T_RE = re.compile(r'Date \(T-section\):\s*(.+)')
+GR_COVERS_RE = re.compile(r'Covers:\s*(.+)')
+
+# Questions are matched whole (after normalize_question), so "Tell me about
+# lesson 15 and when it occurs" deliberately falls through to the agent
+INTENT_PATTERNS = [
+    ("lesson_topic", re.compile(
+        r"(?:what is|what's|whats) lesson (?P<n>\d+) (?:about|on|covering)"
+        r"|what (?:topics are|topic is|is) covered in lesson (?P<n2>\d+)"
+        r"|what does lesson (?P<n3>\d+) cover"
+    )),
+    ("lesson_date", re.compile(
+        r"when is lesson (?P<n>\d+)"
+        r"|what (?:day|date) is lesson (?P<n2>\d+)(?: on)?"
+        r"|when does lesson (?P<n3>\d+) (?:happen|occur|meet)"
+    )),
+    ("gr_date", re.compile(
+        r"(?:when is|what (?:day|date) is) (?:the )?(?:graded review|gr) ?(?P<n>\d+)"
+    )),
+    ("grading_weight", re.compile(
+        r"how (?:much|many points) (?:is|are) (?:the )?(?P<cat>[a-z& ]+?) worth"
+        r"|what (?:percent|percentage) of (?:my|the) grade (?:is|are) (?:the )?(?P<cat2>[a-z& ]+)"
+    )),
+]
+
+# Ways students name each grading category -> category title in cs110_grading.txt.
+# Only unambiguous names belong here: "the project" or "the final project"
+# could mean the whole Course Project or its 60-point Final Project
+# Submission milestone, so those go to the agent.
+CATEGORY_ALIASES = {
+    "Graded Reviews": ("graded review", "graded reviews", "gr", "grs", "exam", "exams"),
+    "Programming Packs": ("programming pack", "programming packs", "pack", "packs", "pp", "pps"),
+    "Labs": ("lab", "labs"),
+    "Course Project": ("course project",),
+    "Participation & Quizzes": ("participation", "quiz", "quizzes", "participation and quizzes",
+                                "participation & quizzes"),
+}
+
+TEMPLATES = {
+    "nice": {
+        "lesson_topic": "Lesson {lesson} is \"{title}\". {description} It meets on {date_m} "
+                        "(M-section) and {date_t} (T-section).",
+        "lesson_date": "Lesson {lesson} ({title}) is on {date_m} for the M-section and "
+                       "{date_t} for the T-section.",
+        "lesson_missing": "Lesson {lesson} is not on the CS110 schedule. The course runs from "
+                          "Lesson {first} to Lesson {last}, so feel free to ask about any of those!",
+        "gr_date": "Graded Review {number} (GR{number}) is on {date_m} for the M-section and "
+                   "{date_t} for the T-section. It covers {covers}. Good luck!",
+        "grading_weight": "The {category} category is worth {points} points, which is {percent}% "
+                          "of the {total}-point course grade.",
+    },
+    "mean": {
+        "lesson_topic": "Seriously? It's right there in the schedule. Lesson {lesson} is \"{title}\". "
+                        "{description} It's on {date_m} (M-section) and {date_t} (T-section). Try reading.",
+        "lesson_date": "*sigh* Lesson {lesson} ({title}) is on {date_m} for the M-section and "
+                       "{date_t} for the T-section. Put it in a calendar.",
+        "lesson_missing": "Lesson {lesson}? That does not exist. CS110 goes from Lesson {first} to "
+                          "Lesson {last}. Come on...",
+        "gr_date": "You should already know this. Graded Review {number} (GR{number}) is on {date_m} "
+                   "for the M-section and {date_t} for the T-section, and it covers {covers}. Start studying.",
+        "grading_weight": "This is literally on the first page of the syllabus. The {category} category is "
+                          "worth {points} points, {percent}% of the {total}-point course grade.",
+    },
+}
+
+
+def normalize_question(question):
+    """Lower-case, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", question.lower()).strip().rstrip("?!. ")
+
+
+def parse_schedule(text):
+    """{lesson_number: {"title", "date_m", "date_t", "description"}} from the lesson schedule"""
+    lessons = {}
+    for block in re.split(r'={40,}\s*\n', text):
+        info = parse_lesson_header(block)
+        if "lesson" not in info:
+            continue
+        description = DESCRIPTION_RE.search(block)
+        lessons[info["lesson"]] = {
+            "title": info.get("lesson_title", ""),
+            "date_m": info.get("date_m", "an unlisted date"),
+            "date_t": info.get("date_t", "an unlisted date"),
+            "description": " ".join(description.group(1).split()) if description else "",
+        }
+    return lessons
+
+
+def parse_grading(text):
+    """Course total, category weights and graded review dates from cs110_grading.txt"""
+    total = TOTAL_POINTS_RE.search(text)
+    categories = {}
+    for name, points, percent in CATEGORY_RE.findall(text):
+        # "Graded Reviews (GRs)" -> "Graded Reviews"
+        name = re.sub(r"\s*\(.*?\)", "", name).strip()
+        categories[name] = {"points": int(points), "percent": int(percent)}
+
+    graded_reviews = {}
+    for match in GR_BLOCK_RE.finditer(text):
+        body = match.group("body")
+        date_m, date_t = GR_DATE_M_RE.search(body), GR_DATE_T_RE.search(body)
+        if not (date_m and date_t):
+            continue
+        covers = GR_COVERS_RE.search(body)
+        graded_reviews[int(match.group(1))] = {
+            "date_m": date_m.group(1).strip(),
+            "date_t": date_t.group(1).strip(),
+            "covers": covers.group(1).strip().rstrip(".") if covers else "the material before it",
+        }
+
+    return {
+        "total": int(total.group(1)) if total else sum(c["points"] for c in categories.values()),
+        "categories": categories,
+        "graded_reviews": graded_reviews,
+    }
+
+
+class FastPathRouter:
+    """
+    Answers structured intents from the schedule and grading documents
+
+    The parsed index is reloaded when either file's mtime changes, so edits
+    picked up by `build_kb.py --watch` show up here without a restart too.
+    """
+
+    def __init__(self, docs_path):
+        self.docs_path = docs_path
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._lessons = {}
+        self._grading = {"total": 0, "categories": {}, "graded_reviews": {}}
+        self._aliases = {
+            alias: name for name, aliases in CATEGORY_ALIASES.items() for alias in aliases
+        }
+        self.routed = {}
+        self.fallthrough = 0
+
+    def _source_paths(self):
+        return (
+            os.path.join(self.docs_path, LESSON_SCHEDULE_FILE),
+            os.path.join(self.docs_path, GRADING_FILE),
+        )
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def _refresh(self):
+        paths = self._source_paths()
+        mtimes = tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            schedule_path, grading_path = paths
+            self._lessons = parse_schedule(self._read(schedule_path))
+            self._grading = parse_grading(self._read(grading_path))
+            self._mtimes = mtimes
+
+    def classify(self, question):
+        """Return (intent, match) for a structured question, or (None, None)"""
+        normalized = normalize_question(question)
+        for intent, pattern in INTENT_PATTERNS:
+            match = pattern.fullmatch(normalized)
+            if match:
+                return intent, match
+        return None, None
+
+    def _answer(self, intent, match, templates):
+        groups = {k: v for k, v in match.groupdict().items() if v is not None}
+
+        if intent in ("lesson_topic", "lesson_date"):
+            if not self._lessons:
+                return None
+            number = int(groups.get("n") or groups.get("n2") or groups.get("n3"))
+            lesson = self._lessons.get(number)
+            if lesson is None:
+                return templates["lesson_missing"].format(
+                    lesson=number, first=min(self._lessons), last=max(self._lessons)
+                )
+            if intent == "lesson_topic" and not lesson["description"]:
+                return None
+            return templates[intent].format(lesson=number, **lesson)
+
+        if intent == "gr_date":
+            review = self._grading["graded_reviews"].get(int(groups["n"]))
+            if review is None:
+                return None
+            return templates[intent].format(number=int(groups["n"]), **review)
+
+        if intent == "grading_weight":
+            name = self._aliases.get((groups.get("cat") or groups.get("cat2")).strip())
+            category = self._grading["categories"].get(name)
+            if category is None:
+                return None
+            return templates[intent].format(category=name, total=self._grading["total"], **category)
+
+        return None
+
+    def route(self, question, persona="nice"):
+        """
+        Templated answer for a structured question in the persona's voice,
+        or None if the question should go to the agent
+        """
+        intent, match = self.classify(question)
+        answer = None
+        if intent is not None:
+            self._refresh()
+            answer = self._answer(intent, match, TEMPLATES.get(persona, TEMPLATES["nice"]))
+
+        if answer is None:
+            self.fallthrough += 1
+            return None
+        self.routed[intent] = self.routed.get(intent, 0) + 1
+        return answer
+
+    def stats(self):
+        routed = sum(self.routed.values())
+        total = routed + self.fallthrough
+        return {
+            "routed": routed,
+            "fallthrough": self.fallthrough,
+            "by_intent": dict(self.routed),
+            "route_rate": routed / total if total else 0.0,
+        }
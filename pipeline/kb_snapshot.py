@@ -0,0 +1,133 @@
+"""
+Single-file snapshots of a CS110 knowledge base version
+
+A snapshot holds everything needed to stand up the KB on a new machine
+without cs110_docs/, the embedding model or the Chroma directory: chunk
+ids, texts, metadata, embeddings, the embedder id, the lesson index and
+the build manifest's file hashes (so later builds stay incremental).
+
+File layout:
+    CS110KB-SNAPSHOT\\n
+    <header JSON>\\n        format, sha256, sizes, kb_version, embedder, ...
+    <payload JSON bytes>   ids, documents, metadatas, lesson_index, files
+    <float32 vectors>      count x dim, little-endian, row-major
+
+The sha256 in the header covers the payload and vector bytes.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"CS110KB-SNAPSHOT\n"
+SNAPSHOT_FORMAT = 1
+# Header fields read_snapshot() needs to locate and check the data
+SIZE_FIELDS = ("payload_bytes", "vector_bytes", "count", "dim")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is malformed, corrupt or incompatible"""
+
+
+def write_snapshot(path, info, payload, embeddings):
+    """
+    Write a snapshot file atomically and return its header
+
+    info is merged into the header (kb_version, embedder, schema, ...);
+    payload must be JSON-serializable; embeddings is a (count, dim) array.
+    """
+    vectors = np.ascontiguousarray(np.asarray(embeddings, dtype="<f4"))
+    if vectors.size == 0:
+        vectors = vectors.reshape(0, 0)
+    payload_bytes = json.dumps(payload).encode("utf-8")
+    vector_bytes = vectors.tobytes()
+
+    digest = hashlib.sha256()
+    digest.update(payload_bytes)
+    digest.update(vector_bytes)
+
+    header = dict(info)
+    header.update({
+        "format": SNAPSHOT_FORMAT,
+        "sha256": digest.hexdigest(),
+        "payload_bytes": len(payload_bytes),
+        "vector_bytes": len(vector_bytes),
+        "count": int(vectors.shape[0]),
+        "dim": int(vectors.shape[1]) if vectors.shape[0] else 0,
+        "dtype": "float32",
+    })
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(payload_bytes)
+        f.write(vector_bytes)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_snapshot(path):
+    """
+    Read and verify a snapshot file
+
+    Returns (header, payload, embeddings). Raises SnapshotError if the file
+    isn't a snapshot, is a newer format, has a malformed header or fails its
+    checksum.
+    """
+    with open(path, "rb") as f:
+        if f.readline() != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{path} is not a CS110 KB snapshot")
+        try:
+            header = json.loads(f.readline())
+        except ValueError as e:
+            raise SnapshotError(f"Unreadable snapshot header: {e}")
+        if not isinstance(header, dict):
+            raise SnapshotError("Snapshot header is not a JSON object")
+
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise SnapshotError(
+                f"Unsupported snapshot format {header.get('format')} (expected {SNAPSHOT_FORMAT})"
+            )
+        _check_header(header)
+
+        payload_bytes = f.read(header["payload_bytes"])
+        vector_bytes = f.read(header["vector_bytes"])
+
+    if len(payload_bytes) != header["payload_bytes"] or len(vector_bytes) != header["vector_bytes"]:
+        raise SnapshotError("Snapshot is truncated")
+
+    digest = hashlib.sha256()
+    digest.update(payload_bytes)
+    digest.update(vector_bytes)
+    if digest.hexdigest() != header["sha256"]:
+        raise SnapshotError("Snapshot checksum mismatch, the file is corrupt")
+
+    try:
+        payload = json.loads(payload_bytes.decode("utf-8"))
+    except ValueError as e:
+        raise SnapshotError(f"Unreadable snapshot payload: {e}")
+    if not isinstance(payload, dict):
+        raise SnapshotError("Snapshot payload is not a JSON object")
+    embeddings = np.frombuffer(vector_bytes, dtype="<f4").reshape(header["count"], header["dim"])
+    return header, payload, embeddings
+
+
+def _check_header(header):
+    """Raise SnapshotError unless the header's checksum and sizes are usable"""
+    missing = [key for key in ("sha256",) + SIZE_FIELDS if key not in header]
+    if missing:
+        raise SnapshotError(f"Snapshot header is missing {', '.join(missing)}")
+    if not isinstance(header["sha256"], str):
+        raise SnapshotError("Snapshot header has a malformed sha256")
+    for key in SIZE_FIELDS:
+        value = header[key]
+        # bool is an int subclass, but true/false is never a valid size
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise SnapshotError(f"Snapshot header has an invalid {key}: {value!r}")
+    if header["vector_bytes"] != header["count"] * header["dim"] * 4:
+        raise SnapshotError(
+            f"Snapshot header says {header['count']}x{header['dim']} float32 vectors "
+            f"but {header['vector_bytes']} vector bytes"
+        )
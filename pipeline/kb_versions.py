@@ -0,0 +1,204 @@
+"""
+Versioned CS110 knowledge base collections
+
+Every build writes into a fresh shadow collection named
+"cs110_collection__<version>" and then atomically replaces a small pointer
+file that says which version is live. Query tools re-read the pointer when
+it changes, so a rebuild never exposes a deleted or half-populated index.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from pipeline.config import (
+    KB_COLLECTION_NAME,
+    KB_KEEP_VERSIONS,
+    KB_PERSIST_DIR,
+    KB_POINTER_NAME,
+)
+
+
+def new_version_id():
+    """Sortable, unique version id like 20251204T202854-1a2b3c"""
+    return time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def collection_name_for(version):
+    """Chroma collection name that holds a given KB version"""
+    return f"{KB_COLLECTION_NAME}__{version}"
+
+
+def version_dir(version, persist_dir=KB_PERSIST_DIR):
+    """Directory for per-version build artifacts (manifest, indexes, ...)"""
+    return os.path.join(persist_dir, "versions", version)
+
+
+def pointer_path(persist_dir=KB_PERSIST_DIR):
+    return os.path.join(persist_dir, KB_POINTER_NAME)
+
+
+def read_pointer(persist_dir=KB_PERSIST_DIR):
+    """
+    Return the active version record, or None if nothing has been published
+
+    The record looks like:
+        {"version": ..., "collection": ..., "published_at": ...,
+         "history": [older records, newest first]}
+    """
+    try:
+        with open(pointer_path(persist_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_pointer(record, persist_dir):
+    # Write-then-rename is atomic on POSIX, so readers see the old pointer
+    # or the new one, never a partial file
+    path = pointer_path(persist_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def publish_version(version, persist_dir=KB_PERSIST_DIR):
+    """Make a fully built version the live one"""
+    current = read_pointer(persist_dir)
+    history = []
+    if current:
+        history = [_strip_history(current)] + current.get("history", [])
+
+    record = {
+        "version": version,
+        "collection": collection_name_for(version),
+        "published_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "history": history,
+    }
+    _write_pointer(record, persist_dir)
+    return record
+
+
+def rollback(persist_dir=KB_PERSIST_DIR):
+    """
+    Point the KB back at the previous version
+
+    Returns the new active record, or None if there is nothing to roll back to.
+    """
+    current = read_pointer(persist_dir)
+    if not current or not current.get("history"):
+        return None
+
+    previous, *older = current["history"]
+    record = dict(previous)
+    record["history"] = older
+    record["rolled_back_from"] = current["version"]
+    _write_pointer(record, persist_dir)
+    return record
+
+
+def _strip_history(record):
+    return {k: v for k, v in record.items() if k not in ("history", "rolled_back_from")}
+
+
+def garbage_collect(client, persist_dir=KB_PERSIST_DIR, keep=KB_KEEP_VERSIONS):
+    """
+    Drop versioned collections and artifacts that are no longer retained
+
+    The active version and the (keep - 1) most recent previous versions are
+    kept for rollback. Returns the list of deleted version ids.
+    """
+    current = read_pointer(persist_dir)
+    if not current:
+        return []
+
+    retained = [current] + current.get("history", [])[:max(keep - 1, 0)]
+    keep_collections = {r["collection"] for r in retained}
+
+    existing = [c.name if hasattr(c, "name") else c for c in client.list_collections()]
+    prefix = f"{KB_COLLECTION_NAME}__"
+    deleted = []
+
+    for name in existing:
+        # The unversioned collection from older builds is dead once a pointer exists
+        if name == KB_COLLECTION_NAME or (name.startswith(prefix) and name not in keep_collections):
+            client.delete_collection(name)
+            if name.startswith(prefix):
+                version = name[len(prefix):]
+                shutil.rmtree(version_dir(version, persist_dir), ignore_errors=True)
+                deleted.append(version)
+            else:
+                deleted.append(name)
+
+    # Trim history entries that now point at deleted collections
+    if len(current.get("history", [])) > max(keep - 1, 0):
+        current["history"] = current["history"][:max(keep - 1, 0)]
+        _write_pointer(current, persist_dir)
+
+    return deleted
+
+
+class ActiveCollection:
+    """
+    Hands out the currently published Chroma collection
+
+    The pointer file is stat'ed on every get(); it is only re-read, and the
+    collection only re-opened, when the file has been replaced. That keeps
+    the per-query cost to a single os.stat while still picking up new
+    versions without a process restart.
+    """
+
+    def __init__(self, client, persist_dir=KB_PERSIST_DIR):
+        self.client = client
+        self.persist_dir = persist_dir
+        self._stamp = None
+        self._collection = None
+        self.version = None
+        # Held while re-reading the pointer so concurrent queries reopen once
+        self._lock = threading.Lock()
+
+    def _pointer_stamp(self):
+        try:
+            st = os.stat(pointer_path(self.persist_dir))
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def get(self):
+        stamp = self._pointer_stamp()
+        if self._collection is not None and stamp == self._stamp:
+            return self._collection
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self._collection is not None and stamp == self._stamp:
+                return self._collection
+
+            record = read_pointer(self.persist_dir) if stamp else None
+            if record:
+                collection = self.client.get_collection(record["collection"])
+                version = record["version"]
+            else:
+                # Knowledge base built before versioning was introduced
+                collection = self.client.get_collection(KB_COLLECTION_NAME)
+                version = None
+
+            if self._collection is not None and version != self.version:
+                print(f"🔄 Knowledge base switched to version {version}")
+
+            self._collection = collection
+            self._stamp = stamp
+            self.version = version
+            return collection
+
+    def artifact_path(self, name):
+        """Path of a per-version artifact for the active version, or None"""
+        self.get()
+        if self.version is None:
+            return None
+        return os.path.join(version_dir(self.version, self.persist_dir), name)
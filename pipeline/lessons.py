@@ -0,0 +1,56 @@
+"""
+Helpers for pulling structured lesson information out of the CS110
+lesson schedule / syllabus text
+"""
+import json
+import re
+
+# Lesson blocks are separated by a row of '=' followed by "Lesson N: Title"
+LESSON_BOUNDARY_PATTERN = r'={40,}\s*\nLesson \d+:'
+
+LESSON_HEADER_RE = re.compile(r'^Lesson (\d+):[ \t]*(.*)$', re.MULTILINE)
+DATE_M_RE = re.compile(r'^Date \(M-section\):[ \t]*(.+)$', re.MULTILINE)
+DATE_T_RE = re.compile(r'^Date \(T-section\):[ \t]*(.+)$', re.MULTILINE)
+
+
+def parse_lesson_header(lesson_text):
+    """
+    Extract lesson number, title and section dates from one lesson block
+
+    Returns a dict with any of the keys "lesson", "lesson_title", "date_m"
+    and "date_t" that could be found. Keys are left out rather than set to
+    None because Chroma metadata values can't be null.
+    """
+    info = {}
+
+    header = LESSON_HEADER_RE.search(lesson_text)
+    if header:
+        info["lesson"] = int(header.group(1))
+        title = header.group(2).strip()
+        if title:
+            info["lesson_title"] = title
+
+    date_m = DATE_M_RE.search(lesson_text)
+    if date_m:
+        info["date_m"] = date_m.group(1).strip()
+
+    date_t = DATE_T_RE.search(lesson_text)
+    if date_t:
+        info["date_t"] = date_t.group(1).strip()
+
+    return info
+
+
+def load_lesson_index(path):
+    """
+    Load a lesson index written by build_kb
+
+    Returns {lesson_number: {"lesson_title", "date_m", "date_t", "chunks"}}
+    with int keys, or None if the file is missing or unreadable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {int(number): entry for number, entry in raw.items()}
@@ -0,0 +1,180 @@
+"""
+Process-wide registry of heavyweight shared resources
+
+Loading a SentenceTransformer model or opening a Chroma PersistentClient is
+expensive in both time and resident memory, so every tool, agent and the KB
+builder should get them from here instead of constructing their own. Each
+resource is created lazily on first use and reused afterwards, keyed by
+model name or persist directory.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.config import (
+    EMBEDDING_MODEL,
+    KB_PERSIST_DIR,
+    LLM_CACHE_AGENT_TTL_S,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_PATH,
+    QUERY_EMBED_CACHE_PATH,
+    QUERY_EMBED_CACHE_SIZE,
+    QUERY_POOL_WORKERS,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL_S,
+)
+
+_lock = threading.RLock()
+_embedders = {}
+_clients = {}
+_active_collections = {}
+_query_caches = {}
+_result_cache = None
+_query_executor = None
+_llm_response_cache = None
+
+
+def get_embedder(model_name=EMBEDDING_MODEL):
+    """Shared SentenceTransformerEmbedder for a model name"""
+    with _lock:
+        embedder = _embedders.get(model_name)
+        if embedder is None:
+            from fairlib import SentenceTransformerEmbedder
+
+            embedder = SentenceTransformerEmbedder(model_name=model_name)
+            # Remember which model produced the vectors, for cache keys etc.
+            embedder.model_name = model_name
+            _embedders[model_name] = embedder
+        return embedder
+
+
+def get_chroma_client(persist_dir=KB_PERSIST_DIR):
+    """Shared chromadb.PersistentClient for a persist directory"""
+    key = os.path.abspath(persist_dir)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import chromadb
+
+            os.makedirs(key, exist_ok=True)
+            client = chromadb.PersistentClient(path=key)
+            _clients[key] = client
+        return client
+
+
+def get_active_collection(persist_dir=KB_PERSIST_DIR):
+    """Shared ActiveCollection (versioned KB pointer) for a persist directory"""
+    from pipeline.kb_versions import ActiveCollection
+
+    key = os.path.abspath(persist_dir)
+    with _lock:
+        active = _active_collections.get(key)
+        if active is None:
+            active = ActiveCollection(get_chroma_client(key), key)
+            _active_collections[key] = active
+        return active
+
+
+def get_query_embedding_cache(model_name=EMBEDDING_MODEL):
+    """Shared QueryEmbeddingCache wrapping the shared embedder for a model"""
+    from pipeline.caches import QueryEmbeddingCache
+
+    with _lock:
+        cache = _query_caches.get(model_name)
+        if cache is None:
+            cache = QueryEmbeddingCache(
+                get_embedder(model_name),
+                model_name,
+                maxsize=QUERY_EMBED_CACHE_SIZE,
+                disk_path=QUERY_EMBED_CACHE_PATH,
+            )
+            _query_caches[model_name] = cache
+        return cache
+
+
+def get_result_cache():
+    """Shared TTL/LRU cache of formatted knowledge base query results"""
+    global _result_cache
+    from pipeline.caches import TTLCache
+
+    with _lock:
+        if _result_cache is None:
+            _result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S)
+        return _result_cache
+
+
+def get_query_executor():
+    """
+    Shared bounded thread pool for blocking retrieval work
+
+    Threads rather than processes: the SentenceTransformer forward pass and
+    Chroma's search release the GIL, and worker processes would each need
+    their own copy of the model.
+    """
+    global _query_executor
+    with _lock:
+        if _query_executor is None:
+            _query_executor = ThreadPoolExecutor(
+                max_workers=QUERY_POOL_WORKERS,
+                thread_name_prefix="cs110-query",
+            )
+        return _query_executor
+
+
+def get_llm_response_cache():
+    """Shared persistent LLM response cache, or None if it is disabled"""
+    global _llm_response_cache
+    from pipeline.caches import LLMResponseCache
+
+    if not LLM_CACHE_PATH:
+        return None
+    with _lock:
+        if _llm_response_cache is None:
+            _llm_response_cache = LLMResponseCache(
+                LLM_CACHE_PATH,
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+            )
+        return _llm_response_cache
+
+
+def get_chat_model(model_name, agent=None):
+    """
+    OpenAIAdapter for an agent, behind the shared LLM response cache if
+    LLM_CACHE_AGENT_TTL_S enables caching for that agent
+    """
+    from fairlib import OpenAIAdapter
+
+    adapter = OpenAIAdapter(model_name=model_name)
+    ttl = LLM_CACHE_AGENT_TTL_S.get(agent, 0)
+    cache = get_llm_response_cache() if ttl > 0 else None
+    if cache is None:
+        return adapter
+
+    from pipeline.caches import CachingChatModel
+    return CachingChatModel(adapter, cache, ttl)
+
+
+def loaded_resources():
+    """Names of what is currently loaded, for diagnostics"""
+    with _lock:
+        return {
+            "embedders": sorted(_embedders),
+            "chroma_clients": sorted(_clients),
+        }
+
+
+def reset_shared_resources():
+    """Forget every cached resource (tests and benchmarks only)"""
+    global _result_cache, _query_executor, _llm_response_cache
+    with _lock:
+        if _llm_response_cache is not None:
+            _llm_response_cache.close()
+        _llm_response_cache = None
+        if _query_executor is not None:
+            _query_executor.shutdown(wait=False)
+        _query_executor = None
+        _result_cache = None
+        _embedders.clear()
+        _clients.clear()
+        _active_collections.clear()
+        _query_caches.clear()
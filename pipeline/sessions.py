@@ -0,0 +1,344 @@
+"""
+Per-session conversation memory for /api/ask
+
+Each (session id, persona) pair gets its own SessionMemory, so one user's
+conversation never leaks into another's prompt. Memories are windowed to
+the last max_turns user turns and roughly max_tokens tokens, and the
+SessionStore evicts sessions that have been idle for longer than the TTL
+or that fall off the end of its LRU order.
+
+SessionCompactor keeps long conversations well under that hard window: once
+a session passes its token budget, older turns (including their bulky
+cs110_query observations) are folded into a short rolling summary in a
+background task, after the answer has been sent.
+"""
+import asyncio
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from fairlib import Message, WorkingMemory
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+class SessionMemory(WorkingMemory):
+    """
+    WorkingMemory holding a sliding window of whole conversation turns
+
+    A turn starts at a user message and includes the agent's thoughts,
+    tool observations and final answer. When the window is over either
+    limit the oldest complete turns are dropped; the turn in progress is
+    always kept so the agent never loses its own observations mid-answer.
+    """
+
+    def __init__(self, max_turns=10, max_tokens=3000):
+        super().__init__(max_size=0)
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.tokens = 0
+        self.nbytes = 0
+        self.dropped_turns = 0
+        # Rolling summary of turns folded away by SessionCompactor
+        self.summary = ""
+
+    def _turn_starts(self):
+        return [i for i, m in enumerate(self.history) if m.role == "user"]
+
+    def _trim(self):
+        starts = self._turn_starts()
+        while len(starts) > 1 and (len(starts) > self.max_turns or self.tokens > self.max_tokens):
+            # Drop everything before the second turn start
+            for message in self.history[:starts[1]]:
+                self.tokens -= estimate_tokens(str(message.content))
+                self.nbytes -= len(str(message.content).encode("utf-8"))
+            self.history = self.history[starts[1]:]
+            self.dropped_turns += 1
+            starts = self._turn_starts()
+
+    def add_message(self, message):
+        self.history.append(message)
+        self.tokens += estimate_tokens(str(message.content))
+        self.nbytes += len(str(message.content).encode("utf-8"))
+        self._trim()
+
+    def add_turn(self, question, answer):
+        """Record a question answered outside the agent (e.g. the fast path)"""
+        self.add_message(Message(role="user", content=question))
+        self.add_message(Message(role="assistant", content=answer))
+
+    def get_history(self):
+        if self.summary:
+            return [Message(role="system", content=f"Summary of the earlier conversation: {self.summary}")] + self.history
+        return self.history
+
+    def compactable(self, keep_turns):
+        """Messages of every complete turn except the last keep_turns"""
+        starts = self._turn_starts()
+        if len(starts) <= keep_turns:
+            return []
+        return self.history[:starts[-keep_turns] if keep_turns else len(self.history)]
+
+    def fold(self, messages, summary):
+        """Replace `messages` (a prefix of the history) with a new rolling summary"""
+        folded = {id(m) for m in messages}
+        # The hard window may already have dropped some of them
+        keep_from = 0
+        while keep_from < len(self.history) and id(self.history[keep_from]) in folded:
+            keep_from += 1
+        for message in self.history[:keep_from]:
+            self.tokens -= estimate_tokens(str(message.content))
+            self.nbytes -= len(str(message.content).encode("utf-8"))
+        self.history = self.history[keep_from:]
+
+        if self.summary:
+            self.tokens -= estimate_tokens(self.summary)
+            self.nbytes -= len(self.summary.encode("utf-8"))
+        self.summary = summary
+        self.tokens += estimate_tokens(summary)
+        self.nbytes += len(summary.encode("utf-8"))
+
+    def clear(self):
+        self.history = []
+        self.summary = ""
+        self.tokens = 0
+        self.nbytes = 0
+
+
+class Session:
+    """One user's memory for one persona, plus a lock serialising its requests"""
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.turns = 0
+        self.compacting = False
+        # Two overlapping requests in one session would interleave their
+        # messages, so requests in a session run one at a time
+        self.lock = asyncio.Lock()
+
+
+class SessionStore:
+    """
+    Bounded LRU/TTL map of (session id, persona) -> Session
+    """
+
+    def __init__(self, max_sessions=1000, ttl=1800, max_turns=10, max_tokens=3000):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def _expire(self, now):
+        # Oldest-first order means we can stop at the first live session
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.ttl:
+                break
+            del self._sessions[key]
+            self.ttl_evictions += 1
+
+    def get(self, session_id, persona):
+        """Session for (session_id, persona), created on first use"""
+        key = (session_id, persona)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(key)
+            if session is None:
+                session = Session(SessionMemory(self.max_turns, self.max_tokens))
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.lru_evictions += 1
+            self._sessions.move_to_end(key)
+            session.last_used = now
+            return session
+
+    def drop(self, session_id):
+        """Forget every persona's memory for a session"""
+        with self._lock:
+            for key in [k for k in self._sessions if k[0] == session_id]:
+                del self._sessions[key]
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        """Memory gauge: live sessions, messages and approximate prompt size"""
+        with self._lock:
+            self._expire(time.monotonic())
+            memories = [s.memory for s in self._sessions.values()]
+            return {
+                "sessions": len(memories),
+                "max_sessions": self.max_sessions,
+                "messages": sum(len(m.history) for m in memories),
+                "tokens": sum(m.tokens for m in memories),
+                "max_tokens_per_session": self.max_tokens,
+                "content_bytes": sum(m.nbytes for m in memories),
+                "largest_session_tokens": max((m.tokens for m in memories), default=0),
+                "lru_evictions": self.lru_evictions,
+                "ttl_evictions": self.ttl_evictions,
+                "ttl_s": self.ttl,
+            }
+
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a CS110 student and "
+    "the course's virtual instructor. Merge the previous summary with the new turns "
+    "into one short paragraph. Keep facts the student may refer back to: lesson "
+    "numbers, dates, topics, grading details and what the student is working on. "
+    "Drop greetings, tool mechanics and anything repeated. Reply with the summary only."
+)
+
+
+def render_transcript(messages):
+    """Condense agent turns into plain text for summarising"""
+    lines = []
+    for message in messages:
+        content = " ".join(str(message.content).split())
+        if message.role == "user":
+            lines.append(f"Student: {content}")
+        elif message.role == "system" and content.startswith("Observation:"):
+            # Stale retrieval output; only the gist is worth keeping
+            lines.append(f"(looked up) {content[len('Observation:'):].strip()[:300]}")
+        elif message.role == "assistant":
+            try:
+                step = json.loads(message.content)
+            except (TypeError, ValueError):
+                step = None
+            if isinstance(step, dict) and "action" in step:
+                continue
+            lines.append(f"Instructor: {content}")
+    return "\n".join(lines)
+
+
+def extractive_summary(previous, messages, max_chars):
+    """LLM-free fallback: each folded question with the start of its answer"""
+    parts = [previous] if previous else []
+    question = None
+    for message in messages:
+        content = " ".join(str(message.content).split())
+        if message.role == "user":
+            question = content
+        elif message.role == "assistant" and question is not None and not content.startswith("{"):
+            answer = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+            parts.append(f"Asked: {question[:120]} Answer: {answer[:160]}")
+            question = None
+    summary = " ".join(parts)
+    # Keep the most recent material when over budget
+    return summary[-max_chars:]
+
+
+class SessionCompactor:
+    """
+    Folds older turns of a session into a rolling summary, off the request path
+
+    schedule() is called after a request has been answered. If the session
+    is over budget_tokens it starts a background task that summarises every
+    turn except the last keep_turns with `llm` (or extractively if llm is
+    None or fails), then swaps them for the summary under the session lock.
+    """
+
+    def __init__(self, llm=None, budget_tokens=1500, keep_turns=2, summary_tokens=200):
+        self.llm = llm
+        self.budget_tokens = budget_tokens
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self._tasks = set()
+        self.compactions = 0
+        self.failures = 0
+        self.tokens_folded = 0
+
+    def needs_compaction(self, memory):
+        return memory.tokens > self.budget_tokens and bool(memory.compactable(self.keep_turns))
+
+    def schedule(self, session):
+        """Start compacting session in the background if it is over budget"""
+        if session.compacting or not self.needs_compaction(session.memory):
+            return None
+        session.compacting = True
+        task = asyncio.get_running_loop().create_task(self._run(session))
+        # The event loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, session):
+        try:
+            await self.compact(session)
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Session compaction failed: {e}")
+        finally:
+            session.compacting = False
+
+    async def _summarize(self, previous, messages):
+        max_chars = self.summary_tokens * 4
+        if self.llm is not None:
+            prompt = render_transcript(messages)
+            if previous:
+                prompt = f"Previous summary: {previous}\n\nNew turns:\n{prompt}"
+            try:
+                response = await self.llm.ainvoke([
+                    Message(role="system", content=SUMMARY_PROMPT),
+                    Message(role="user", content=prompt),
+                ])
+                summary = " ".join(str(response.content).split())
+                if summary:
+                    return summary[:max_chars]
+            except Exception as e:
+                print(f"⚠️ Summary LLM call failed, using extractive summary: {e}")
+        return extractive_summary(previous, messages, max_chars)
+
+    async def compact(self, session):
+        memory = session.memory
+        messages = memory.compactable(self.keep_turns)
+        if not messages:
+            return
+        before = memory.tokens
+        # The LLM call runs without the lock so the session can keep answering
+        summary = await self._summarize(memory.summary, messages)
+        async with session.lock:
+            memory.fold(messages, summary)
+        self.compactions += 1
+        self.tokens_folded += max(0, before - memory.tokens)
+
+    async def drain(self):
+        """Wait for in-flight compactions (benchmarks and shutdown)"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self):
+        return {
+            "compactions": self.compactions,
+            "compaction_failures": self.failures,
+            "tokens_folded": self.tokens_folded,
+            "compactions_running": len(self._tasks),
+            "compact_at_tokens": self.budget_tokens,
+        }
+
+
+def with_memory(agent, memory):
+    """
+    Shallow copy of an agent that uses `memory` for this conversation
+
+    The copy shares the agent's LLM adapter, planner and tool executor,
+    none of which hold conversation state, so it is cheap to make per
+    request.
+    """
+    bound = copy.copy(agent)
+    bound.memory = memory
+    bound.stateless = False
+    return bound
@@ -0,0 +1,512 @@
+"""
+Alternative vector index backends for the CS110 knowledge base
+
+Chroma stays the system of record: build_kb writes every version into a
+Chroma collection and then exports the same rows into the NumPy,
+quantized and memory-mapped formats and, when faiss is installed, a FAISS
+index. CS110KnowledgeQueryTool picks a backend with
+VECTOR_BACKEND in pipeline/config.py.
+
+Every backend's query() returns the same flat shape:
+    {"ids": [...], "documents": [...], "metadatas": [...], "scores": [...]}
+"""
+import json
+import math
+import mmap
+import os
+
+import numpy as np
+
+# FAISS is optional: only needed when building or serving the "faiss" backend
+try:
+    import faiss
+
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _matches(metadata, where):
+    return all(metadata.get(key) == value for key, value in where.items())
+
+
+class NumpyVectorIndex:
+    """
+    Exact cosine search over one contiguous matrix of normalized embeddings
+
+    For a corpus of a few hundred chunks a single matrix-vector product plus
+    argpartition is far cheaper than Chroma's SQLite + HNSW round trip, and
+    the whole index is one small file.
+    """
+
+    def __init__(self, vectors, ids, documents, metadatas):
+        self.vectors = vectors
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self._filter_cache = {}
+
+    @classmethod
+    def from_rows(cls, ids, embeddings, documents, metadatas, dtype="float32"):
+        matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        vectors = np.ascontiguousarray(matrix.astype(dtype))
+        return cls(vectors, list(ids), list(documents), list(metadatas))
+
+    def save(self, path):
+        """Write vectors and chunk payloads into a single .npz archive"""
+        payload = json.dumps({
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }).encode("utf-8")
+        with open(path, "wb") as f:
+            np.savez(f, vectors=self.vectors, payload=np.frombuffer(payload, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save(), or None if it isn't there"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                vectors = np.ascontiguousarray(data["vectors"])
+                payload = json.loads(data["payload"].tobytes().decode("utf-8"))
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(vectors, payload["ids"], payload["documents"], payload["metadatas"])
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes
+
+    def _candidate_rows(self, where):
+        """Row indices matching an equality filter, cached per filter"""
+        key = tuple(sorted(where.items()))
+        rows = self._filter_cache.get(key)
+        if rows is None:
+            rows = np.array(
+                [i for i, meta in enumerate(self.metadatas) if _matches(meta, where)],
+                dtype=np.int64
+            )
+            self._filter_cache[key] = rows
+        return rows
+
+    def query(self, embedding, k=3, where=None):
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if where:
+            rows = self._candidate_rows(where)
+            scores = self.vectors[rows] @ query.astype(self.vectors.dtype)
+        else:
+            rows = None
+            scores = self.vectors @ query.astype(self.vectors.dtype)
+
+        scores = scores.astype(np.float32)
+        k = min(k, len(scores))
+        if k == 0:
+            return {"ids": [], "documents": [], "metadatas": [], "scores": []}
+
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        picked = rows[top] if rows is not None else top
+
+        return {
+            "ids": [self.ids[i] for i in picked],
+            "documents": [self.documents[i] for i in picked],
+            "metadatas": [self.metadatas[i] for i in picked],
+            "scores": scores[top].tolist(),
+        }
+
+
+class QuantizedVectorIndex(NumpyVectorIndex):
+    """
+    Candidate search over int8 or float16 codes, re-scored at full precision
+
+    int8 codes use a symmetric per-dimension scale (x ~= code * scale), so a
+    query is scored against them as codes @ (scale * q). The best
+    k * rescore_factor candidates are then re-scored with the float32 rows
+    of full_vectors, usually the memory-mapped export, so only those rows
+    are ever paged in.
+    """
+
+    # Rows converted to float32 at a time while scoring codes
+    BLOCK_ROWS = 4096
+
+    def __init__(self, vectors, ids, documents, metadatas, scales=None,
+                 full_vectors=None, rescore_factor=4):
+        super().__init__(vectors, ids, documents, metadatas)
+        self.scales = scales
+        self.full_vectors = full_vectors
+        self.rescore_factor = rescore_factor
+
+    @classmethod
+    def from_rows(cls, ids, embeddings, documents, metadatas, dtype="int8"):
+        matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        if dtype == "int8":
+            scales = np.abs(matrix).max(axis=0) / 127.0 if len(matrix) else np.ones(0, dtype=np.float32)
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+            scales = scales.astype(np.float32)
+        elif dtype == "float16":
+            codes = matrix.astype(np.float16)
+            scales = None
+        else:
+            raise ValueError(f"Unknown quantization dtype: {dtype}")
+        return cls(np.ascontiguousarray(codes), list(ids), list(documents), list(metadatas), scales=scales)
+
+    def save(self, path):
+        payload = json.dumps({
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }).encode("utf-8")
+        arrays = {"codes": self.vectors, "payload": np.frombuffer(payload, dtype=np.uint8)}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path, full_vectors_path=None, rescore_factor=4):
+        """
+        Load an index written by save(), or None if it isn't there
+
+        full_vectors_path is an .npy of the same rows in float32 (the mmap
+        export); without it results are ranked on the codes alone.
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                codes = np.ascontiguousarray(data["codes"])
+                scales = data["scales"] if "scales" in data.files else None
+                payload = json.loads(data["payload"].tobytes().decode("utf-8"))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        full_vectors = None
+        if full_vectors_path:
+            try:
+                full_vectors = np.load(full_vectors_path, mmap_mode="r")
+            except (OSError, ValueError):
+                full_vectors = None
+            if full_vectors is not None and full_vectors.shape[0] != codes.shape[0]:
+                full_vectors = None
+
+        return cls(codes, payload["ids"], payload["documents"], payload["metadatas"],
+                   scales=scales, full_vectors=full_vectors, rescore_factor=rescore_factor)
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def close(self):
+        """Drop the memory-mapped full-precision rows (unmapped once unreferenced)"""
+        self.full_vectors = None
+
+    def _approx_scores(self, query, rows):
+        if self.scales is not None:
+            query = query * self.scales
+        codes = self.vectors if rows is None else self.vectors[rows]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.BLOCK_ROWS):
+            block = codes[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[start:start + self.BLOCK_ROWS] = block @ query
+        return scores
+
+    def query(self, embedding, k=3, where=None, rescore=True):
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        rows = self._candidate_rows(where) if where else None
+        scores = self._approx_scores(query, rows)
+        k = min(k, len(scores))
+        if k == 0:
+            return {"ids": [], "documents": [], "metadatas": [], "scores": []}
+
+        use_full = rescore and self.full_vectors is not None
+        n_candidates = min(len(scores), k * self.rescore_factor) if use_full else k
+        if n_candidates < len(scores):
+            top = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        else:
+            top = np.arange(len(scores))
+        picked = rows[top] if rows is not None else top
+
+        if use_full:
+            # Sorted row order keeps the mmap reads sequential
+            picked = np.sort(picked)
+            scores = np.asarray(self.full_vectors[picked], dtype=np.float32) @ query
+            best = np.argsort(-scores)[:k]
+        else:
+            scores = scores[top]
+            best = np.argsort(-scores)[:k]
+
+        picked = picked[best]
+        return {
+            "ids": [self.ids[i] for i in picked],
+            "documents": [self.documents[i] for i in picked],
+            "metadatas": [self.metadatas[i] for i in picked],
+            "scores": scores[best].tolist(),
+        }
+
+
+class MappedTexts:
+    """
+    Read-only sequence of strings stored back to back in one file
+
+    The file is opened with mmap, so texts are only decoded when indexed
+    and the bytes live in the OS page cache rather than the Python heap.
+    """
+
+    def __init__(self, path, offsets):
+        self.offsets = offsets
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap can't map an empty file
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def write(path, texts):
+        """Write texts to path and return the int64 offsets array (len(texts) + 1)"""
+        offsets = [0]
+        with open(path, "wb") as f:
+            for text in texts:
+                data = text.encode("utf-8")
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+        return np.asarray(offsets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self._buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+
+class MmapVectorIndex(NumpyVectorIndex):
+    """
+    NumpyVectorIndex whose matrix and chunk texts are memory-mapped files
+
+    Every uvicorn worker that opens the same KB version maps the same
+    files, so they share one physical copy of the index through the page
+    cache instead of each holding a private one. Only ids and metadata
+    (small, needed for filters) are loaded into the heap.
+
+    On-disk layout, one directory per KB version:
+        vectors.npy   normalized float32 matrix
+        texts.bin     UTF-8 chunk texts back to back
+        offsets.npy   int64 start offsets into texts.bin (n + 1 entries)
+        chunks.json   {"ids": [...], "metadatas": [...]}
+    """
+
+    @staticmethod
+    def write(path, ids, embeddings, documents, metadatas):
+        os.makedirs(path, exist_ok=True)
+        matrix = np.ascontiguousarray(_normalize_rows(np.asarray(embeddings, dtype=np.float32)))
+        np.save(os.path.join(path, "vectors.npy"), matrix)
+        offsets = MappedTexts.write(os.path.join(path, "texts.bin"), documents)
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        with open(os.path.join(path, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": list(ids), "metadatas": list(metadatas)}, f)
+        return matrix.nbytes + int(offsets[-1])
+
+    @classmethod
+    def load(cls, path):
+        """Map an index written by write(), or None if it isn't there"""
+        try:
+            vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+            offsets = np.load(os.path.join(path, "offsets.npy"))
+            documents = MappedTexts(os.path.join(path, "texts.bin"), offsets)
+            with open(os.path.join(path, "chunks.json"), "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(vectors, payload["ids"], documents, payload["metadatas"])
+
+    def close(self):
+        """Unmap the index files; the index can't be queried afterwards"""
+        self.documents.close()
+        # An np.memmap can't be closed while views of it exist; it is
+        # unmapped once the last reference is gone
+        self.vectors = None
+
+
+class FaissVectorIndex:
+    """
+    FAISS inner-product index over normalized embeddings (i.e. cosine)
+
+    index_type selects the structure:
+        "flat" - exact search, best for a single course
+        "hnsw" - graph index; hnsw_m / ef_search trade memory and speed for recall
+        "ivf"  - inverted lists; nlist / nprobe trade speed for recall
+
+    Chunk ids, texts and metadata are kept in a JSON sidecar next to the
+    FAISS index file. Metadata filters use FAISS's IDSelector so they run
+    inside the search instead of over-fetching.
+    """
+
+    def __init__(self, index, ids, documents, metadatas, index_type="flat",
+                 ef_search=64, nprobe=8):
+        self.index = index
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.index_type = index_type
+        self.ef_search = ef_search
+        self.nprobe = nprobe
+        self._filter_cache = {}
+        self._apply_search_params()
+
+    @staticmethod
+    def _require_faiss():
+        if not FAISS_AVAILABLE:
+            raise ImportError(
+                "The 'faiss' backend needs faiss installed. "
+                "Please install it with `pip install faiss-cpu`."
+            )
+
+    @classmethod
+    def from_rows(cls, ids, embeddings, documents, metadatas, index_type="flat",
+                  hnsw_m=32, ef_search=64, nlist=64, nprobe=8):
+        cls._require_faiss()
+        matrix = np.ascontiguousarray(_normalize_rows(np.asarray(embeddings, dtype=np.float32)))
+        n, dim = matrix.shape
+
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        elif index_type == "ivf":
+            # IVF needs enough training points per list; shrink nlist for small corpora
+            nlist = max(1, min(nlist, int(math.sqrt(n))))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(matrix)
+        elif index_type == "flat":
+            index = faiss.IndexFlatIP(dim)
+        else:
+            raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+        index.add(matrix)
+        return cls(index, list(ids), list(documents), list(metadatas),
+                   index_type=index_type, ef_search=ef_search, nprobe=nprobe)
+
+    def _apply_search_params(self):
+        if self.index_type == "hnsw":
+            self.index.hnsw.efSearch = self.ef_search
+        elif self.index_type == "ivf":
+            self.index.nprobe = self.nprobe
+
+    def save(self, index_path, payload_path):
+        faiss.write_index(self.index, index_path)
+        with open(payload_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "index_type": self.index_type,
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+            }, f)
+
+    @classmethod
+    def load(cls, index_path, payload_path, ef_search=64, nprobe=8):
+        """Load an index written by save(), or None if it isn't there"""
+        if not FAISS_AVAILABLE:
+            return None
+        try:
+            index = faiss.read_index(index_path)
+            with open(payload_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, RuntimeError, ValueError):
+            return None
+        return cls(index, payload["ids"], payload["documents"], payload["metadatas"],
+                   index_type=payload.get("index_type", "flat"),
+                   ef_search=ef_search, nprobe=nprobe)
+
+    @property
+    def nbytes(self):
+        # Serialized size is a good proxy for the resident index size
+        return faiss.serialize_index(self.index).nbytes
+
+    def _search_params(self, where):
+        key = tuple(sorted(where.items()))
+        rows = self._filter_cache.get(key)
+        if rows is None:
+            rows = np.array(
+                [i for i, meta in enumerate(self.metadatas) if _matches(meta, where)],
+                dtype=np.int64
+            )
+            self._filter_cache[key] = rows
+
+        selector = faiss.IDSelectorBatch(rows)
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search), len(rows)
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe), len(rows)
+        return faiss.SearchParameters(sel=selector), len(rows)
+
+    def query(self, embedding, k=3, where=None):
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if where:
+            params, available = self._search_params(where)
+            k = min(k, available)
+        else:
+            params = None
+            k = min(k, self.index.ntotal)
+
+        if k == 0:
+            return {"ids": [], "documents": [], "metadatas": [], "scores": []}
+
+        if params is not None:
+            scores, rows = self.index.search(query, k, params=params)
+        else:
+            scores, rows = self.index.search(query, k)
+
+        # FAISS pads with -1 when fewer than k results are reachable
+        hits = [(int(i), float(sc)) for i, sc in zip(rows[0], scores[0]) if i >= 0]
+        return {
+            "ids": [self.ids[i] for i, _ in hits],
+            "documents": [self.documents[i] for i, _ in hits],
+            "metadatas": [self.metadatas[i] for i, _ in hits],
+            "scores": [sc for _, sc in hits],
+        }
+
+
+def chroma_query(collection, embedding, k=3, where=None):
+    """Run a Chroma query and flatten the result to the common backend shape"""
+    kwargs = {"where": where} if where else {}
+    results = collection.query(
+        query_embeddings=[embedding],
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+        **kwargs
+    )
+
+    def first(field):
+        value = results.get(field) if results else None
+        return list(value[0]) if value else []
+
+    return {
+        "ids": first("ids"),
+        "documents": first("documents"),
+        "metadatas": first("metadatas"),
+        # Chroma returns distances; negate so higher is better like the other backends
+        "scores": [-d for d in first("distances")],
+    }
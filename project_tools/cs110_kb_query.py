@@ -1,12 +1,48 @@
 """
 CS110 Knowledge Base Query Tool with keyword filtering
 """
-from fairlib import AbstractTool
-from fairlib import SentenceTransformerEmbedder
-import chromadb
+import asyncio
 import os
 import re
-from pipeline.config import project_path
+import threading
+
+from fairlib import AbstractTool
+
+from pipeline.bm25 import load_bm25_index, reciprocal_rank_fusion
+from pipeline.caches import normalize_query
+from pipeline.config import (
+    BM25_INDEX_NAME,
+    EMBEDDING_MODEL,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_INDEX_NAME,
+    FAISS_IVF_NPROBE,
+    FAISS_PAYLOAD_NAME,
+    HYBRID_CANDIDATES,
+    LESSON_INDEX_NAME,
+    MMAP_INDEX_NAME,
+    NUMPY_INDEX_NAME,
+    QUANTIZED_INDEX_NAME,
+    QUANTIZED_RESCORE_FACTOR,
+    RRF_K,
+    VECTOR_BACKEND,
+    project_path,
+)
+from pipeline.lessons import load_lesson_index
+from pipeline.resources import (
+    get_active_collection,
+    get_chroma_client,
+    get_embedder,
+    get_query_embedding_cache,
+    get_query_executor,
+    get_result_cache,
+)
+from pipeline.vector_backends import (
+    FaissVectorIndex,
+    MmapVectorIndex,
+    NumpyVectorIndex,
+    QuantizedVectorIndex,
+    chroma_query,
+)
 
 
 class CS110KnowledgeQueryTool(AbstractTool):
@@ -17,13 +53,147 @@ class CS110KnowledgeQueryTool(AbstractTool):
         "For specific lessons, use format like 'Lesson 7' or 'lesson 2'."
     )
 
+    # Number of chunks returned to the agent per query
+    top_k = 3
+
+    # Answer "Lesson N" queries from the in-memory lesson index built by
+    # build_kb, with no embedding and no Chroma call
+    use_lesson_index = True
+
+    # Reuse formatted results for repeated queries against the same KB version
+    use_result_cache = True
+
+    # Fuse BM25 keyword hits with dense hits for non-lesson queries
+    use_hybrid = True
+
+    # "chroma", "numpy", "mmap", "quantized" or "faiss"; see VECTOR_BACKEND in pipeline/config.py
+    vector_backend = VECTOR_BACKEND
+
     def __init__(self):
         persist_dir = project_path("cs110_collection")
-        os.makedirs(persist_dir, exist_ok=True)
         
-        self.client = chromadb.PersistentClient(path=persist_dir)
-        self.collection = self.client.get_collection("cs110_collection")
-        self.embedder = SentenceTransformerEmbedder()
+        # Model and client are shared by every tool in the process
+        self.client = get_chroma_client(persist_dir)
+        # Follows the active-version pointer so rebuilds are picked up live
+        self.kb = get_active_collection(persist_dir)
+        self.kb.get()
+        self.embedder = get_embedder(EMBEDDING_MODEL)
+        # Students repeat the same questions, so query vectors are cached
+        self.query_cache = get_query_embedding_cache(EMBEDDING_MODEL)
+        self.result_cache = get_result_cache()
+
+        # Per-version artifacts loaded from disk: name -> (path, object)
+        self._artifacts = {}
+        # Query threads share the tool, so only one of them loads an artifact
+        self._artifacts_lock = threading.Lock()
+        # Replaced memory-mapped indexes, closed once no search is using them
+        self._retired = []
+        self._active_searches = 0
+
+    @property
+    def collection(self):
+        """The currently published knowledge base collection"""
+        return self.kb.get()
+
+    def cache_stats(self):
+        """Hit/miss counters for the shared query embedding and result caches"""
+        return {
+            "query_embeddings": self.query_cache.stats(),
+            "results": self.result_cache.stats(),
+        }
+
+    def _get_artifact(self, name, loader):
+        """Load a per-version artifact for the active KB, reloading when it changes"""
+        path = self.kb.artifact_path(name)
+        with self._artifacts_lock:
+            cached_path, obj = self._artifacts.get(name, (None, None))
+            if path != cached_path or name not in self._artifacts:
+                if hasattr(obj, "close"):
+                    self._retired.append(obj)
+                obj = loader(path) if path else None
+                self._artifacts[name] = (path, obj)
+            return obj
+
+    def _end_search(self):
+        """Close retired artifacts once the last in-flight vector search is done"""
+        with self._artifacts_lock:
+            self._active_searches -= 1
+            retired = []
+            if self._active_searches == 0:
+                retired, self._retired = self._retired, []
+        for obj in retired:
+            obj.close()
+
+    def _get_lesson_index(self):
+        """Lesson index for the active KB version"""
+        return self._get_artifact(LESSON_INDEX_NAME, load_lesson_index)
+
+    def _get_bm25_index(self):
+        """BM25 keyword index for the active KB version"""
+        return self._get_artifact(BM25_INDEX_NAME, load_bm25_index)
+
+    def _vector_search(self, embedding, k, where=None):
+        """
+        Nearest-neighbour search on the configured backend
+
+        Falls back to Chroma when the active version has no exported index
+        for the selected backend.
+        """
+        # Counted so an index replaced by a new version isn't closed mid-query
+        with self._artifacts_lock:
+            self._active_searches += 1
+        try:
+            if self.vector_backend == "numpy":
+                index = self._get_artifact(NUMPY_INDEX_NAME, NumpyVectorIndex.load)
+                if index is not None:
+                    return index.query(embedding, k=k, where=where)
+            elif self.vector_backend == "mmap":
+                index = self._get_artifact(MMAP_INDEX_NAME, MmapVectorIndex.load)
+                if index is not None:
+                    return index.query(embedding, k=k, where=where)
+            elif self.vector_backend == "quantized":
+                index = self._get_artifact(QUANTIZED_INDEX_NAME, self._load_quantized_index)
+                if index is not None:
+                    return index.query(embedding, k=k, where=where)
+            elif self.vector_backend == "faiss":
+                index = self._get_artifact(FAISS_INDEX_NAME, self._load_faiss_index)
+                if index is not None:
+                    return index.query(embedding, k=k, where=where)
+            elif self.vector_backend != "chroma":
+                raise ValueError(f"Unknown vector backend {self.vector_backend!r}")
+            return chroma_query(self.collection, embedding, k=k, where=where)
+        finally:
+            self._end_search()
+
+    def _load_quantized_index(self, index_path):
+        # Full-precision rows for re-scoring come from the mmap export
+        full_vectors_path = os.path.join(os.path.dirname(index_path), MMAP_INDEX_NAME, "vectors.npy")
+        return QuantizedVectorIndex.load(
+            index_path,
+            full_vectors_path=full_vectors_path,
+            rescore_factor=QUANTIZED_RESCORE_FACTOR
+        )
+
+    def _load_faiss_index(self, index_path):
+        payload_path = os.path.join(os.path.dirname(index_path), FAISS_PAYLOAD_NAME)
+        return FaissVectorIndex.load(
+            index_path, payload_path,
+            ef_search=FAISS_HNSW_EF_SEARCH,
+            nprobe=FAISS_IVF_NPROBE
+        )
+
+    def _format_results(self, documents):
+        formatted = []
+        for i, doc in enumerate(documents, 1):
+            formatted.append(f"[Result {i}]:\n{doc[:1000]}")
+        
+        return "\n\n---\n\n".join(formatted)
+
+    def _lesson_not_found(self, lesson_num):
+        return (
+            f"Could not find information about Lesson {lesson_num}. "
+            f"Please verify the lesson number or try rephrasing."
+        )
 
     def _extract_lesson_number(self, query: str):
         """Extract lesson number from query"""
@@ -44,75 +214,124 @@ class CS110KnowledgeQueryTool(AbstractTool):
         Main tool execution method
         """
         try:
-            lesson_num = self._extract_lesson_number(tool_input)
+            if not self.use_result_cache:
+                return self._search(tool_input)
             
-            # DEBUG
-            print(f"\n🔍 DEBUG: Input query = '{tool_input}'")
-            print(f"🔍 DEBUG: Extracted lesson_num = {lesson_num}")
+            # The KB version is part of the key, so a rebuild makes every
+            # previously cached result unreachable. So are the retrieval
+            # settings, which change the result for the same query.
+            self.kb.get()
+            version = self.kb.version
+            key = (
+                version or "unversioned",
+                self.vector_backend,
+                self.use_hybrid,
+                self.use_lesson_index,
+                self.top_k,
+                normalize_query(tool_input),
+            )
             
-            # Create query embedding
-            query_embedding = self.embedder.embed_query(tool_input)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                # DEBUG
+                print(f"\n🔍 DEBUG: Result cache hit for '{tool_input}'")
+                return cached
             
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=80,
-                include=["documents", "metadatas"]
+            result = self._search(tool_input)
+            # A version published mid-search may have served part of the
+            # result, so only cache it if the version is still the same
+            self.kb.get()
+            if self.kb.version == version:
+                self.result_cache.put(key, result)
+            return result
+            
+        except Exception as e:
+            import traceback
+            return f"Error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+
+    async def ause(self, tool_input: str):
+        """
+        Async variant of use() for agents running on an event loop
+
+        ToolExecutor.aexecute prefers this method when it exists. Embedding
+        and vector search are blocking calls, so they run on the shared,
+        bounded query thread pool instead of stalling every other request
+        on the loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_query_executor(), self.use, tool_input)
+
+    def _search(self, tool_input: str):
+        """Look up the knowledge base and format the top results"""
+        lesson_num = self._extract_lesson_number(tool_input)
+        
+        # DEBUG
+        print(f"\n🔍 DEBUG: Input query = '{tool_input}'")
+        print(f"🔍 DEBUG: Extracted lesson_num = {lesson_num}")
+        
+        if lesson_num is not None and self.use_lesson_index:
+            lesson_index = self._get_lesson_index()
+            if lesson_index is not None:
+                entry = lesson_index.get(lesson_num)
+                
+                # DEBUG
+                print(f"🔍 DEBUG: Answered Lesson {lesson_num} from the lesson index\n")
+                
+                if entry is None:
+                    return self._lesson_not_found(lesson_num)
+                return self._format_results(entry["chunks"][:self.top_k])
+        
+        # Create query embedding
+        query_embedding = self.query_cache.embed_query(tool_input)
+        
+        if lesson_num is not None:
+            # Push the lesson filter down into the vector search using the
+            # metadata written by build_kb, instead of over-fetching and scanning text
+            results = self._vector_search(
+                query_embedding,
+                k=self.top_k,
+                where={"lesson": lesson_num}
             )
+            documents = results['documents']
             
-            if not results or not results['documents'] or not results['documents'][0]:
-                return "No information found in the CS110 knowledge base."
+            # DEBUG
+            print(f"🔍 DEBUG: Got {len(documents)} results for Lesson {lesson_num} from {self.vector_backend}\n")
             
-            documents = results['documents'][0]
+            if not documents:
+                return self._lesson_not_found(lesson_num)
+        else:
+            bm25 = self._get_bm25_index() if self.use_hybrid else None
             
-            # DEBUG
-            print(f"🔍 DEBUG: Got {len(documents)} results from ChromaDB")
-            if documents:
-                print(f"🔍 DEBUG: First result preview:\n{documents[0][:300]}\n")
+            # Dense search on the configured vector backend
+            results = self._vector_search(
+                query_embedding,
+                k=HYBRID_CANDIDATES if bm25 else self.top_k
+            )
             
-            # If asking about a specific lesson, filter by keyword
-            if lesson_num:
-                filtered = []
-                target = f"Lesson {lesson_num}:"
-                
-                # DEBUG: Check ALL documents and track where we find it
-                print(f"🔍 DEBUG: Looking for '{target}' in {len(documents)} documents...")
-                found_at = []
-                
-                for i, doc in enumerate(documents):
-                    if target in doc:
-                        filtered.append(doc)
-                        found_at.append(i)
+            dense_ids = results['ids']
+            dense_docs = results['documents']
+            
+            if bm25:
+                keyword_hits = bm25.search(tool_input, k=HYBRID_CANDIDATES)
+                texts = dict(zip(dense_ids, dense_docs))
+                texts.update((chunk_id, doc) for chunk_id, doc, _ in keyword_hits)
                 
-                print(f"🔍 DEBUG: Found '{target}' at positions: {found_at}")
-                print(f"🔍 DEBUG: Filtered to {len(filtered)} documents\n")
+                fused = reciprocal_rank_fusion(
+                    [dense_ids, [chunk_id for chunk_id, _, _ in keyword_hits]],
+                    k=RRF_K
+                )
+                documents = [texts[chunk_id] for chunk_id in fused[:self.top_k]]
                 
-                if filtered:
-                    documents = filtered[:3]
-                else:
-                    # Show what lessons we DID find for debugging
-                    print(f"🔍 DEBUG: Didn't find '{target}'. Here's what we got:")
-                    for i in range(min(5, len(documents))):
-                        # Extract lesson number from this doc
-                        doc_preview = documents[i][:300]
-                        lesson_match = re.search(r'Lesson (\d+):', doc_preview)
-                        lesson_found = lesson_match.group(1) if lesson_match else "?"
-                        print(f"   Doc {i}: Lesson {lesson_found} - {doc_preview[:100].replace(chr(10), ' ')}...")
-                    
-                    return (
-                        f"Could not find information about Lesson {lesson_num}. "
-                        f"Please verify the lesson number or try rephrasing."
-                    )
+                # DEBUG
+                print(f"🔍 DEBUG: Fused {len(dense_ids)} dense + {len(keyword_hits)} BM25 candidates")
             else:
-                documents = documents[:3]
+                documents = dense_docs[:self.top_k]
             
-            # Format results
-            formatted = []
-            for i, doc in enumerate(documents, 1):
-                formatted.append(f"[Result {i}]:\n{doc[:1000]}")
-            
-            return "\n\n---\n\n".join(formatted)
+            if not documents:
+                return "No information found in the CS110 knowledge base."
             
-        except Exception as e:
-            import traceback
-            return f"Error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
\ No newline at end of file
+            # DEBUG
+            print(f"🔍 DEBUG: Got {len(documents)} results")
+            print(f"🔍 DEBUG: First result preview:\n{documents[0][:300]}\n")
+        
+        return self._format_results(documents)
\ No newline at end of file
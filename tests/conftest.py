@@ -0,0 +1,46 @@
+"""
+Shared pytest setup for the CS110 pipeline tests
+"""
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+# pipeline.config refuses to import without an API key; no test calls the API
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+# Keep the persistent caches out of the project directory
+os.environ.setdefault("CS110_INGEST_EMBED_CACHE", "")
+os.environ.setdefault("CS110_LLM_CACHE", "")
+
+
+class HashEmbedder:
+    """
+    Deterministic stand-in for SentenceTransformerEmbedder
+
+    Each text maps to a fixed unit vector derived from its sha256, so equal
+    texts get equal vectors. Every embedded text is recorded in `embedded`.
+    """
+
+    model_name = "hash-embedder"
+
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.embedded = []
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self.vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.vector(text)
+
+
+@pytest.fixture
+def hash_embedder():
+    return HashEmbedder()
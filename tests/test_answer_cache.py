@@ -0,0 +1,125 @@
+"""
+Semantic answer cache for /api/ask (pipeline/answer_cache.py)
+"""
+import json
+import time
+import types
+
+import numpy as np
+
+from pipeline import answer_cache
+from pipeline.answer_cache import SemanticAnswerCache, question_numbers
+
+
+class TopicEmbedder:
+    """
+    Embeds a question by the topic words it mentions, ignoring numbers
+
+    That mimics the real weakness the number check guards against:
+    "lesson 7" and "lesson 17" come out (nearly) identical.
+    """
+
+    TOPICS = ["lesson", "late", "policy", "lists", "python", "labs", "about"]
+
+    def __call__(self, question):
+        words = question.lower().replace("?", "").split()
+        return np.array([1.0 + words.count(t) for t in self.TOPICS])
+
+
+def make_cache(tmp_path=None, **kwargs):
+    audit_path = str(tmp_path / "audit.jsonl") if tmp_path else None
+    return SemanticAnswerCache(TopicEmbedder(), audit_path=audit_path, **kwargs)
+
+
+def remember(cache, question, answer, persona="nice", kb_version="v1"):
+    _, embedding = cache.lookup(question, persona, kb_version)
+    cache.store(question, embedding, answer, persona, kb_version)
+
+
+def test_question_numbers():
+    assert question_numbers("Is GR2 before lesson 17?") == (2, 17)
+    assert question_numbers("what are lists") == ()
+
+
+def test_paraphrase_hits():
+    cache = make_cache(threshold=0.95)
+    remember(cache, "What is lesson 7 about?", "Functions.")
+
+    answer, _ = cache.lookup("what is lesson 7 about", "nice", "v1")
+    assert answer == "Functions."
+    assert cache.stats()["hits"] == 1
+
+
+def test_number_mismatch_is_rejected_and_audited(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.95)
+    remember(cache, "What is lesson 7 about?", "Functions.")
+
+    answer, _ = cache.lookup("What is lesson 17 about?", "nice", "v1")
+    assert answer is None
+    stats = cache.stats()
+    assert stats["rejected_number_mismatch"] == 1
+    assert stats["hits"] == 0
+
+    records = [json.loads(line) for line in (tmp_path / "audit.jsonl").read_text().splitlines()]
+    assert [r["event"] for r in records] == ["rejected_number_mismatch"]
+    assert records[0]["matched_question"] == "What is lesson 7 about?"
+    assert records[0]["similarity"] >= 0.95
+
+
+def test_below_threshold_is_a_miss():
+    cache = make_cache(threshold=0.999)
+    remember(cache, "What is the late policy?", "10% per day.")
+    assert cache.lookup("python lists", "nice", "v1")[0] is None
+
+
+def test_scoped_by_persona_and_kb_version():
+    cache = make_cache(threshold=0.95)
+    remember(cache, "What are python lists?", "Nice answer.", persona="nice", kb_version="v1")
+
+    assert cache.lookup("What are python lists?", "mean", "v1")[0] is None
+    assert cache.lookup("What are python lists?", "nice", "v2")[0] is None
+    # Looking up a newer KB version dropped the old version's answers
+    assert cache.lookup("What are python lists?", "nice", "v1")[0] is None
+
+
+def test_entries_expire_and_are_bounded(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(answer_cache, "time", types.SimpleNamespace(
+        time=lambda: clock.now, perf_counter=time.perf_counter, strftime=time.strftime,
+    ))
+    cache = make_cache(threshold=0.95, ttl=60, maxsize=2)
+    remember(cache, "What is the late policy?", "10% per day.")
+    remember(cache, "What are python lists?", "Ordered sequences.")
+    remember(cache, "How are labs graded?", "Out of 10.")
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("What is the late policy?", "nice", "v1")[0] is None
+    assert cache.lookup("What are python lists?", "nice", "v1")[0] == "Ordered sequences."
+
+    clock.now += 61
+    assert cache.lookup("What are python lists?", "nice", "v1")[0] is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_late_store_for_an_old_version_is_dropped():
+    cache = make_cache(threshold=0.95)
+    _, old_embedding = cache.lookup("What are python lists?", "nice", "v1")
+    # v2 is published and answered while the v1 answer is still being generated
+    remember(cache, "What is the late policy?", "10% per day.", kb_version="v2")
+
+    assert cache.store("What are python lists?", old_embedding, "Stale.", "nice", "v1") is False
+    assert cache.lookup("What is the late policy?", "nice", "v2")[0] == "10% per day."
+    assert cache.stats()["scopes"] == 1
+
+
+def test_audit_is_written_outside_the_cache_lock(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, threshold=0.95)
+    remember(cache, "What is lesson 7 about?", "Functions.")
+    held = []
+    audit = cache._audit
+    monkeypatch.setattr(cache, "_audit", lambda *args: held.append(cache._lock.locked()) or audit(*args))
+
+    cache.lookup("what is lesson 7 about", "nice", "v1")
+    cache.lookup("What is lesson 17 about?", "nice", "v1")
+    assert held == [False, False]
+    assert len((tmp_path / "audit.jsonl").read_text().splitlines()) == 2
+
@@ -0,0 +1,61 @@
+"""
+BM25 keyword index and reciprocal rank fusion (pipeline/bm25.py)
+"""
+import json
+
+from pipeline.bm25 import BM25Index, load_bm25_index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "gr1": "Graded Review 1 (GR1) covers lessons 1 through 10.",
+    "late": "Programming packs submitted late lose 10 percent per 24 hours.",
+    "graph": "PythonGraph is the plotting library used in lesson 25.",
+    "lists": "Python lists are ordered and mutable. Lists hold any type.",
+}
+
+
+def build():
+    return BM25Index.build(list(DOCS), list(DOCS.values()))
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("What is the GR1 about?") == ["gr1"]
+
+
+def test_exact_tokens_rank_first():
+    index = build()
+    assert index.search("When is GR1?", k=1)[0][0] == "gr1"
+    assert index.search("pythongraph", k=1)[0][0] == "graph"
+    assert index.search("late penalty 24 hours")[0][0] == "late"
+
+
+def test_scores_are_descending_and_misses_are_empty():
+    index = build()
+    hits = index.search("python lists lesson", k=10)
+    scores = [score for _, _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert hits[0][0] == "lists"
+    assert index.search("zebra") == []
+    assert len(index.search("lesson", k=1)) == 1
+
+
+def test_round_trip_through_json(tmp_path):
+    index = build()
+    path = tmp_path / "bm25.json"
+    path.write_text(json.dumps(index.to_dict()), encoding="utf-8")
+
+    loaded = load_bm25_index(str(path))
+    assert loaded.search("GR1 lessons") == index.search("GR1 lessons")
+    assert load_bm25_index(str(tmp_path / "missing.json")) is None
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    dense = ["a", "b", "c"]
+    keyword = ["c", "b", "d"]
+    fused = reciprocal_rank_fusion([dense, keyword], k=60)
+
+    # c (ranks 3 and 1) edges out b (2 and 2); a (1) beats d (3)
+    assert fused == ["c", "b", "a", "d"]
+
+
+def test_rrf_single_ranking_keeps_order():
+    assert reciprocal_rank_fusion([["x", "y", "z"]]) == ["x", "y", "z"]
@@ -0,0 +1,173 @@
+"""
+Content-hash manifest and incremental KB rebuilds (pipeline/build_kb.py)
+"""
+import os
+
+import pytest
+
+from pipeline import build_kb
+from pipeline.build_kb import iter_parsed_files, make_chunk_ids
+from pipeline.config import KB_MANIFEST_NAME
+from pipeline.kb_versions import read_pointer, version_dir
+
+LESSONS = """==================================================
+Lesson 1: Introduction
+Date (M-section): Mon 13 Jan
+Date (T-section): Tue 14 Jan
+==================================================
+Description:
+Course overview and what a computer is.
+
+==================================================
+Lesson 2: Python basics
+Date (M-section): Wed 15 Jan
+Date (T-section): Thu 16 Jan
+==================================================
+Description:
+Variables, expressions and printing output.
+"""
+
+GUIDE = "Python lists are ordered, mutable sequences. " * 40
+
+
+def test_chunk_ids_are_stable_and_content_addressed():
+    first = make_chunk_ids("a.txt", ["alpha", "beta", "alpha"])
+    again = make_chunk_ids("a.txt", ["alpha", "beta", "alpha"])
+    assert first == again
+    assert first[0]["id"] != first[2]["id"]
+    assert first[2]["id"].endswith("#2")
+
+    edited = make_chunk_ids("a.txt", ["alpha", "gamma", "alpha"])
+    assert edited[0]["id"] == first[0]["id"]
+    assert edited[1]["id"] != first[1]["id"]
+    assert make_chunk_ids("b.txt", ["alpha"])[0]["id"] != first[0]["id"]
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch, hash_embedder):
+    """Build against a scratch docs folder and Chroma directory"""
+    chromadb = pytest.importorskip("chromadb")
+    docs = tmp_path / "cs110_docs"
+    docs.mkdir()
+    (docs / "CS110_Lesson_Schedule.txt").write_text(LESSONS, encoding="utf-8")
+    (docs / "guide.txt").write_text(GUIDE, encoding="utf-8")
+
+    monkeypatch.setattr(build_kb, "project_path", lambda relative: str(tmp_path / relative))
+    monkeypatch.setattr(build_kb, "get_embedder", lambda model_name: hash_embedder)
+    monkeypatch.setattr(build_kb, "INGEST_EMBED_CACHE_PATH", None)
+
+    def build(persist_dir=str(tmp_path / "kb"), **kwargs):
+        kwargs.setdefault("workers", 1)
+        build_kb.build_cs110_kb(persist_dir=persist_dir, **kwargs)
+        pointer = read_pointer(persist_dir)
+        manifest = build_kb.load_manifest(
+            os.path.join(version_dir(pointer["version"], persist_dir), KB_MANIFEST_NAME)
+        )
+        stored = chromadb.PersistentClient(path=persist_dir).get_collection(pointer["collection"]).get()
+        return pointer, manifest, set(stored["ids"])
+
+    return docs, build, hash_embedder
+
+
+def manifest_ids(manifest):
+    return {c["id"] for entry in manifest["files"].values() for c in entry["chunks"]}
+
+
+def test_incremental_rebuild_only_embeds_changed_files(kb):
+    docs, build, embedder = kb
+
+    pointer, manifest, stored = build()
+    assert set(manifest["files"]) == {"CS110_Lesson_Schedule.txt", "guide.txt"}
+    assert stored == manifest_ids(manifest)
+    assert len(embedder.embedded) == len(stored)
+
+    embedder.embedded.clear()
+    (docs / "guide.txt").write_text(GUIDE + "Tuples are immutable.", encoding="utf-8")
+    pointer2, manifest2, stored2 = build()
+
+    assert pointer2["version"] != pointer["version"]
+    assert manifest2["files"]["CS110_Lesson_Schedule.txt"] == manifest["files"]["CS110_Lesson_Schedule.txt"]
+    assert manifest2["files"]["guide.txt"]["sha256"] != manifest["files"]["guide.txt"]["sha256"]
+    assert embedder.embedded
+    assert all("Python lists" in text or "Tuples" in text for text in embedder.embedded)
+    # Stale chunks of the old guide.txt are gone from the collection
+    assert stored2 == manifest_ids(manifest2)
+
+
+def test_unchanged_docs_publish_nothing(kb):
+    _, build, embedder = kb
+    pointer, _, _ = build()
+    embedder.embedded.clear()
+
+    pointer2, _, _ = build()
+    assert pointer2["version"] == pointer["version"]
+    assert embedder.embedded == []
+
+
+def test_full_rebuild_reembeds_everything(kb):
+    _, build, embedder = kb
+    build()
+    total = len(embedder.embedded)
+    embedder.embedded.clear()
+
+    build(full=True)
+    assert len(embedder.embedded) == total
+
+
+def test_embedding_cache_is_shared_across_persist_dirs(kb, tmp_path, monkeypatch):
+    _, build, embedder = kb
+    monkeypatch.setattr(build_kb, "INGEST_EMBED_CACHE_PATH", str(tmp_path / "embeddings.sqlite"))
+    _, manifest, stored = build()
+    assert len(embedder.embedded) == len(stored)
+    embedder.embedded.clear()
+
+    # A fresh persist directory has nothing to copy from, but every chunk is cached
+    _, manifest2, stored2 = build(persist_dir=str(tmp_path / "other_kb"))
+    assert embedder.embedded == []
+    assert stored2 == stored
+    assert manifest2["files"] == manifest["files"]
+
+
+def test_parallel_parse_keeps_file_order(tmp_path):
+    names = [f"doc{n:02d}.txt" for n in range(7)]
+    for n, name in enumerate(names):
+        (tmp_path / name).write_text(f"Document {n}. " * (50 * (7 - n)), encoding="utf-8")
+    (tmp_path / "empty.txt").write_text("   ", encoding="utf-8")
+    names.append("empty.txt")
+
+    inline = list(iter_parsed_files(str(tmp_path), names, {}, workers=1))
+    pooled = list(iter_parsed_files(str(tmp_path), names, {}, workers=2))
+
+    assert [r["fname"] for r in pooled] == names
+    # Everything but the timing is identical to parsing inline
+    for a, b in zip(pooled, inline):
+        assert {**a, "parse_s": 0} == {**b, "parse_s": 0}
+    assert pooled[-1]["chunks"] == []
+
+    # A file whose hash matches the old manifest is not re-chunked
+    old = {names[0]: {"sha256": inline[0]["sha256"]}}
+    first = next(iter_parsed_files(str(tmp_path), names[:2], old, workers=2))
+    assert first["unchanged"] and "chunks" not in first
+
+
+def test_pooled_build_matches_inline_build(kb):
+    _, build, _ = kb
+    _, manifest, stored = build(workers=1)
+    _, pooled_manifest, pooled_stored = build(workers=2, full=True)
+
+    assert pooled_manifest["files"] == manifest["files"]
+    assert pooled_stored == stored
+
+
+def test_dedup_collapses_copied_files(kb, monkeypatch):
+    docs, build, embedder = kb
+    monkeypatch.setattr(build_kb, "DEDUP_ENABLED", True)
+    (docs / "guide_copy.txt").write_text(GUIDE, encoding="utf-8")
+
+    _, manifest, stored = build()
+    copies = manifest["files"]["guide_copy.txt"]["chunks"]
+    assert copies and all("duplicate_of" in c for c in copies)
+    # Duplicates point at stored chunks and are neither stored nor embedded
+    assert {c["duplicate_of"] for c in copies} <= stored
+    assert not {c["id"] for c in copies} & stored
+    assert len(embedder.embedded) == len(stored)
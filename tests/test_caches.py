@@ -0,0 +1,255 @@
+"""
+LRU, TTL and SQLite-backed caches (pipeline/caches.py)
+"""
+import asyncio
+
+import pytest
+
+from pipeline import caches
+from pipeline.caches import (
+    CachingChatModel,
+    CachingEmbedder,
+    ChunkEmbeddingCache,
+    LLMResponseCache,
+    LRUCache,
+    QueryEmbeddingCache,
+    TTLCache,
+    normalize_query,
+)
+
+
+class Clock:
+    """Replaces the time module in pipeline.caches with a hand-driven clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(caches, "time", clock)
+    return clock
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["size"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_ttl_entries_expire(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.put("a", 1)
+    clock.advance(9)
+    assert cache.get("a") == 1
+    clock.advance(1)
+    assert cache.get("a") is None
+    assert cache.get("a", "gone") == "gone"
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+    assert len(cache) == 0
+
+
+def test_query_embedding_cache_memory_and_disk_tiers(tmp_path, hash_embedder):
+    path = str(tmp_path / "queries.sqlite")
+    cache = QueryEmbeddingCache(hash_embedder, "hash", maxsize=1, disk_path=path)
+
+    vector = cache.embed_query("What is  Lesson 7?")
+    assert cache.embed_query("what is lesson 7?") == vector
+    assert cache.stats()["hits"] == 1
+
+    # Evicted from memory, still on disk
+    cache.embed_query("another question")
+    again = cache.embed_query("what is lesson 7?")
+    assert again == pytest.approx(vector, rel=1e-6)
+    assert cache.stats()["disk_hits"] == 1
+
+    # A new process reads the same SQLite file
+    restarted = QueryEmbeddingCache(hash_embedder, "hash", disk_path=path)
+    restarted.embed_query("WHAT IS LESSON 7?")
+    assert restarted.stats()["disk_hits"] == 1
+
+    # Another model never sees these vectors
+    other = QueryEmbeddingCache(hash_embedder, "other-model", disk_path=path)
+    other.embed_query("what is lesson 7?")
+    assert other.stats()["disk_hits"] == 0
+
+
+def test_chunk_embedding_cache_evicts_by_bytes_in_lru_order(tmp_path, clock):
+    dim_bytes = 4 * 4
+    cache = ChunkEmbeddingCache(str(tmp_path / "chunks.sqlite"), "hash", max_bytes=2 * dim_bytes)
+    cache.put_many(["a"], [[1.0, 0.0, 0.0, 0.0]])
+    clock.advance(1)
+    cache.put_many(["b"], [[0.0, 1.0, 0.0, 0.0]])
+    clock.advance(1)
+    assert cache.get_many(["a"])[0] == [1.0, 0.0, 0.0, 0.0]
+    clock.advance(1)
+    cache.put_many(["c"], [[0.0, 0.0, 1.0, 0.0]])
+
+    assert cache.get_many(["a", "b", "c"])[1] is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 2 * dim_bytes
+    cache.close()
+
+
+def test_caching_embedder_only_embeds_misses(tmp_path, hash_embedder):
+    cache = ChunkEmbeddingCache(str(tmp_path / "chunks.sqlite"), "hash")
+    loads = []
+
+    def load():
+        loads.append(1)
+        return hash_embedder
+
+    embedder = CachingEmbedder(load, cache)
+    first = embedder.embed_documents(["x", "y"])
+    second = embedder.embed_documents(["y", "z"])
+
+    assert hash_embedder.embedded == ["x", "y", "z"]
+    assert second[0] == pytest.approx(first[1], rel=1e-6)
+    assert len(loads) == 1
+
+    # Fully cached: the model is never loaded
+    cached_only = CachingEmbedder(lambda: pytest.fail("model loaded"), cache)
+    cached_only.embed_documents(["x", "z"])
+    cache.close()
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS\tlesson 7? ") == "what is lesson 7?"
+
+
+def messages(*contents):
+    from fairlib import Message
+    return [Message(role="user", content=c) for c in contents]
+
+
+def test_llm_cache_key_covers_model_params_and_messages():
+    key = LLMResponseCache.key("m", messages("hi"), {"temperature": 0})
+    assert key == LLMResponseCache.key("m", messages("hi"), {"temperature": 0})
+    assert key != LLMResponseCache.key("other", messages("hi"), {"temperature": 0})
+    assert key != LLMResponseCache.key("m", messages("hi"), {"temperature": 1})
+    assert key != LLMResponseCache.key("m", messages("hi", "again"), {"temperature": 0})
+
+
+def test_llm_cache_ttl_and_lru_eviction(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), max_bytes=20)
+    cache.put("a", "m", "x" * 10, ttl=100)
+    clock.advance(1)
+    cache.put("b", "m", "y" * 10, ttl=5)
+    clock.advance(1)
+    assert cache.get("a") == "x" * 10
+
+    # "a" was used more recently than "b", so "b" goes
+    clock.advance(1)
+    cache.put("c", "m", "z" * 10, ttl=100)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    clock.advance(100)
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["bytes"] == 10
+    cache.close()
+
+
+def test_llm_cache_hits_are_written_in_batches(tmp_path, clock):
+    path = str(tmp_path / "llm.sqlite")
+    cache = LLMResponseCache(path, touch_batch=3)
+    for key in "abc":
+        cache.put(key, "m", key, ttl=100)
+    clock.advance(10)
+
+    def stored_last_used(key):
+        return cache._db.execute("SELECT last_used FROM llm_responses WHERE key = ?", (key,)).fetchone()[0]
+
+    cache.get("a")
+    cache.get("b")
+    assert stored_last_used("a") == 1000.0
+    cache.get("c")
+    assert stored_last_used("a") == 1010.0
+
+    cache.get("a")
+    cache.close()
+    reopened = LLMResponseCache(path)
+    assert reopened._db.execute("SELECT last_used FROM llm_responses WHERE key = 'a'").fetchone()[0] == 1010.0
+    reopened.close()
+
+
+class ChatAdapter:
+    model_name = "m"
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        from fairlib import Message
+        self.calls += 1
+        return Message(role="assistant", content=self.reply)
+
+
+def test_caching_chat_model_serves_repeats_from_the_cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    adapter = ChatAdapter("Lesson 7 is about functions.")
+    model = CachingChatModel(adapter, cache, ttl=100)
+
+    async def ask_twice():
+        first = await model.ainvoke(messages("lesson 7?"))
+        second = await model.ainvoke(messages("lesson 7?"))
+        return first, second
+
+    first, second = asyncio.run(ask_twice())
+    assert first.content == second.content == "Lesson 7 is about functions."
+    assert adapter.calls == 1
+    assert model.model_name == "m"
+    cache.close()
+
+
+def test_caching_chat_model_never_stores_errors(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    adapter = ChatAdapter("Error: rate limited")
+    model = CachingChatModel(adapter, cache, ttl=100)
+
+    asyncio.run(model.ainvoke(messages("q")))
+    asyncio.run(model.ainvoke(messages("q")))
+    assert adapter.calls == 2
+    assert cache.stats()["bytes"] == 0
+    cache.close()
+
+
+def test_chat_model_cache_is_opt_in(tmp_path, monkeypatch):
+    from pipeline import resources
+
+    monkeypatch.setattr(resources, "LLM_CACHE_PATH", str(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(resources, "LLM_CACHE_AGENT_TTL_S", {"nice_instructor": 0, "knowledge_agent": 60})
+    monkeypatch.setattr(resources, "_llm_response_cache", None)
+    try:
+        assert not isinstance(resources.get_chat_model("gpt-4o-mini", agent="nice_instructor"), CachingChatModel)
+        assert not isinstance(resources.get_chat_model("gpt-4o-mini", agent="unknown"), CachingChatModel)
+        wrapped = resources.get_chat_model("gpt-4o-mini", agent="knowledge_agent")
+        assert isinstance(wrapped, CachingChatModel)
+        assert wrapped.ttl == 60
+    finally:
+        if resources._llm_response_cache is not None:
+            resources._llm_response_cache.close()
@@ -0,0 +1,78 @@
+"""
+Streaming chunkers produce exactly what the original in-memory ones do (pipeline/build_kb.py)
+"""
+import io
+import os
+
+import pytest
+
+from pipeline.build_kb import (
+    iter_lesson_chunks_with_metadata,
+    iter_simple_chunks,
+    simple_chunk_text,
+    smart_chunk_lessons_with_metadata,
+)
+from pipeline.config import project_path
+
+DOCS_PATH = project_path("cs110_docs")
+DOC_FILES = sorted(f for f in os.listdir(DOCS_PATH) if f.endswith(".txt"))
+
+RULE = "=" * 50
+
+SYNTHETIC = {
+    "empty": "",
+    "short": "Just one short line.",
+    "exactly_one_chunk": "x" * 800,
+    "no_spaces": "y" * 2500,
+    "sentences": "Short sentence here. " * 200,
+    "paragraphs": ("A paragraph of text that goes on for a while. " * 8 + "\n\n") * 12,
+    "lessons": (
+        "Course intro text.\n\n"
+        f"{RULE}\nLesson 1: Start\nDate (M-section): Mon\n{RULE}\nDescription:\nFirst.\n\n"
+        f"{RULE}\n\n\nLesson 2: Blank lines before the title\n{RULE}\nDescription:\nSecond.\n\n"
+        f"{RULE}\nNot a lesson line, so no boundary here\n"
+        f"{RULE}\nLesson 3: Last\n" + "Long description. " * 120 + "\n"
+    ),
+    "rule_at_eof": f"Intro\n{RULE}\n\n",
+}
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("read_size", [7, 333, 64 * 1024])
+@pytest.mark.parametrize("name", sorted(SYNTHETIC))
+def test_simple_chunks_match_on_synthetic_text(name, read_size):
+    text = SYNTHETIC[name]
+    assert list(iter_simple_chunks(io.StringIO(text), read_size=read_size)) == simple_chunk_text(text)
+
+
+@pytest.mark.parametrize("fname", DOC_FILES)
+def test_simple_chunks_match_on_course_docs(fname):
+    path = os.path.join(DOCS_PATH, fname)
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        streamed = list(iter_simple_chunks(f, read_size=1000))
+    assert streamed == simple_chunk_text(read_text(path))
+
+
+@pytest.mark.parametrize("name", sorted(SYNTHETIC))
+def test_lesson_chunks_match_on_synthetic_text(tmp_path, name):
+    path = tmp_path / f"{name}.txt"
+    path.write_text(SYNTHETIC[name], encoding="utf-8")
+    expected = smart_chunk_lessons_with_metadata(SYNTHETIC[name])
+    assert list(iter_lesson_chunks_with_metadata(str(path))) == expected
+
+
+@pytest.mark.parametrize("fname", DOC_FILES)
+def test_lesson_chunks_match_on_course_docs(fname):
+    path = os.path.join(DOCS_PATH, fname)
+    expected = smart_chunk_lessons_with_metadata(read_text(path))
+    assert list(iter_lesson_chunks_with_metadata(path)) == expected
+
+
+def test_lesson_schedule_yields_lesson_metadata():
+    chunks = list(iter_lesson_chunks_with_metadata(os.path.join(DOCS_PATH, "CS110_Lesson_Schedule.txt")))
+    lessons = {metadata["lesson"] for _, metadata in chunks if "lesson" in metadata}
+    assert len(lessons) > 10
@@ -0,0 +1,68 @@
+"""
+MinHash near-duplicate detection (pipeline/dedup.py)
+"""
+import pytest
+
+from pipeline.dedup import NearDuplicateIndex, shingles
+
+WORDS = (
+    "the von neumann architecture stores program instructions and data in the same "
+    "memory so the processor fetches both over one shared bus which is why it is "
+    "sometimes called the stored program computer model and its bottleneck limits "
+    "how fast instructions can be fed to the arithmetic logic unit in practice"
+).split()
+
+BASE = " ".join(WORDS * 4)
+
+
+def one_word_changed(text):
+    words = text.split()
+    words[len(words) // 2] = "cache"
+    return " ".join(words)
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("Hello, World! How are you") == shingles("hello world how are YOU")
+    assert len(shingles("one two three")) == 1
+
+
+def test_exact_duplicate_is_found():
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add("a", BASE)
+    assert index.find(BASE) == ("a", 1.0)
+
+
+def test_near_duplicate_above_threshold():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("a", BASE)
+    kept_id, similarity = index.find(one_word_changed(BASE))
+    assert kept_id == "a"
+    assert 0.8 <= similarity < 1.0
+
+
+def test_threshold_controls_what_counts_as_duplicate():
+    index = NearDuplicateIndex(threshold=1.0)
+    index.add("a", BASE)
+    kept_id, similarity = index.find(one_word_changed(BASE))
+    assert kept_id is None
+    assert similarity < 1.0
+
+
+def test_unrelated_text_is_kept():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("a", BASE)
+    other = "python lists are ordered mutable sequences and dictionaries map keys to values " * 4
+    assert index.find(other)[0] is None
+
+
+def test_closest_of_several_candidates_wins():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("far", " ".join(WORDS[:30] + ["tuple"] * 20))
+    index.add("near", BASE)
+    assert index.find(one_word_changed(BASE))[0] == "near"
+    assert len(index) == 2
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=64, bands=10)
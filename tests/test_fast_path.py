@@ -0,0 +1,105 @@
+"""
+Deterministic fast path for schedule and grading questions (pipeline/fast_path.py)
+"""
+import os
+import shutil
+
+import pytest
+
+from pipeline.config import GRADING_FILE, LESSON_SCHEDULE_FILE, project_path
+from pipeline.fast_path import FastPathRouter, normalize_question
+
+DOCS_PATH = project_path("cs110_docs")
+
+
+@pytest.fixture
+def router():
+    return FastPathRouter(DOCS_PATH)
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("When is lesson 7?", "lesson_date"),
+    ("what day is lesson 12 on", "lesson_date"),
+    ("What is lesson 7 about?", "lesson_topic"),
+    ("What does lesson 3 cover?", "lesson_topic"),
+    ("When is GR1?", "gr_date"),
+    ("what date is the graded review 2", "gr_date"),
+    ("How much are the programming packs worth?", "grading_weight"),
+    ("What percentage of my grade is labs?", "grading_weight"),
+    ("Tell me about lesson 15 and when it occurs", None),
+    ("What are Python lists?", None),
+])
+def test_classify(router, question, intent):
+    assert router.classify(question)[0] == intent
+
+
+def test_normalize_question():
+    assert normalize_question("  When   is Lesson 7?! ") == "when is lesson 7"
+
+
+def test_lesson_answers_come_from_the_schedule(router):
+    answer = router.route("When is lesson 7?")
+    assert answer.startswith("Lesson 7 (")
+    assert "M-section" in answer and "T-section" in answer
+
+    missing = router.route("What is lesson 99 about?")
+    assert "not on the CS110 schedule" in missing
+
+
+def test_graded_review_and_category_answers(router):
+    assert "GR1" in router.route("When is GR1?")
+    assert router.route("When is GR7?") is None
+
+    answer = router.route("How much are the programming packs worth?")
+    assert "Programming Packs" in answer and "%" in answer
+    assert "Course Project category is worth 150 points" in router.route("How much is the course project worth?")
+
+
+@pytest.mark.parametrize("question", [
+    "How much is the final project worth?",
+    "How much is the project worth?",
+    "What percentage of my grade is the final project?",
+])
+def test_ambiguous_project_questions_go_to_the_agent(router, question):
+    # "Final Project Submission" is a 60-point milestone of the 150-point category
+    assert router.classify(question)[0] == "grading_weight"
+    assert router.route(question) is None
+
+
+def test_persona_templates(router):
+    nice = router.route("When is lesson 7?", persona="nice")
+    mean = router.route("When is lesson 7?", persona="mean")
+    assert nice != mean
+    assert "Put it in a calendar" in mean
+
+
+def test_stats_count_routed_and_fallthrough(router):
+    router.route("When is lesson 7?")
+    router.route("What are Python lists?")
+    router.route("How much is the final project worth?")
+    stats = router.stats()
+    assert stats["routed"] == 1
+    assert stats["fallthrough"] == 2
+    assert stats["by_intent"] == {"lesson_date": 1}
+
+
+def test_index_reloads_when_docs_change(tmp_path):
+    for name in (LESSON_SCHEDULE_FILE, GRADING_FILE):
+        shutil.copy(os.path.join(DOCS_PATH, name), tmp_path / name)
+    router = FastPathRouter(str(tmp_path))
+    assert "150 points" in router.route("How much are labs worth?")
+
+    grading = tmp_path / GRADING_FILE
+    grading.write_text(grading.read_text(encoding="utf-8").replace(
+        "3. Labs: 150 points (15%)", "3. Labs: 175 points (17%)"
+    ), encoding="utf-8")
+    stat = os.stat(grading)
+    os.utime(grading, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert "175 points" in router.route("How much are labs worth?")
+
+
+def test_missing_docs_fall_through(tmp_path):
+    router = FastPathRouter(str(tmp_path))
+    assert router.route("When is lesson 7?") is None
+    assert router.route("When is GR1?") is None
@@ -0,0 +1,314 @@
+"""
+CS110KnowledgeQueryTool retrieval against a small versioned KB (project_tools/cs110_kb_query.py)
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pipeline import resources
+from pipeline.build_kb import (
+    build_lesson_index,
+    chunk_document,
+    export_vector_indexes,
+    save_manifest,
+)
+from pipeline.caches import QueryEmbeddingCache, TTLCache
+from pipeline.config import (
+    LESSON_INDEX_NAME,
+    LESSON_SCHEDULE_FILE,
+    MMAP_INDEX_NAME,
+    NUMPY_INDEX_NAME,
+)
+from pipeline.kb_versions import collection_name_for, publish_version
+from pipeline.vector_backends import FAISS_AVAILABLE, MmapVectorIndex, NumpyVectorIndex
+from project_tools import cs110_kb_query
+
+RULE = "=" * 50
+
+SCHEDULE = "".join(
+    f"{RULE}\nLesson {n}: {title}\n{RULE}\nDescription:\n{body}\n\n"
+    for n, title, body in [
+        (1, "Introduction", "Course overview and what a computer is."),
+        (2, "Python basics", "Variables, expressions and printing output."),
+        (3, "Functions", "Defining functions with parameters and return values."),
+    ]
+)
+
+# Lowercase, so the normalized query embeds exactly like the stored chunk
+GUIDE = "python lists are ordered, mutable sequences of values."
+
+
+class QueryTool(cs110_kb_query.CS110KnowledgeQueryTool):
+    # fair-llm releases with typed tools declare acall() abstract; these
+    # tests drive the tool through use() the way the agents here do
+    async def acall(self, tool_input):
+        return self.use(tool_input)
+
+
+@pytest.fixture
+def kb_tool(tmp_path, monkeypatch, hash_embedder):
+    """A query tool over a published one-version KB in a scratch directory"""
+    chromadb = pytest.importorskip("chromadb")
+    persist_dir = tmp_path / "cs110_collection"
+    client = chromadb.PersistentClient(path=str(persist_dir))
+    collection = client.create_collection(collection_name_for("v1"))
+
+    for fname, text in [("CS110_Lesson_Schedule.txt", SCHEDULE), ("guide.txt", GUIDE)]:
+        chunks, metadatas, _ = chunk_document(fname, text)
+        collection.add(
+            ids=[f"{fname}#{i}" for i in range(len(chunks))],
+            embeddings=hash_embedder.embed_documents(chunks),
+            documents=chunks,
+            metadatas=metadatas,
+        )
+    publish_version("v1", str(persist_dir))
+
+    monkeypatch.setattr(cs110_kb_query, "project_path", lambda relative: str(tmp_path / relative))
+    monkeypatch.setattr(cs110_kb_query, "get_embedder", lambda model_name: hash_embedder)
+    monkeypatch.setattr(
+        cs110_kb_query, "get_query_embedding_cache",
+        lambda model_name: QueryEmbeddingCache(hash_embedder, model_name),
+    )
+    monkeypatch.setattr(cs110_kb_query, "get_result_cache", TTLCache)
+    return QueryTool()
+
+
+def test_lesson_filter_runs_inside_chroma(kb_tool, monkeypatch):
+    calls = []
+    query = kb_tool.collection.query
+
+    def spy(**kwargs):
+        calls.append(kwargs)
+        return query(**kwargs)
+
+    monkeypatch.setattr(kb_tool.collection, "query", spy)
+    result = kb_tool.use("What is lesson 2 about?")
+
+    assert "Lesson 2: Python basics" in result
+    assert "Lesson 1:" not in result and "Lesson 3:" not in result
+    assert [c["where"] for c in calls] == [{"lesson": 2}]
+    assert calls[0]["n_results"] == kb_tool.top_k
+
+
+def test_unknown_lesson_is_reported(kb_tool):
+    assert "Could not find information about Lesson 9" in kb_tool.use("lesson 9")
+
+
+def test_lesson_questions_use_the_lesson_index(kb_tool, tmp_path, monkeypatch):
+    docs = tmp_path / "cs110_docs"
+    docs.mkdir()
+    (docs / LESSON_SCHEDULE_FILE).write_text(SCHEDULE, encoding="utf-8")
+    index_path = kb_tool.kb.artifact_path(LESSON_INDEX_NAME)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    save_manifest(index_path, build_lesson_index(str(docs)))
+
+    monkeypatch.setattr(kb_tool.collection, "query", lambda **kwargs: pytest.fail("vector search ran"))
+    assert "Lesson 2: Python basics" in kb_tool.use("What is lesson 2 about?")
+    assert "Could not find information about Lesson 9" in kb_tool.use("lesson 9")
+
+
+def test_other_questions_search_every_chunk(kb_tool):
+    result = kb_tool.use(GUIDE)
+    assert result.startswith("[Result 1]:\n" + GUIDE)
+
+
+def export_indexes(kb_tool):
+    """Export the active version's chunks the way build_kb does"""
+    artifacts_dir = os.path.dirname(kb_tool.kb.artifact_path(NUMPY_INDEX_NAME))
+    os.makedirs(artifacts_dir, exist_ok=True)
+    export_vector_indexes(kb_tool.collection.get(include=["embeddings", "documents", "metadatas"]), artifacts_dir)
+
+
+@pytest.mark.parametrize("backend", [
+    "numpy",
+    "mmap",
+    "quantized",
+    pytest.param("faiss", marks=pytest.mark.skipif(not FAISS_AVAILABLE, reason="faiss not installed")),
+])
+def test_exported_backends_answer_without_chroma(kb_tool, monkeypatch, backend):
+    export_indexes(kb_tool)
+    monkeypatch.setattr(kb_tool, "vector_backend", backend)
+    monkeypatch.setattr(kb_tool.collection, "query", lambda **kwargs: pytest.fail("chroma queried"))
+
+    result = kb_tool.use("What is lesson 2 about?")
+    assert "Lesson 2: Python basics" in result and "Lesson 1:" not in result
+    assert kb_tool.use(GUIDE).startswith("[Result 1]:\n" + GUIDE)
+
+
+def test_artifacts_reload_when_a_new_version_is_published(kb_tool, tmp_path):
+    export_indexes(kb_tool)
+    index = kb_tool._get_artifact(NUMPY_INDEX_NAME, NumpyVectorIndex.load)
+    assert index is not None
+    assert kb_tool._get_artifact(NUMPY_INDEX_NAME, NumpyVectorIndex.load) is index
+
+    rows = kb_tool.collection.get(include=["embeddings", "documents", "metadatas"])
+    kb_tool.client.create_collection(collection_name_for("v2")).add(
+        ids=rows["ids"], embeddings=rows["embeddings"], documents=rows["documents"], metadatas=rows["metadatas"]
+    )
+    publish_version("v2", str(tmp_path / "cs110_collection"))
+    export_indexes(kb_tool)
+    reloaded = kb_tool._get_artifact(NUMPY_INDEX_NAME, NumpyVectorIndex.load)
+    assert reloaded is not None and reloaded is not index
+    assert kb_tool.kb.version == "v2"
+
+
+def test_replaced_mmap_index_is_closed_after_the_search(kb_tool, tmp_path, monkeypatch):
+    export_indexes(kb_tool)
+    monkeypatch.setattr(kb_tool, "vector_backend", "mmap")
+    monkeypatch.setattr(kb_tool, "use_result_cache", False)
+    assert kb_tool.use(GUIDE).startswith("[Result 1]:\n" + GUIDE)
+    old = kb_tool._get_artifact(MMAP_INDEX_NAME, MmapVectorIndex.load)
+
+    rows = kb_tool.collection.get(include=["embeddings", "documents", "metadatas"])
+    kb_tool.client.create_collection(collection_name_for("v2")).add(
+        ids=rows["ids"], embeddings=rows["embeddings"], documents=rows["documents"], metadatas=rows["metadatas"]
+    )
+    publish_version("v2", str(tmp_path / "cs110_collection"))
+    export_indexes(kb_tool)
+
+    assert kb_tool.use(GUIDE).startswith("[Result 1]:\n" + GUIDE)
+    assert old.vectors is None and old.documents._file.closed
+    assert kb_tool._retired == []
+
+
+def test_concurrent_queries_load_an_artifact_once(kb_tool):
+    export_indexes(kb_tool)
+    loads = []
+
+    def slow_load(path):
+        loads.append(path)
+        time.sleep(0.05)
+        return NumpyVectorIndex.load(path)
+
+    barrier = threading.Barrier(4)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(kb_tool._get_artifact(NUMPY_INDEX_NAME, slow_load))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(index is results[0] for index in results)
+
+
+def test_unknown_backend_is_an_error(kb_tool, monkeypatch):
+    export_indexes(kb_tool)
+    monkeypatch.setattr(kb_tool, "vector_backend", "fiass")
+    assert kb_tool.use(GUIDE).startswith("Error: Unknown vector backend 'fiass'")
+
+
+def test_unknown_backend_setting_fails_at_import():
+    env = {**os.environ, "CS110_VECTOR_BACKEND": "fiass"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import pipeline.config"],
+        env=env, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.returncode != 0
+    assert "Unknown CS110_VECTOR_BACKEND 'fiass'" in result.stderr
+
+
+def test_missing_export_falls_back_to_chroma(kb_tool, monkeypatch):
+    monkeypatch.setattr(kb_tool, "vector_backend", "numpy")
+    assert "Lesson 2: Python basics" in kb_tool.use("What is lesson 2 about?")
+
+
+def test_results_are_cached_per_kb_version(kb_tool, tmp_path, monkeypatch):
+    first = kb_tool.use("What is lesson 3 about?")
+    monkeypatch.setattr(kb_tool, "_search", lambda tool_input: pytest.fail("searched again"))
+    assert kb_tool.use("what is   LESSON 3 about?") == first
+    assert kb_tool.cache_stats()["results"]["hits"] == 1
+
+    # A new version makes the cached result unreachable
+    kb_tool.client.create_collection(collection_name_for("v2"))
+    publish_version("v2", str(tmp_path / "cs110_collection"))
+    monkeypatch.setattr(kb_tool, "_search", lambda tool_input: "searched v2")
+    assert kb_tool.use("What is lesson 3 about?") == "searched v2"
+
+
+def test_result_is_not_cached_if_a_version_is_published_mid_search(kb_tool, tmp_path, monkeypatch):
+    def search_during_publish(tool_input):
+        kb_tool.client.create_collection(collection_name_for("v2"))
+        publish_version("v2", str(tmp_path / "cs110_collection"))
+        return "searched across a publish"
+
+    monkeypatch.setattr(kb_tool, "_search", search_during_publish)
+    assert kb_tool.use(GUIDE) == "searched across a publish"
+    assert len(kb_tool.result_cache) == 0
+
+    monkeypatch.setattr(kb_tool, "_search", lambda tool_input: "searched v2")
+    assert kb_tool.use(GUIDE) == "searched v2"
+    assert kb_tool.use(GUIDE) == "searched v2"
+    assert len(kb_tool.result_cache) == 1
+
+
+def test_results_are_cached_per_retrieval_settings(kb_tool, monkeypatch):
+    kb_tool.use(GUIDE)
+    searches = []
+    monkeypatch.setattr(kb_tool, "_search", lambda tool_input: searches.append(tool_input) or "fresh")
+
+    monkeypatch.setattr(kb_tool, "top_k", kb_tool.top_k + 1)
+    assert kb_tool.use(GUIDE) == "fresh"
+    monkeypatch.setattr(kb_tool, "vector_backend", "numpy")
+    assert kb_tool.use(GUIDE) == "fresh"
+    assert len(searches) == 2
+    # Same settings again: served from the cache
+    assert kb_tool.use(GUIDE) == "fresh"
+    assert len(searches) == 2
+
+
+def test_ause_runs_on_the_bounded_query_pool(kb_tool, monkeypatch):
+    monkeypatch.setattr(resources, "QUERY_POOL_WORKERS", 2)
+    monkeypatch.setattr(resources, "_query_executor", None)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+    threads = set()
+
+    def slow_search(tool_input):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            threads.add(threading.current_thread().name)
+        time.sleep(0.1)
+        with lock:
+            running["now"] -= 1
+        return f"answer to {tool_input}"
+
+    monkeypatch.setattr(kb_tool, "_search", slow_search)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        answers = await asyncio.gather(*(kb_tool.ause(f"question {n}") for n in range(4)))
+        task.cancel()
+        return answers, ticks
+
+    try:
+        answers, ticks = asyncio.run(run())
+        assert resources.get_query_executor() is resources.get_query_executor()
+    finally:
+        resources.get_query_executor().shutdown()
+
+    assert answers == [f"answer to question {n}" for n in range(4)]
+    # Two pool threads at most, and the event loop kept running meanwhile
+    assert running["max"] == 2
+    assert all(name.startswith("cs110-query") for name in threads)
+    assert ticks >= 10
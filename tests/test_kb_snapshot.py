@@ -0,0 +1,155 @@
+"""
+Single-file KB snapshots (pipeline/kb_snapshot.py, build_kb export/import)
+"""
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.kb_snapshot import (
+    SNAPSHOT_MAGIC,
+    SnapshotError,
+    read_snapshot,
+    write_snapshot,
+)
+
+PAYLOAD = {
+    "ids": ["a", "b", "c"],
+    "documents": ["alpha", "beta", "gamma"],
+    "metadatas": [{"lesson": 1}, {"lesson": 2}, {"source": "guide.txt"}],
+}
+EMBEDDINGS = np.arange(12, dtype=np.float32).reshape(3, 4) / 10
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "kb.snapshot")
+    header = write_snapshot(path, {"kb_version": "v1", "embedder": "m"}, PAYLOAD, EMBEDDINGS)
+    assert (header["count"], header["dim"]) == (3, 4)
+
+    read_header, payload, embeddings = read_snapshot(path)
+    assert read_header == header
+    assert payload == PAYLOAD
+    np.testing.assert_array_equal(embeddings, EMBEDDINGS)
+    assert not (tmp_path / "kb.snapshot.tmp").exists()
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "empty.snapshot")
+    write_snapshot(path, {}, {"ids": []}, [])
+    header, payload, embeddings = read_snapshot(path)
+    assert header["count"] == 0
+    assert embeddings.shape == (0, 0)
+
+
+@pytest.mark.parametrize("offset", [-1, -20])
+def test_corrupt_bytes_fail_the_checksum(tmp_path, offset):
+    path = tmp_path / "kb.snapshot"
+    write_snapshot(str(path), {}, PAYLOAD, EMBEDDINGS)
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError, match="checksum"):
+        read_snapshot(str(path))
+
+
+def test_truncated_snapshot(tmp_path):
+    path = tmp_path / "kb.snapshot"
+    write_snapshot(str(path), {}, PAYLOAD, EMBEDDINGS)
+    path.write_bytes(path.read_bytes()[:-8])
+
+    with pytest.raises(SnapshotError, match="truncated"):
+        read_snapshot(str(path))
+
+
+def test_rejects_other_files_and_formats(tmp_path):
+    other = tmp_path / "notes.txt"
+    other.write_text("hello\n", encoding="utf-8")
+    with pytest.raises(SnapshotError, match="not a CS110 KB snapshot"):
+        read_snapshot(str(other))
+
+    future = tmp_path / "future.snapshot"
+    future.write_bytes(SNAPSHOT_MAGIC + b'{"format": 99}\n')
+    with pytest.raises(SnapshotError, match="Unsupported snapshot format"):
+        read_snapshot(str(future))
+
+
+def write_header(path, header):
+    path.write_bytes(SNAPSHOT_MAGIC + json.dumps(header).encode("utf-8") + b"\n")
+
+
+@pytest.mark.parametrize("header, message", [
+    ([1, 2, 3], "not a JSON object"),
+    ("format", "not a JSON object"),
+    ({"format": 1}, "missing sha256, payload_bytes"),
+    ({"format": 1, "sha256": "x", "payload_bytes": 0, "vector_bytes": 0, "count": 0}, "missing dim"),
+    ({"format": 1, "sha256": 7, "payload_bytes": 0, "vector_bytes": 0, "count": 0, "dim": 0}, "sha256"),
+    ({"format": 1, "sha256": "x", "payload_bytes": -1, "vector_bytes": 0, "count": 0, "dim": 0},
+     "invalid payload_bytes"),
+    ({"format": 1, "sha256": "x", "payload_bytes": "2", "vector_bytes": 0, "count": 0, "dim": 0},
+     "invalid payload_bytes"),
+    ({"format": 1, "sha256": "x", "payload_bytes": 2, "vector_bytes": 8, "count": 3, "dim": 4},
+     "3x4 float32 vectors"),
+])
+def test_malformed_headers_are_snapshot_errors(tmp_path, header, message):
+    path = tmp_path / "bad.snapshot"
+    write_header(path, header)
+    with pytest.raises(SnapshotError, match=message):
+        read_snapshot(str(path))
+
+
+def test_export_import_between_persist_dirs(tmp_path):
+    pytest.importorskip("chromadb")
+    from pipeline import build_kb
+    from pipeline.config import EMBEDDING_MODEL
+    from pipeline.kb_versions import collection_name_for, publish_version, read_pointer
+    from pipeline.resources import get_chroma_client
+
+    source_dir = str(tmp_path / "source")
+    client = get_chroma_client(source_dir)
+    collection = client.create_collection(collection_name_for("v1"))
+    collection.upsert(
+        ids=PAYLOAD["ids"],
+        embeddings=EMBEDDINGS.tolist(),
+        documents=PAYLOAD["documents"],
+        metadatas=PAYLOAD["metadatas"],
+    )
+    publish_version("v1", source_dir)
+
+    path = str(tmp_path / "kb.snapshot")
+    header = build_kb.export_snapshot(path, persist_dir=source_dir)
+    assert header["kb_version"] == "v1"
+    assert header["embedder"] == EMBEDDING_MODEL
+
+    target_dir = str(tmp_path / "target")
+    version = build_kb.import_snapshot(path, persist_dir=target_dir)
+    assert read_pointer(target_dir)["version"] == version
+
+    rows = get_chroma_client(target_dir).get_collection(collection_name_for(version)).get(
+        include=["embeddings", "documents"]
+    )
+    order = np.argsort(rows["ids"])
+    assert [rows["ids"][i] for i in order] == PAYLOAD["ids"]
+    assert [rows["documents"][i] for i in order] == PAYLOAD["documents"]
+    np.testing.assert_allclose(np.asarray(rows["embeddings"])[order], EMBEDDINGS)
+
+
+def test_import_rejects_a_different_embedder(tmp_path):
+    pytest.importorskip("chromadb")
+    from pipeline import build_kb
+
+    path = str(tmp_path / "kb.snapshot")
+    write_snapshot(path, {"kb_version": "v1", "embedder": "some-other-model"}, PAYLOAD, EMBEDDINGS)
+    with pytest.raises(SnapshotError, match="some-other-model"):
+        build_kb.import_snapshot(path, persist_dir=str(tmp_path / "kb"))
+
+
+def test_import_rejects_a_snapshot_without_chunks(tmp_path):
+    pytest.importorskip("chromadb")
+    from pipeline import build_kb
+    from pipeline.config import EMBEDDING_MODEL
+
+    path = str(tmp_path / "kb.snapshot")
+    write_snapshot(path, {"kb_version": "v1", "embedder": EMBEDDING_MODEL}, {"ids": ["a"]}, EMBEDDINGS[:1])
+    with pytest.raises(SnapshotError, match="documents, metadatas"):
+        build_kb.import_snapshot(path, persist_dir=str(tmp_path / "kb"))
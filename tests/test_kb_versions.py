@@ -0,0 +1,101 @@
+"""
+Active-version pointer: publish, rollback, garbage collection (pipeline/kb_versions.py)
+"""
+import os
+
+from pipeline.config import KB_COLLECTION_NAME
+from pipeline.kb_versions import (
+    ActiveCollection,
+    collection_name_for,
+    garbage_collect,
+    publish_version,
+    read_pointer,
+    rollback,
+    version_dir,
+)
+
+
+class FakeClient:
+    """Just enough of chromadb's client API for versioning"""
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.opened = []
+
+    def list_collections(self):
+        return list(self.names)
+
+    def delete_collection(self, name):
+        self.names.remove(name)
+
+    def get_collection(self, name):
+        if name not in self.names:
+            raise ValueError(f"Collection {name} does not exist")
+        self.opened.append(name)
+        return name
+
+
+def test_publish_and_rollback(tmp_path):
+    persist_dir = str(tmp_path)
+    assert read_pointer(persist_dir) is None
+    assert rollback(persist_dir) is None
+
+    publish_version("v1", persist_dir)
+    publish_version("v2", persist_dir)
+    record = read_pointer(persist_dir)
+    assert record["version"] == "v2"
+    assert record["collection"] == collection_name_for("v2")
+    assert [r["version"] for r in record["history"]] == ["v1"]
+
+    back = rollback(persist_dir)
+    assert back["version"] == "v1"
+    assert back["rolled_back_from"] == "v2"
+    assert read_pointer(persist_dir)["history"] == []
+    assert rollback(persist_dir) is None
+
+
+def test_pointer_write_leaves_no_temp_files(tmp_path):
+    publish_version("v1", str(tmp_path))
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_garbage_collect_keeps_active_and_rollback_versions(tmp_path):
+    persist_dir = str(tmp_path)
+    versions = ["v1", "v2", "v3", "v4"]
+    client = FakeClient([KB_COLLECTION_NAME, "unrelated"] + [collection_name_for(v) for v in versions])
+    for version in versions:
+        os.makedirs(version_dir(version, persist_dir))
+        publish_version(version, persist_dir)
+
+    deleted = garbage_collect(client, persist_dir, keep=2)
+
+    assert sorted(deleted) == sorted([KB_COLLECTION_NAME, "v1", "v2"])
+    assert sorted(client.names) == sorted(["unrelated", collection_name_for("v3"), collection_name_for("v4")])
+    assert not os.path.exists(version_dir("v1", persist_dir))
+    assert os.path.exists(version_dir("v3", persist_dir))
+    assert [r["version"] for r in read_pointer(persist_dir)["history"]] == ["v3"]
+    # The retained previous version is still a valid rollback target
+    assert rollback(persist_dir)["version"] == "v3"
+
+
+def test_active_collection_follows_pointer(tmp_path):
+    persist_dir = str(tmp_path)
+    client = FakeClient([KB_COLLECTION_NAME, collection_name_for("v1"), collection_name_for("v2")])
+    active = ActiveCollection(client, persist_dir)
+
+    # No pointer yet: the unversioned collection from older builds
+    assert active.get() == KB_COLLECTION_NAME
+    assert active.version is None
+
+    publish_version("v1", persist_dir)
+    assert active.get() == collection_name_for("v1")
+    assert active.artifact_path("bm25.json") == os.path.join(version_dir("v1", persist_dir), "bm25.json")
+
+    # Unchanged pointer: no reopen
+    opened = len(client.opened)
+    active.get()
+    assert len(client.opened) == opened
+
+    publish_version("v2", persist_dir)
+    assert active.get() == collection_name_for("v2")
+    assert active.version == "v2"
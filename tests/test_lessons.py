@@ -0,0 +1,53 @@
+"""
+Lesson metadata extracted at build time (pipeline/lessons.py, pipeline/build_kb.py)
+"""
+from pipeline.build_kb import chunk_document, smart_chunk_lessons_with_metadata
+from pipeline.lessons import parse_lesson_header
+
+RULE = "=" * 50
+
+SCHEDULE = (
+    "CS110 lesson schedule\n\n"
+    f"{RULE}\nLesson 1: Introduction\n"
+    "Date (M-section): Mon 13 Jan\nDate (T-section): Tue 14 Jan\n"
+    f"{RULE}\nDescription:\nCourse overview.\n\n"
+    f"{RULE}\nLesson 2:\n{RULE}\n\nDescription:\n" + "Functions and parameters. " * 120 + "\n"
+)
+
+
+def test_parse_lesson_header():
+    info = parse_lesson_header(
+        "Lesson 7: Functions\nDate (M-section): Mon 3 Feb\nDate (T-section): Tue 4 Feb\n"
+    )
+    assert info == {"lesson": 7, "lesson_title": "Functions", "date_m": "Mon 3 Feb", "date_t": "Tue 4 Feb"}
+
+    # Missing pieces are left out, never None (Chroma rejects null metadata)
+    assert parse_lesson_header("Lesson 8:\nDescription only") == {"lesson": 8}
+    assert parse_lesson_header("No lesson here") == {}
+
+
+def test_lesson_chunks_carry_lesson_metadata():
+    chunks = smart_chunk_lessons_with_metadata(SCHEDULE)
+    intro, lesson1, *lesson2 = chunks
+
+    assert intro == ("CS110 lesson schedule", {})
+    assert lesson1[1] == {
+        "lesson": 1, "lesson_title": "Introduction",
+        "date_m": "Mon 13 Jan", "date_t": "Tue 14 Jan",
+        "part": 0, "parts": 1,
+    }
+    # A long lesson is split, and every part knows which lesson it belongs to
+    assert [meta["part"] for _, meta in lesson2] == [0, 1]
+    assert all(meta["lesson"] == 2 and meta["parts"] == 2 for _, meta in lesson2)
+
+
+def test_chunk_document_metadata_lines_up_with_chunks():
+    chunks, metadatas, kind = chunk_document("CS110_Lesson_Schedule.txt", SCHEDULE)
+    assert kind == "lesson-based"
+    assert len(chunks) == len(metadatas)
+    assert all(meta["source"] == "CS110_Lesson_Schedule.txt" for meta in metadatas)
+    assert [meta.get("lesson") for meta in metadatas] == [None, 1, 2, 2]
+
+    chunks, metadatas, kind = chunk_document("guide.txt", "Plain text. " * 200)
+    assert kind == "general-purpose"
+    assert metadatas == [{"source": "guide.txt"}] * len(chunks)
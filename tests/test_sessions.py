@@ -0,0 +1,259 @@
+"""
+Per-session conversation memory (pipeline/sessions.py)
+"""
+import asyncio
+import types
+
+from fairlib import Message
+
+from pipeline import sessions
+from pipeline.sessions import SessionMemory, SessionStore, estimate_tokens, with_memory
+
+
+def recount(memory):
+    """Token total recomputed from scratch, to check the running count"""
+    total = sum(estimate_tokens(str(m.content)) for m in memory.history)
+    if memory.summary:
+        total += estimate_tokens(memory.summary)
+    return total
+
+
+def agent_turn(memory, question, answer, observation="Observation: tool output"):
+    """The messages SimpleAgent records for one ReAct turn"""
+    memory.add_message(Message(role="user", content=question))
+    memory.add_message(Message(role="assistant", content='{"action": "cs110_query"}'))
+    memory.add_message(Message(role="system", content=observation))
+    memory.add_message(Message(role="assistant", content=answer))
+
+
+def test_window_keeps_the_last_max_turns_whole_turns():
+    memory = SessionMemory(max_turns=2, max_tokens=10_000)
+    for n in range(1, 4):
+        agent_turn(memory, f"question {n}", f"answer {n}")
+
+    assert [m.content for m in memory.history if m.role == "user"] == ["question 2", "question 3"]
+    assert memory.history[0].role == "user"
+    assert len(memory.history) == 8
+    assert memory.dropped_turns == 1
+    assert memory.tokens == recount(memory)
+
+
+def test_token_limit_drops_old_turns_but_never_the_current_one():
+    memory = SessionMemory(max_turns=10, max_tokens=100)
+    agent_turn(memory, "short question", "short answer")
+    agent_turn(memory, "long question", "long answer", observation="Observation: " + "x" * 1000)
+
+    assert [m.content for m in memory.history if m.role == "user"] == ["long question"]
+    # Over the limit, but the only turn left is kept intact
+    assert memory.tokens > memory.max_tokens
+    assert len(memory.history) == 4
+    assert memory.tokens == recount(memory)
+
+
+def test_add_turn_and_summary_in_history():
+    memory = SessionMemory()
+    memory.add_turn("When is lesson 7?", "August 24.")
+    assert [m.role for m in memory.get_history()] == ["user", "assistant"]
+
+    memory.summary = "Student asked about lesson 7."
+    history = memory.get_history()
+    assert history[0].role == "system"
+    assert "Student asked about lesson 7." in history[0].content
+    assert history[1:] == memory.history
+
+    memory.clear()
+    assert (memory.history, memory.summary, memory.tokens, memory.nbytes) == ([], "", 0, 0)
+
+
+def test_store_isolates_sessions_and_personas():
+    store = SessionStore()
+    a_nice = store.get("a", "nice")
+    assert store.get("a", "nice") is a_nice
+    assert store.get("a", "mean") is not a_nice
+    assert store.get("b", "nice") is not a_nice
+
+    a_nice.memory.add_turn("q", "a")
+    assert store.get("b", "nice").memory.history == []
+
+    store.drop("a")
+    assert len(store) == 1
+    assert store.get("a", "nice") is not a_nice
+
+
+def test_store_evicts_least_recently_used_sessions():
+    store = SessionStore(max_sessions=2)
+    first = store.get("1", "nice")
+    store.get("2", "nice")
+    store.get("1", "nice")
+    store.get("3", "nice")
+
+    assert store.get("1", "nice") is first
+    assert store.stats()["lru_evictions"] == 1
+    assert len(store) == 2
+
+
+def test_store_expires_idle_sessions(monkeypatch):
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(sessions, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    store = SessionStore(ttl=60)
+    old = store.get("a", "nice")
+    old.memory.add_turn("q", "a")
+
+    clock.now += 59
+    assert store.get("a", "nice") is old
+    clock.now += 60
+    stats = store.stats()
+    assert stats["sessions"] == 0
+    assert stats["ttl_evictions"] == 1
+    assert store.get("a", "nice") is not old
+
+
+def test_with_memory_binds_a_copy():
+    agent = types.SimpleNamespace(memory="shared", stateless=True, llm="llm")
+    memory = SessionMemory()
+    bound = with_memory(agent, memory)
+
+    assert bound.memory is memory
+    assert bound.stateless is False
+    assert bound.llm == "llm"
+    assert agent.memory == "shared"
+
+
+def test_compactable_leaves_the_last_turns():
+    memory = SessionMemory(max_turns=10, max_tokens=10_000)
+    for n in range(1, 4):
+        agent_turn(memory, f"question {n}", f"answer {n}")
+
+    assert len(memory.compactable(keep_turns=1)) == 8
+    assert memory.compactable(keep_turns=1)[0].content == "question 1"
+    assert memory.compactable(keep_turns=3) == []
+    assert len(memory.compactable(keep_turns=0)) == 12
+
+
+def test_fold_swaps_turns_for_the_summary():
+    memory = SessionMemory(max_turns=10, max_tokens=10_000)
+    for n in range(1, 4):
+        agent_turn(memory, f"question {n}", f"answer {n}")
+    folded = memory.compactable(keep_turns=1)
+
+    memory.fold(folded, "Asked about 1 and 2.")
+    assert [m.content for m in memory.history if m.role == "user"] == ["question 3"]
+    assert memory.summary == "Asked about 1 and 2."
+    assert memory.tokens == recount(memory)
+
+    # A second fold replaces the summary rather than appending to it
+    agent_turn(memory, "question 4", "answer 4")
+    memory.fold(memory.compactable(keep_turns=1), "Asked about 1, 2 and 3.")
+    assert memory.summary == "Asked about 1, 2 and 3."
+    assert memory.tokens == recount(memory)
+
+
+def test_fold_after_the_window_already_dropped_turns():
+    memory = SessionMemory(max_turns=2, max_tokens=10_000)
+    agent_turn(memory, "question 1", "answer 1")
+    agent_turn(memory, "question 2", "answer 2")
+    folded = memory.compactable(keep_turns=1)
+    # Turn 1 falls out of the window while the summary is being written
+    agent_turn(memory, "question 3", "answer 3")
+
+    memory.fold(folded, "summary")
+    assert [m.content for m in memory.history if m.role == "user"] == ["question 2", "question 3"]
+    assert memory.summary == "summary"
+    assert memory.tokens == recount(memory)
+
+
+def test_render_transcript_drops_tool_mechanics():
+    memory = SessionMemory()
+    agent_turn(memory, "When is GR1?", "October 1.", observation="Observation: " + "GR1 details " * 100)
+    transcript = sessions.render_transcript(memory.history)
+
+    assert "Student: When is GR1?" in transcript
+    assert "Instructor: October 1." in transcript
+    assert "cs110_query" not in transcript
+    assert len(transcript) < 500
+
+
+def test_extractive_summary_keeps_recent_material():
+    memory = SessionMemory()
+    for n in range(1, 6):
+        agent_turn(memory, f"question {n}", f"answer {n}. More detail.")
+    summary = sessions.extractive_summary("earlier", memory.history, max_chars=80)
+
+    assert len(summary) <= 80
+    assert "question 5" in summary and "answer 5." in summary
+    assert "More detail" not in summary
+
+
+class SummaryLLM:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        if self.error:
+            raise self.error
+        return Message(role="assistant", content=self.reply)
+
+
+def long_session(turns=4):
+    session = sessions.Session(SessionMemory(max_turns=10, max_tokens=10_000))
+    for n in range(1, turns + 1):
+        agent_turn(session.memory, f"question {n}", f"answer {n}", observation="Observation: " + "y" * 400)
+    return session
+
+
+def test_compactor_only_runs_over_budget():
+    compactor = sessions.SessionCompactor(budget_tokens=10_000, keep_turns=1)
+
+    async def run():
+        return compactor.schedule(long_session())
+
+    assert asyncio.run(run()) is None
+    assert compactor.stats()["compactions"] == 0
+
+
+def test_compactor_folds_with_the_llm_summary():
+    llm = SummaryLLM(reply="  Student asked   four questions. ")
+    compactor = sessions.SessionCompactor(llm=llm, budget_tokens=100, keep_turns=1)
+    session = long_session()
+
+    async def run():
+        task = compactor.schedule(session)
+        assert task is not None
+        # Already compacting: no second task
+        assert compactor.schedule(session) is None
+        await compactor.drain()
+
+    asyncio.run(run())
+    assert session.memory.summary == "Student asked four questions."
+    assert [m.content for m in session.memory.history if m.role == "user"] == ["question 4"]
+    assert session.compacting is False
+    assert compactor.stats()["compactions"] == 1
+    assert compactor.stats()["tokens_folded"] > 0
+    assert len(llm.prompts) == 1
+
+
+def test_compactor_falls_back_to_an_extractive_summary():
+    compactor = sessions.SessionCompactor(llm=SummaryLLM(error=RuntimeError("down")), budget_tokens=100, keep_turns=1)
+    session = long_session()
+
+    asyncio.run(compactor.compact(session))
+    assert "question 1" in session.memory.summary
+    assert session.memory.tokens == recount(session.memory)
+
+
+def test_turns_added_during_compaction_survive():
+    session = long_session()
+
+    class SlowLLM(SummaryLLM):
+        async def ainvoke(self, messages):
+            # The session answers another question meanwhile
+            async with session.lock:
+                agent_turn(session.memory, "question 5", "answer 5")
+            return await super().ainvoke(messages)
+
+    compactor = sessions.SessionCompactor(llm=SlowLLM(reply="summary"), budget_tokens=100, keep_turns=1)
+    asyncio.run(compactor.compact(session))
+    assert [m.content for m in session.memory.history if m.role == "user"] == ["question 4", "question 5"]
@@ -0,0 +1,198 @@
+"""
+Alternative vector index backends (pipeline/vector_backends.py)
+"""
+import numpy as np
+import pytest
+
+from pipeline.vector_backends import (
+    FaissVectorIndex,
+    MappedTexts,
+    MmapVectorIndex,
+    NumpyVectorIndex,
+    QuantizedVectorIndex,
+    chroma_query,
+)
+
+DIM = 16
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(7)
+    n = 60
+    return {
+        "ids": [f"chunk-{i}" for i in range(n)],
+        "embeddings": rng.standard_normal((n, DIM)).astype(np.float32),
+        "documents": [f"text {i}" for i in range(n)],
+        "metadatas": [{"source": "doc.txt", "lesson": i % 6} for i in range(n)],
+    }
+
+
+@pytest.fixture
+def query():
+    return np.random.default_rng(11).standard_normal(DIM).astype(np.float32)
+
+
+def exact_top(rows, query, k, where=None):
+    """Brute-force cosine ranking, optionally restricted by an equality filter"""
+    matrix = rows["embeddings"] / np.linalg.norm(rows["embeddings"], axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    order = [
+        i for i in np.argsort(-scores)
+        if not where or all(rows["metadatas"][i].get(key) == value for key, value in where.items())
+    ]
+    return [rows["ids"][i] for i in order[:k]]
+
+
+def build(cls, rows, **kwargs):
+    return cls.from_rows(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"], **kwargs)
+
+
+def test_numpy_index_is_exact(rows, query):
+    index = build(NumpyVectorIndex, rows)
+    result = index.query(query, k=5)
+
+    assert result["ids"] == exact_top(rows, query, 5)
+    assert result["documents"] == [f"text {i.split('-')[1]}" for i in result["ids"]]
+    assert result["scores"] == sorted(result["scores"], reverse=True)
+
+
+def test_numpy_where_filter_runs_inside_the_search(rows, query):
+    index = build(NumpyVectorIndex, rows)
+    result = index.query(query, k=3, where={"lesson": 2})
+
+    assert result["ids"] == exact_top(rows, query, 3, where={"lesson": 2})
+    assert all(meta["lesson"] == 2 for meta in result["metadatas"])
+    assert index.query(query, k=3, where={"lesson": 99})["ids"] == []
+    # Asking for more than there are returns what there is
+    assert len(index.query(query, k=100, where={"lesson": 2})["ids"]) == 10
+
+
+def test_numpy_index_round_trip(tmp_path, rows, query):
+    path = str(tmp_path / "vectors.npz")
+    build(NumpyVectorIndex, rows).save(path)
+    loaded = NumpyVectorIndex.load(path)
+
+    assert loaded.ids == rows["ids"]
+    assert loaded.query(query, k=5)["ids"] == exact_top(rows, query, 5)
+    assert NumpyVectorIndex.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_float16_index_keeps_the_ranking(rows, query):
+    index = build(NumpyVectorIndex, rows, dtype="float16")
+    assert index.vectors.dtype == np.float16
+    assert index.nbytes == len(rows["ids"]) * DIM * 2
+    assert index.query(query, k=3)["ids"] == exact_top(rows, query, 3)
+
+
+def test_numpy_and_chroma_agree(rows, query):
+    chromadb = pytest.importorskip("chromadb")
+    collection = chromadb.EphemeralClient().create_collection("backends")
+    unit = rows["embeddings"] / np.linalg.norm(rows["embeddings"], axis=1, keepdims=True)
+    collection.add(ids=rows["ids"], embeddings=unit.tolist(),
+                   documents=rows["documents"], metadatas=rows["metadatas"])
+
+    chroma = chroma_query(collection, query.tolist(), k=3, where={"lesson": 4})
+    numpy = build(NumpyVectorIndex, rows).query(query, k=3, where={"lesson": 4})
+    assert chroma["ids"] == numpy["ids"]
+    assert set(chroma) == {"ids", "documents", "metadatas", "scores"}
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_faiss_indexes_filter_inside_the_search(rows, query, index_type):
+    pytest.importorskip("faiss")
+    # nprobe == nlist, so even IVF scans every list and stays exact
+    index = build(FaissVectorIndex, rows, index_type=index_type, nlist=4, nprobe=4)
+
+    assert index.query(query, k=5)["ids"] == exact_top(rows, query, 5)
+    result = index.query(query, k=3, where={"lesson": 2})
+    assert result["ids"] == exact_top(rows, query, 3, where={"lesson": 2})
+    assert all(meta["lesson"] == 2 for meta in result["metadatas"])
+    assert index.query(query, k=3, where={"lesson": 99})["ids"] == []
+
+
+def test_faiss_round_trip(tmp_path, rows, query):
+    pytest.importorskip("faiss")
+    index_path, payload_path = str(tmp_path / "faiss.index"), str(tmp_path / "payload.json")
+    build(FaissVectorIndex, rows, index_type="hnsw").save(index_path, payload_path)
+
+    loaded = FaissVectorIndex.load(index_path, payload_path, ef_search=32)
+    assert loaded.index_type == "hnsw"
+    assert loaded.index.hnsw.efSearch == 32
+    assert loaded.query(query, k=3, where={"lesson": 1})["ids"] == exact_top(rows, query, 3, where={"lesson": 1})
+    assert FaissVectorIndex.load(str(tmp_path / "missing.index"), payload_path) is None
+
+
+def test_unknown_faiss_index_type(rows):
+    pytest.importorskip("faiss")
+    with pytest.raises(ValueError):
+        build(FaissVectorIndex, rows, index_type="lsh")
+
+
+def test_mapped_texts(tmp_path):
+    path = str(tmp_path / "texts.bin")
+    texts = ["alpha", "", "naïve café", "omega"]
+    texts_file = MappedTexts(path, MappedTexts.write(path, texts))
+    try:
+        assert len(texts_file) == 4
+        assert [texts_file[i] for i in range(4)] == texts
+    finally:
+        texts_file.close()
+
+    empty = MappedTexts(path, MappedTexts.write(path, []))
+    assert len(empty) == 0
+    empty.close()
+
+
+def test_mmap_index_matches_numpy(tmp_path, rows, query):
+    path = str(tmp_path / "mmap")
+    written = MmapVectorIndex.write(path, rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+    index = MmapVectorIndex.load(path)
+
+    assert written == len(rows["ids"]) * DIM * 4 + sum(len(d) for d in rows["documents"])
+    assert isinstance(index.vectors, np.memmap)
+    numpy = build(NumpyVectorIndex, rows)
+    assert index.query(query, k=5) == numpy.query(query, k=5)
+    assert index.query(query, k=3, where={"lesson": 3})["ids"] == exact_top(rows, query, 3, where={"lesson": 3})
+    assert MmapVectorIndex.load(str(tmp_path / "missing")) is None
+
+    texts = index.documents
+    index.close()
+    assert index.vectors is None
+    assert texts._file.closed and texts._buffer.closed
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_index_rescores_to_the_exact_ranking(tmp_path, rows, query, dtype):
+    mmap_path = str(tmp_path / "mmap")
+    MmapVectorIndex.write(mmap_path, rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+    path = str(tmp_path / "quantized.npz")
+    build(QuantizedVectorIndex, rows, dtype=dtype).save(path)
+
+    index = QuantizedVectorIndex.load(path, full_vectors_path=f"{mmap_path}/vectors.npy", rescore_factor=4)
+    assert index.vectors.dtype == np.dtype(dtype)
+    assert index.query(query, k=5)["ids"] == exact_top(rows, query, 5)
+    result = index.query(query, k=3, where={"lesson": 5})
+    assert result["ids"] == exact_top(rows, query, 3, where={"lesson": 5})
+    assert all(meta["lesson"] == 5 for meta in result["metadatas"])
+    # Re-scored results carry full-precision scores
+    exact = NumpyVectorIndex.from_rows(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+    assert result["scores"] == pytest.approx(exact.query(query, k=3, where={"lesson": 5})["scores"], abs=1e-6)
+
+
+def test_int8_codes_are_a_quarter_of_float32(rows):
+    index = build(QuantizedVectorIndex, rows)
+    assert index.vectors.dtype == np.int8
+    assert index.nbytes == len(rows["ids"]) * DIM + DIM * 4
+
+
+def test_quantized_load_without_full_vectors(tmp_path, rows, query):
+    path = str(tmp_path / "quantized.npz")
+    build(QuantizedVectorIndex, rows).save(path)
+
+    index = QuantizedVectorIndex.load(path, full_vectors_path=str(tmp_path / "missing.npy"))
+    assert index.full_vectors is None
+    assert len(index.query(query, k=3)["ids"]) == 3
+    assert QuantizedVectorIndex.load(str(tmp_path / "missing.npz")) is None
+    with pytest.raises(ValueError):
+        build(QuantizedVectorIndex, rows, dtype="int4")
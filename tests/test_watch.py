@@ -0,0 +1,133 @@
+"""
+Watch mode: polling cs110_docs/ and debounced rebuilds (pipeline/build_kb.py)
+"""
+import os
+
+import pytest
+
+from pipeline import build_kb
+from pipeline.build_kb import describe_changes, snapshot_docs
+
+
+def test_snapshot_and_describe_changes(tmp_path):
+    (tmp_path / "a.txt").write_text("one", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("two", encoding="utf-8")
+    (tmp_path / "notes.md").write_text("ignored", encoding="utf-8")
+    before = snapshot_docs(str(tmp_path))
+    assert set(before) == {"a.txt", "b.txt"}
+
+    (tmp_path / "a.txt").write_text("one, edited", encoding="utf-8")
+    (tmp_path / "b.txt").unlink()
+    (tmp_path / "c.txt").write_text("three", encoding="utf-8")
+    after = snapshot_docs(str(tmp_path))
+
+    assert describe_changes(before, after) == "+c.txt, -b.txt, ~a.txt"
+    assert describe_changes(after, after) == ""
+
+
+class FakeTime:
+    """
+    Stands in for the time module in pipeline.build_kb
+
+    sleep() advances the clock and then runs the next scripted step, so a
+    test decides what happens to the docs folder between polls. When the
+    script runs out the watcher is stopped with KeyboardInterrupt.
+    """
+
+    def __init__(self, steps):
+        self.now = 0.0
+        self.steps = list(steps)
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if not self.steps:
+            raise KeyboardInterrupt
+        self.steps.pop(0)()
+
+
+@pytest.fixture
+def watched(tmp_path, monkeypatch):
+    docs = tmp_path / "cs110_docs"
+    docs.mkdir()
+    (docs / "guide.txt").write_text("v0", encoding="utf-8")
+    builds = []
+    monkeypatch.setattr(build_kb, "project_path", lambda relative: str(tmp_path / relative))
+    monkeypatch.setattr(build_kb, "build_cs110_kb", lambda **kwargs: builds.append(kwargs))
+    return docs, builds
+
+
+def edit(path, text):
+    def step():
+        path.write_text(text, encoding="utf-8")
+        # Make sure the mtime moves even on coarse-grained filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    return step
+
+
+def idle():
+    pass
+
+
+def test_a_burst_of_edits_is_one_rebuild(watched, monkeypatch):
+    docs, builds = watched
+    guide = docs / "guide.txt"
+    steps = [
+        idle,                    # poll: nothing changed
+        edit(guide, "v1"),       # poll: change detected
+        edit(guide, "v2"),       # debounce: more changes, timer restarts
+        idle, idle,              # quiet for the debounce period -> rebuild
+        idle,                    # poll: nothing changed
+    ]
+    monkeypatch.setattr(build_kb, "time", FakeTime(steps))
+
+    build_kb.watch_docs(interval=1, debounce=2, keep=3)
+
+    # The catch-up build at start, then a single rebuild for both edits
+    assert builds == [{"keep": 3}, {"keep": 3}]
+
+
+def test_a_failed_rebuild_keeps_watching(watched, monkeypatch):
+    docs, builds = watched
+    guide = docs / "guide.txt"
+    calls = []
+
+    def flaky_build(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise RuntimeError("embedder exploded")
+
+    monkeypatch.setattr(build_kb, "build_cs110_kb", flaky_build)
+    steps = [edit(guide, "v1"), idle, edit(guide, "v2"), idle]
+    monkeypatch.setattr(build_kb, "time", FakeTime(steps))
+
+    build_kb.watch_docs(interval=1, debounce=1)
+    assert len(calls) == 3
+
+
+def test_failed_rebuilds_are_retried_with_backoff(watched, monkeypatch):
+    docs, _ = watched
+    clock = FakeTime([edit(docs / "guide.txt", "v1")] + [idle] * 13)
+    monkeypatch.setattr(build_kb, "time", clock)
+    build_times = []
+
+    def failing_build(**kwargs):
+        build_times.append(clock.now)
+        # The catch-up build works, then three rebuilds fail
+        if 2 <= len(build_times) <= 4:
+            raise RuntimeError("embedder exploded")
+
+    monkeypatch.setattr(build_kb, "build_cs110_kb", failing_build)
+    build_kb.watch_docs(interval=1, debounce=1, max_backoff=5)
+
+    # Retried after 2s, 4s, then capped at 5s; nothing changed after the last success
+    assert build_times == [0, 2, 4, 8, 13]